@@ -0,0 +1,148 @@
+"""
+Record/replay cassettes for upstream responses.
+In "record" mode every upstream response is appended to a compact JSON-lines
+file keyed by a hash of the request; in "replay" mode responses are served
+from that file without touching the network. A sidecar `.idx` file maps keys
+to byte offsets so replay is one positioned read, not a scan.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .config import settings
+
+MODES = ("off", "record", "replay")
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when no recording exists for a request"""
+
+
+def request_key(kind: str, request: str) -> str:
+    """Stable key for an upstream request (kind + request text)"""
+    return hashlib.sha256(f"{kind}\0{request}".encode()).hexdigest()
+
+
+class Cassette:
+    """
+    Append-only JSON-lines store with an offset index.
+
+    A read-only cassette (for replay) must already exist with its index, so a
+    mistyped path fails instead of replaying from an empty file.
+    """
+
+    def __init__(self, path: str, read_only: bool = False):
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self.read_only = read_only
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+
+        if read_only:
+            for required in (path, self.index_path):
+                if not os.path.exists(required):
+                    raise FileNotFoundError(f"Cassette file {required} not found; record it with CASSETTE_MODE=record")
+            self._fd = os.open(path, os.O_RDONLY)
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        self._load_index()
+
+    def _load_index(self) -> None:
+        data_size = os.fstat(self._fd).st_size
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as fh:
+                for line in fh:
+                    key, offset, length = line.split()
+                    self._index[key] = (int(offset), int(length))
+            indexed_up_to = max((o + n for o, n in self._index.values()), default=0)
+            if indexed_up_to == data_size:
+                return
+
+        # Missing or stale index: rebuild it with one pass over the data file
+        # (in memory only when read-only)
+        self._index.clear()
+        offset = 0
+        with open(self.path, "rb") as fh:
+            for line in fh:
+                self._index[json.loads(line)["key"]] = (offset, len(line))
+                offset += len(line)
+        if not self.read_only:
+            with open(self.index_path, "w") as out:
+                out.writelines(f"{key} {o} {n}\n" for key, (o, n) in self._index.items())
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the recorded response for a key, or None"""
+        location = self._index.get(key)
+        if location is None:
+            return None
+        offset, length = location
+        return json.loads(os.pread(self._fd, length, offset))["response"]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def put(self, key: str, kind: str, response: Any) -> None:
+        """Append a response; the latest recording for a key wins"""
+        line = (json.dumps({"key": key, "kind": kind, "response": response}, separators=(",", ":")) + "\n").encode()
+        with self._lock:
+            offset = os.fstat(self._fd).st_size
+            os.write(self._fd, line)
+            with open(self.index_path, "a") as out:
+                out.write(f"{key} {offset} {len(line)}\n")
+            self._index[key] = (offset, len(line))
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Cassette:
+    """The process-wide cassette at `settings.cassette_path`, opened on first use"""
+    global _cassette
+    if _cassette is None:
+        with _cassette_lock:
+            if _cassette is None:
+                _cassette = Cassette(settings.cassette_path, read_only=settings.cassette_mode == "replay")
+    return _cassette
+
+
+def recorded(kind: str, request: str, call: Callable[[], Any]) -> Any:
+    """
+    Run an upstream call through the cassette according to `settings.cassette_mode`.
+
+    Args:
+        kind: Upstream name (eg. "gemini", "unsplash")
+        request: Text that fully identifies the request (model + prompt, query, ...)
+        call: Performs the real upstream call and returns its decoded JSON
+
+    Returns:
+        The recorded or live response
+
+    Raises:
+        CassetteMiss: In replay mode when the request was never recorded
+    """
+    mode = settings.cassette_mode
+    if mode == "off":
+        return call()
+
+    key = request_key(kind, request)
+    cassette = get_cassette()
+    if mode == "replay":
+        response = cassette.get(key)
+        if response is None:
+            raise CassetteMiss(f"No {kind} recording for request {key[:12]}")
+        return response
+
+    response = call()
+    cassette.put(key, kind, response)
+    return response
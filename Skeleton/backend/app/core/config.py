@@ -5,7 +5,7 @@ Apps should inherit from BaseAppSettings and add their own fields.
 import os
 from pydantic_settings import BaseSettings
 from pydantic import Field
-from typing import Optional
+from typing import Dict, List, Literal, Optional, Tuple
 
 
 class BaseAppSettings(BaseSettings):
@@ -18,6 +18,90 @@ class BaseAppSettings(BaseSettings):
     
     # AI Integration
     gemini_api_key: Optional[str] = Field(default=None, env="GEMINI_API_KEY")
+    # Point at scripts/fake_upstream.py for local benchmarks
+    gemini_base_url: str = "https://generativelanguage.googleapis.com"
+    # Optional providers for gemini_client.complete(provider=...)
+    anthropic_api_key: Optional[str] = Field(default=None, env="ANTHROPIC_API_KEY")
+    openrouter_key: Optional[str] = Field(default=None, env="OPENROUTER_KEY")
+    # Keep-alive connections per upstream host in the shared HTTP session
+    upstream_pool_size: int = 16
+    # Upstream calls in flight at once (LLM and image search); extra calls wait
+    # for a slot within their request budget
+    upstream_max_concurrency: int = 16
+    # USD per million (input, output) tokens, for the llm_cost_usd_total estimate;
+    # models missing here have their tokens counted but no cost
+    model_prices: Dict[str, Tuple[float, float]] = {
+        "gemini-2.0-flash": (0.10, 0.40),
+        "gemini-2.0-flash-lite": (0.075, 0.30),
+    }
+    # Model per LLM task (a name from gemini_client.TASKS): short, low-stakes
+    # sub-tasks run on flash-lite; tasks missing here use gemini-2.0-flash
+    task_models: Dict[str, str] = {
+        "links_prompt": "gemini-2.0-flash-lite",
+    }
+
+    # Request time budgets (seconds) that upstream timeouts are derived from
+    request_budget_seconds: float = 25.0
+    route_budgets: Dict[str, float] = {}
+
+    # Stale-while-revalidate windows per cached route: (fresh seconds, stale seconds)
+    cache_windows: Dict[str, Tuple[float, float]] = {
+        "/api/flowchart": (3600.0, 86400.0),
+    }
+    cache_max_entries: int = 512
+
+    # Pre-generated flowcharts for popular problems, served before calling Gemini
+    flowchart_bank_path: Optional[str] = "data/flowchart_bank.jsonl"
+
+    # Generated flowcharts are kept for reloads and sharing (GET /api/flowchart/{id})
+    flowchart_store_path: Optional[str] = "data/flowcharts.sqlite3"
+    flowchart_retention_days: float = 30.0
+    flowchart_store_max_rows: int = 50000
+
+    # ETag/If-None-Match on GET routes, with a Cache-Control policy per route template
+    conditional_get_enabled: bool = True
+    cache_control_policies: Dict[str, str] = {}
+
+    # gzip/brotli response compression (brotli only if the package is installed)
+    compression_enabled: bool = True
+    compression_minimum_size: int = 1024
+    gzip_level: int = 6
+    brotli_quality: int = 5
+    compression_exclude_paths: List[str] = []
+
+    # Structured JSON logs on stdout; routine requests are sampled, errors,
+    # slow requests and fallbacks are always logged
+    log_level: str = "INFO"
+    request_logging_enabled: bool = True
+    request_log_sample_rate: float = 1.0
+    request_log_slow_ms: float = 2000.0
+
+    # Apps served together by app.host (path prefix -> backend dir, relative to
+    # Skeleton/backend); each keeps its own settings
+    hosted_apps: Dict[str, str] = {
+        "/logichinter": "../../app1-LogicHinter/backend",
+        "/studyhinter": "../../app2-StudyHinter/backend",
+    }
+
+    # Warm up on startup (connections, schemas, banks) before /ready reports ready;
+    # the prompt costs a few tokens per deploy
+    warmup_enabled: bool = True
+    warmup_prompt_enabled: bool = False
+
+    # Expose Prometheus-style metrics at /metrics
+    metrics_enabled: bool = True
+
+    # Server-Timing header per request; debug also returns timings in metadata
+    server_timing_enabled: bool = True
+    server_timing_debug: bool = False
+
+    # Upstream cassette: "off", "record" real responses, or "replay" them offline
+    cassette_mode: Literal["off", "record", "replay"] = "off"
+    cassette_path: str = "cassettes/upstream.jsonl"
+
+    # Admin-gated sampling profiler (/admin/profile); off unless enabled with a token
+    profiling_enabled: bool = False
+    admin_token: Optional[str] = None
     
     class Config:
         # Looks for .env in backend/ by default
@@ -0,0 +1,111 @@
+"""
+Request-scoped deadlines for upstream calls.
+The middleware stamps every HTTP request with an absolute deadline taken from
+a per-route budget, and upstream clients size their timeouts from whatever is
+left of it instead of using their own fixed values. Background jobs get their
+own deadline, plus a cancel flag that ends the budget early when set.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+# Below this many seconds an upstream call is not worth starting
+MIN_UPSTREAM_TIMEOUT = 0.5
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+_cancel: ContextVar[Optional[threading.Event]] = ContextVar("request_cancel", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the request budget is spent before an upstream call starts"""
+
+
+def remaining() -> Optional[float]:
+    """
+    Seconds left in the current request budget.
+
+    Returns:
+        Remaining seconds, or None when no deadline is active
+    """
+    cancel = _cancel.get()
+    if cancel is not None and cancel.is_set():
+        return 0.0
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def expired() -> bool:
+    """Whether the current request budget is too small for another upstream call"""
+    left = remaining()
+    return left is not None and left < MIN_UPSTREAM_TIMEOUT
+
+
+def timeout_for(default: float) -> float:
+    """
+    Derive an upstream timeout from the remaining request budget.
+
+    Args:
+        default: The timeout to use when no deadline is active
+
+    Returns:
+        The smaller of `default` and the remaining budget
+
+    Raises:
+        DeadlineExceeded: If the budget is already spent
+    """
+    left = remaining()
+    if left is None:
+        return default
+    if left < MIN_UPSTREAM_TIMEOUT:
+        raise DeadlineExceeded("Request time budget exhausted")
+    return min(default, left)
+
+
+@contextmanager
+def deadline_scope(seconds: float, cancel: Optional[threading.Event] = None) -> Iterator[None]:
+    """
+    Run a block under its own deadline (scripts, background work).
+
+    Args:
+        seconds: Budget for the block
+        cancel: When set, the budget counts as spent from then on
+    """
+    token = _deadline.set(time.monotonic() + seconds)
+    cancel_token = _cancel.set(cancel)
+    try:
+        yield
+    finally:
+        _cancel.reset(cancel_token)
+        _deadline.reset(token)
+
+
+def budget_for(path: str, route_budgets: Dict[str, float], default: float) -> float:
+    """Pick the budget for a request path, falling back to the default"""
+    return route_budgets.get(path.rstrip("/") or "/", default)
+
+
+class DeadlineMiddleware:
+    """ASGI middleware that sets the request deadline from a per-route budget"""
+
+    def __init__(self, app, default_budget: float, route_budgets: Optional[Dict[str, float]] = None):
+        self.app = app
+        self.default_budget = default_budget
+        self.route_budgets = route_budgets or {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        budget = budget_for(scope["path"], self.route_budgets, self.default_budget)
+        token = _deadline.set(time.monotonic() + budget)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _deadline.reset(token)
@@ -0,0 +1,100 @@
+"""
+Conditional GET support for cacheable endpoints.
+GET responses get a strong ETag computed from the serialized body and a
+per-route Cache-Control policy; a matching If-None-Match is answered with 304
+and no body, so browsers and the CDN can revalidate cheaply. Responses that
+already carry an ETag, aren't 200, or are streamed as server-sent events are
+passed through untouched.
+"""
+from __future__ import annotations
+
+import hashlib
+from typing import Dict, Optional
+
+
+def body_etag(body: bytes) -> str:
+    """Strong ETag for a response body"""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """Weak comparison as required for If-None-Match"""
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in tags or "*" in tags
+
+
+class ConditionalGetMiddleware:
+    """
+    ASGI middleware adding ETags, 304 responses and Cache-Control.
+
+    Args:
+        app: The ASGI app
+        policies: Cache-Control value per route template, eg.
+            {"/api/diagram": "public, max-age=3600, stale-while-revalidate=86400"}
+        default_policy: Cache-Control for GET routes without a policy (None: leave unset)
+    """
+
+    def __init__(self, app, policies: Optional[Dict[str, str]] = None, default_policy: Optional[str] = None):
+        self.app = app
+        self.policies = policies or {}
+        self.default_policy = default_policy
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[dict] = None
+        chunks = []
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = dict(message.get("headers", []))
+                if (
+                    message["status"] != 200
+                    or b"etag" in headers
+                    or headers.get(b"content-type", b"").startswith(b"text/event-stream")
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            await self._send_buffered(scope, start_message, b"".join(chunks), send)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _send_buffered(self, scope, start_message: dict, body: bytes, send) -> None:
+        etag = body_etag(body)
+        headers = [(name, value) for name, value in start_message.get("headers", [])]
+        header_names = {name for name, _ in headers}
+        headers.append((b"etag", etag.encode()))
+
+        route_path = getattr(scope.get("route"), "path", None) or scope["path"]
+        policy = self.policies.get(route_path, self.default_policy)
+        if policy and b"cache-control" not in header_names:
+            headers.append((b"cache-control", policy.encode()))
+
+        request_headers = dict(scope["headers"])
+        if_none_match = request_headers.get(b"if-none-match", b"").decode("latin-1")
+        if etag_matches(etag, if_none_match):
+            kept = [(n, v) for n, v in headers if n not in (b"content-length", b"content-type")]
+            await send({"type": "http.response.start", "status": 304, "headers": kept})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        await send({**start_message, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
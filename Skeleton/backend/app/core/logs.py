@@ -0,0 +1,220 @@
+"""
+Structured JSON request logging that never blocks a handler.
+Records are put on a bounded in-memory queue by a QueueHandler and written to
+stdout by a QueueListener on a background thread; when the queue is full,
+records are dropped (and counted) rather than waiting. One "request" event is
+emitted per request with its id, route, status, latency and what happened
+along the way: upstream calls, LLM tokens, fallbacks used and cache lookups. Routine
+successful requests are sampled; errors, slow requests and fallbacks are
+always logged.
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+LOGGER_NAME = "app"
+REQUEST_ID_HEADER = b"x-request-id"
+QUEUE_SIZE = 10000
+
+logger = logging.getLogger(LOGGER_NAME)
+
+_request: ContextVar[Optional[Dict[str, Any]]] = ContextVar("request_log_context", default=None)
+_listener: Optional[logging.handlers.QueueListener] = None
+
+# Attributes every LogRecord has; anything else was passed via `extra`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _RequestContextFilter(logging.Filter):
+    """Stamp records with the current request id and route (runs on the caller's thread)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _request.get()
+        if context is not None and not hasattr(record, "request_id"):
+            record.request_id = context["request_id"]
+            record.route = context["route"]
+        return True
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _DroppingQueueHandler.dropped += 1
+
+
+def configure_logging(level: str = "INFO") -> None:
+    """Route the app logger through a background queue listener (idempotent)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter())
+    handler = _DroppingQueueHandler(queue.Queue(QUEUE_SIZE))
+    handler.addFilter(_RequestContextFilter())
+
+    logger.addHandler(handler)
+    logger.setLevel(level.upper())
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(handler.queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def log_event(event: str, level: int = logging.INFO, sample_rate: float = 1.0, **fields: Any) -> None:
+    """
+    Log a structured event.
+
+    Args:
+        event: Short event name, eg. "cache_refresh_failed"
+        level: Logging level
+        sample_rate: Fraction of calls actually logged (for high-volume events)
+        **fields: Extra JSON fields
+    """
+    if sample_rate < 1.0 and random.random() >= sample_rate:
+        return
+    logger.log(level, event, extra=fields)
+
+
+def note_upstream(provider: str, seconds: float, error: Optional[str] = None) -> None:
+    context = _request.get()
+    if context is not None:
+        call = {"provider": provider, "ms": round(seconds * 1000, 1)}
+        if error:
+            call["error"] = error
+        context["upstream"].append(call)
+
+
+def note_fallback(fallback: str) -> None:
+    context = _request.get()
+    if context is not None:
+        context["fallbacks"].append(fallback)
+
+
+def note_cache(cache: str, status: str) -> None:
+    context = _request.get()
+    if context is not None:
+        context["cache"][cache] = status
+
+
+def note_tokens(task: str, model: str, input_tokens: int, output_tokens: int) -> None:
+    context = _request.get()
+    if context is not None:
+        tokens = context["tokens"].setdefault(task, {"model": model, "input": 0, "output": 0})
+        tokens["input"] += input_tokens
+        tokens["output"] += output_tokens
+
+
+def current_request_id() -> Optional[str]:
+    context = _request.get()
+    return context["request_id"] if context is not None else None
+
+
+class RequestLoggingMiddleware:
+    """
+    ASGI middleware emitting one sampled "request" event per HTTP request.
+
+    Args:
+        app: The ASGI app
+        sample_rate: Fraction of routine requests logged (0-1)
+        slow_ms: Requests slower than this are always logged
+    """
+
+    def __init__(self, app, sample_rate: float = 1.0, slow_ms: float = 2000.0):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        request_id = dict(scope["headers"]).get(REQUEST_ID_HEADER, b"").decode("latin-1")[:64] or uuid.uuid4().hex
+        context: Dict[str, Any] = {
+            "request_id": request_id,
+            "route": None,
+            "upstream": [],
+            "fallbacks": [],
+            "cache": {},
+            "tokens": {},
+        }
+        token = _request.set(context)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((REQUEST_ID_HEADER, request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            latency_ms = (time.perf_counter() - start) * 1000
+            context["route"] = getattr(scope.get("route"), "path", None) or "unmatched"
+            self._emit(scope, context, status[0], latency_ms)
+            _request.reset(token)
+
+    def _emit(self, scope, context: Dict[str, Any], status: int, latency_ms: float) -> None:
+        notable = status >= 500 or latency_ms >= self.slow_ms or context["fallbacks"]
+        if not notable and self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+
+        fields: Dict[str, Any] = {
+            "request_id": context["request_id"],
+            "route": context["route"],
+            "method": scope["method"],
+            "status": status,
+            "latency_ms": round(latency_ms, 1),
+        }
+        upstream: List[dict] = context["upstream"]
+        if upstream:
+            fields["upstream"] = upstream
+        if context["fallbacks"]:
+            fields["fallbacks"] = context["fallbacks"]
+        if context["cache"]:
+            fields["cache"] = context["cache"]
+        if context["tokens"]:
+            fields["tokens"] = context["tokens"]
+        if not notable and self.sample_rate < 1.0:
+            fields["sample_rate"] = self.sample_rate
+
+        level = logging.ERROR if status >= 500 else logging.WARNING if notable else logging.INFO
+        logger.log(level, "request", extra=fields)
@@ -31,6 +31,8 @@ class FlowchartResponse(BaseModel):
     """Response containing a generated flowchart"""
     steps: List[FlowStep] = Field(..., description="The flowchart steps")
     warning: Optional[str] = Field(None, description="Any warnings about the generation process")
+    metadata: Optional[dict] = Field(None, description="Additional metadata, e.g. cache status")
+    flowchart_id: Optional[str] = Field(None, description="Id for retrieving this flowchart again via GET")
 
 
 class StepLink(BaseModel):
@@ -0,0 +1,141 @@
+"""
+Persistent store for generated flowcharts, so they can be reloaded and shared.
+Flowcharts are saved in SQLite under a short id derived from their content
+(the same flowchart always gets the same id), as zlib-compressed JSON. Rows
+older than the retention window, or beyond the row cap, are pruned
+periodically on write.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+from fastapi import Response
+
+from .etag import etag_matches
+
+ID_LENGTH = 12
+PRUNE_EVERY = 200  # saves between retention sweeps
+CLIENT_MAX_AGE = 86400  # ids are content-derived, so a stored flowchart never changes
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS flowcharts (
+    id TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS flowcharts_created_at ON flowcharts (created_at);
+"""
+
+
+def content_id(steps: List[Dict[str, Any]]) -> str:
+    """Short, URL-safe id derived from the flowchart steps"""
+    canonical = json.dumps(steps, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+    digest = hashlib.sha256(canonical).digest()
+    return base64.urlsafe_b64encode(digest).decode()[:ID_LENGTH]
+
+
+class FlowchartStore:
+    """SQLite-backed flowchart store with a retention policy"""
+
+    def __init__(self, path: str, retention_days: float = 30.0, max_rows: int = 50000):
+        self.path = path
+        self.retention_seconds = retention_days * 86400
+        self.max_rows = max_rows
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._saves = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use (callers hold the lock)"""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def open(self) -> None:
+        """Open the database now rather than on the first request"""
+        with self._lock:
+            self._connection().execute("SELECT 1 FROM flowcharts LIMIT 1").fetchall()
+
+    def save(self, steps: List[Dict[str, Any]]) -> str:
+        """
+        Store a flowchart; saving one already stored renews its retention,
+        so an expired row that has not been pruned yet is served again.
+
+        Returns:
+            The flowchart's content id
+        """
+        flowchart_id = content_id(steps)
+        body = json.dumps({"flowchart_id": flowchart_id, "steps": steps}, ensure_ascii=False).encode()
+        with self._lock:
+            self._connection().execute(
+                "INSERT INTO flowcharts (id, body, created_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET created_at = excluded.created_at",
+                (flowchart_id, zlib.compress(body, 6), time.time()),
+            )
+            self._saves += 1
+            if self._saves % PRUNE_EVERY == 0:
+                self._prune()
+        return flowchart_id
+
+    def load(self, flowchart_id: str) -> Optional[bytes]:
+        """Return the stored flowchart as JSON bytes, or None"""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT body, created_at FROM flowcharts WHERE id = ?", (flowchart_id,)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.retention_seconds:
+            return None
+        return zlib.decompress(row[0])
+
+    def prune(self) -> None:
+        with self._lock:
+            self._prune()
+
+    def _prune(self) -> None:
+        conn = self._connection()
+        conn.execute("DELETE FROM flowcharts WHERE created_at < ?", (time.time() - self.retention_seconds,))
+        conn.execute(
+            "DELETE FROM flowcharts WHERE id IN "
+            "(SELECT id FROM flowcharts ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_rows,),
+        )
+
+
+def open_store(path: Optional[str], retention_days: float, max_rows: int) -> Optional[FlowchartStore]:
+    """Open the store at `path`; None when persistence is disabled"""
+    if not path:
+        return None
+    return FlowchartStore(path, retention_days=retention_days, max_rows=max_rows)
+
+
+def stored_flowchart_response(store: Optional[FlowchartStore], flowchart_id: str, if_none_match: Optional[str]) -> Optional[Response]:
+    """
+    Serve a stored flowchart with its ETag, answering 304 on a matching If-None-Match.
+
+    Returns:
+        The response, or None when the flowchart is not stored
+    """
+    body = store.load(flowchart_id) if store is not None else None
+    if body is None:
+        return None
+
+    etag = f'"{flowchart_id}"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={CLIENT_MAX_AGE}"}
+    if etag_matches(etag, if_none_match):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
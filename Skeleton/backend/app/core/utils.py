@@ -6,7 +6,9 @@ import json
 import re
 import random
 from typing import Dict, Any, List
+from . import jsonfast
 from .models import FlowStep, FlowOption
+from .metrics import record_json_parse_failure
 
 
 def clean_json_response(text: str) -> Dict[str, Any]:
@@ -33,7 +35,11 @@ def clean_json_response(text: str) -> Dict[str, Any]:
     # Remove trailing commas (common AI mistake)
     cleaned = re.sub(r",(\s*[}\]])", r"\1", cleaned)
     
-    return json.loads(cleaned)
+    try:
+        return jsonfast.loads(cleaned)
+    except json.JSONDecodeError:
+        record_json_parse_failure("clean_json_response")
+        raise
 
 
 def shuffle_flow_options(step: FlowStep) -> FlowStep:
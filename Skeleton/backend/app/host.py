@@ -0,0 +1,122 @@
+"""
+Serve several apps from one process instead of one service per app.
+Each app's guidance router is loaded from its own backend directory under an
+alias package (eg. `logichinter`) and mounted under a path prefix, keeping its
+own Settings. The settings-free core modules (caches, metrics, logging,
+timing, deadlines, ...) are shared with the host, and every app's LLM client
+uses one pooled HTTP session and one upstream limiter, so there is one
+interpreter, one set of warm upstream connections and one /metrics for all
+apps.
+
+Run from Skeleton/backend:
+    uvicorn app.host:app
+"""
+from __future__ import annotations
+
+import importlib
+import os
+import sys
+import types
+from pathlib import Path
+from typing import Dict, Tuple
+
+from fastapi import APIRouter
+
+from .core import gemini_client
+from .core.config import settings
+from .core.warmup import Tasks
+from .main import create_app
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# Core modules that don't read app settings; apps use the host's copy
+SHARED_MODULES = (
+    "bank",
+    "cache",
+    "compression",
+    "concurrency",
+    "deadline",
+    "etag",
+    "jobs",
+    "jsonfast",
+    "logs",
+    "metrics",
+    "profiling",
+    "prompts",
+    "store",
+    "timing",
+    "warmup",
+)
+
+# Relative paths in app settings are resolved against the app's backend dir
+PATH_SETTINGS = ("cassette_path", "flowchart_bank_path", "flowchart_store_path")
+
+
+def alias_for(prefix: str) -> str:
+    return prefix.strip("/").replace("/", "_").replace("-", "_")
+
+
+def load_app(alias: str, backend_dir: Path) -> Tuple[types.ModuleType, object]:
+    """
+    Import an app's guidance router module under `alias` instead of `app`.
+
+    Returns:
+        (the guidance module, the app's settings)
+    """
+    package = types.ModuleType(alias)
+    package.__path__ = [str(backend_dir / "app")]
+    package.__package__ = alias
+    sys.modules[alias] = package
+
+    core = importlib.import_module(f"{alias}.core")
+    for name in SHARED_MODULES:
+        module = importlib.import_module(f"{__package__}.core.{name}")
+        sys.modules[f"{alias}.core.{name}"] = module
+        setattr(core, name, module)
+
+    app_settings = importlib.import_module(f"{alias}.core.config").settings
+    for field in PATH_SETTINGS:
+        value = getattr(app_settings, field, None)
+        if value and not os.path.isabs(value):
+            setattr(app_settings, field, str(backend_dir / value))
+
+    client = importlib.import_module(f"{alias}.core.gemini_client")
+    client.use_session(gemini_client.http_session())
+    client.use_limiter(gemini_client.upstream_limiter())
+    return importlib.import_module(f"{alias}.routers.guidance"), app_settings
+
+
+def create_host_app(hosted_apps: Dict[str, str]):
+    """Build one FastAPI app serving every app in `hosted_apps` under its prefix"""
+    routers: Dict[str, APIRouter] = {}
+    route_budgets = dict(settings.route_budgets)
+    cache_control_policies = dict(settings.cache_control_policies)
+    app_tasks: Tasks = {}
+
+    for prefix, backend in hosted_apps.items():
+        prefix = "/" + prefix.strip("/")
+        guidance, app_settings = load_app(alias_for(prefix), (BACKEND_DIR / backend).resolve())
+        routers[prefix] = guidance.router
+        if getattr(app_settings, "unsplash_base_url", None):
+            app_tasks[f"{prefix}:unsplash_connections"] = lambda url=app_settings.unsplash_base_url: gemini_client.preconnect(url)
+        if getattr(guidance, "flowchart_bank", None) is not None:
+            app_tasks[f"{prefix}:flowchart_bank"] = guidance.flowchart_bank.preload
+        if getattr(guidance, "flowchart_store", None) is not None:
+            app_tasks[f"{prefix}:flowchart_store"] = guidance.flowchart_store.open
+        # Per-route settings are keyed by route template, which now includes the prefix
+        route_budgets.update({prefix + route: budget for route, budget in app_settings.route_budgets.items()})
+        cache_control_policies.update({
+            prefix + route: policy
+            for route, policy in getattr(app_settings, "cache_control_policies", {}).items()
+        })
+
+    return create_app(
+        title="Kiroween apps",
+        routers=routers,
+        route_budgets=route_budgets,
+        cache_control_policies=cache_control_policies,
+        warmup=lambda app: app_tasks,
+    )
+
+
+app = create_host_app(settings.hosted_apps)
@@ -2,25 +2,68 @@
 Base FastAPI application for skeleton apps.
 Apps can import this and customize as needed.
 """
-from fastapi import FastAPI
+import logging
+from typing import Callable, Dict, Optional
+
+from fastapi import APIRouter, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from .core.compression import CompressionMiddleware
 from .core.config import settings
+from .core.deadline import DeadlineMiddleware
+from .core.etag import ConditionalGetMiddleware
+from .core.gemini_client import TASKS, preconnect, unknown_task_models, warmup_prompt
+from .core.jsonfast import FastJSONResponse
+from .core.logs import RequestLoggingMiddleware, configure_logging, log_event
+from .core.metrics import mount_metrics
+from .core.profiling import mount_profiler
+from .core.timing import ServerTimingMiddleware
+from .core.warmup import Readiness, Tasks, mount_readiness, warmup_lifespan, warmup_tasks
 
 
-def create_app(title: str = None, version: str = "0.1.0") -> FastAPI:
+def create_app(
+    title: str = None,
+    version: str = "0.1.0",
+    routers: Optional[Dict[str, APIRouter]] = None,
+    route_budgets: Optional[Dict[str, float]] = None,
+    cache_control_policies: Optional[Dict[str, str]] = None,
+    warmup: Optional[Callable[[FastAPI], Tasks]] = None,
+) -> FastAPI:
     """
     Create a FastAPI application with common middleware and configuration.
     
     Args:
         title: Application title (defaults to settings.app_name)
         version: API version
+        routers: Routers to include, by path prefix (eg. several apps in one process)
+        route_budgets: Request budgets per route (defaults to settings.route_budgets)
+        cache_control_policies: Cache-Control per GET route (defaults to settings.cache_control_policies)
+        warmup: Extra startup warm-up tasks (eg. the app's flowchart bank and store)
         
     Returns:
         Configured FastAPI application
     """
     app_title = title or settings.app_name
+    configure_logging(settings.log_level)
+    
+    readiness = Readiness()
     
-    app = FastAPI(title=app_title, version=version)
+    def startup_tasks(app: FastAPI) -> Tasks:
+        tasks = warmup_tasks(
+            app,
+            connect=lambda: preconnect(settings.gemini_base_url),
+            prompt=warmup_prompt if settings.warmup_prompt_enabled else None,
+        )
+        if warmup is not None:
+            tasks.update(warmup(app))
+        return tasks
+    
+    # orjson-backed responses when it's installed; warm-up runs in the background on startup
+    app = FastAPI(
+        title=app_title,
+        version=version,
+        default_response_class=FastJSONResponse,
+        lifespan=warmup_lifespan(readiness, startup_tasks, settings.warmup_enabled),
+    )
     
     # Add CORS middleware for frontend communication
     app.add_middleware(
@@ -30,6 +73,54 @@ def create_app(title: str = None, version: str = "0.1.0") -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+
+    # Derive upstream timeouts from a per-route request budget
+    app.add_middleware(
+        DeadlineMiddleware,
+        default_budget=settings.request_budget_seconds,
+        route_budgets=settings.route_budgets if route_budgets is None else route_budgets,
+    )
+    
+    # ETags, 304s and per-route Cache-Control on GET responses
+    if settings.conditional_get_enabled:
+        policies = settings.cache_control_policies if cache_control_policies is None else cache_control_policies
+        app.add_middleware(ConditionalGetMiddleware, policies=policies)
+    
+    # gzip/brotli for larger responses; streams and excluded routes pass through
+    if settings.compression_enabled:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.compression_minimum_size,
+            gzip_level=settings.gzip_level,
+            brotli_quality=settings.brotli_quality,
+            exclude_paths=settings.compression_exclude_paths,
+        )
+    
+    # Per-stage timing breakdown in the Server-Timing header
+    if settings.server_timing_enabled:
+        app.add_middleware(ServerTimingMiddleware, debug=settings.server_timing_debug)
+    
+    # Request/upstream/cache metrics at /metrics
+    if settings.metrics_enabled:
+        mount_metrics(app)
+    
+    # Sampling profiler for production debugging (nothing is mounted when off)
+    if settings.profiling_enabled and settings.admin_token:
+        mount_profiler(app, settings.admin_token)
+    
+    # One JSON log line per request (outermost, so latency covers everything)
+    if settings.request_logging_enabled:
+        app.add_middleware(
+            RequestLoggingMiddleware,
+            sample_rate=settings.request_log_sample_rate,
+            slow_ms=settings.request_log_slow_ms,
+        )
+    
+    for prefix, router in (routers or {}).items():
+        app.include_router(router, prefix=prefix)
+    
+    # Readiness: 503 until the warm-up has finished
+    mount_readiness(app, readiness)
     
     # Health check endpoint
     @app.get("/")
@@ -40,6 +131,11 @@ def create_app(title: str = None, version: str = "0.1.0") -> FastAPI:
             "status": "healthy"
         }
     
+    log_event("startup", app=app_title, gemini_key_loaded=bool(settings.gemini_api_key))
+    # A misspelled or renamed task in TASK_MODELS would silently fall back to the default model
+    unknown_tasks = unknown_task_models()
+    if unknown_tasks:
+        log_event("task_models_unknown", logging.WARNING, tasks=unknown_tasks, known=list(TASKS))
     return app
 
 
@@ -2,10 +2,17 @@
 Base guidance router template for skeleton apps.
 Apps should inherit from BaseGuidanceRouter and implement the abstract methods.
 """
+import sqlite3
 from abc import ABC, abstractmethod
 from typing import Dict, Any, List, Optional
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException
 
+from ..core.bank import open_bank
+from ..core.cache import cache_for_route
+from ..core.config import settings
+from ..core.metrics import record_cache_lookup, record_fallback
+from ..core.store import open_store, stored_flowchart_response
+from ..core.timing import debug_metadata, span
 from ..core.models import (
     FlowchartRequest, FlowchartResponse, FlowStep,
     StepLinkRequest, StepLinkResponse
@@ -32,11 +39,19 @@ class BaseGuidanceRouter(ABC):
             tags = ["guidance"]
             
         self.router = APIRouter(prefix=prefix, tags=tags)
+        self.flowchart_cache = cache_for_route(
+            f"{prefix}/flowchart", settings.cache_windows, settings.cache_max_entries
+        )
+        self.flowchart_bank = open_bank(settings.flowchart_bank_path)
+        self.flowchart_store = open_store(
+            settings.flowchart_store_path, settings.flowchart_retention_days, settings.flowchart_store_max_rows
+        )
         self._setup_routes()
     
     def _setup_routes(self):
         """Set up the common routes that all apps will have"""
         self.router.post("/flowchart", response_model=FlowchartResponse)(self._flowchart_endpoint)
+        self.router.get("/flowchart/{flowchart_id}", response_model=FlowchartResponse)(self._stored_flowchart_endpoint)
         self.router.post("/step-links", response_model=StepLinkResponse)(self._step_links_endpoint)
     
     # Abstract methods that apps must implement
@@ -87,7 +102,8 @@ class BaseGuidanceRouter(ABC):
     
     def post_process_flowchart(self, steps: List[FlowStep]) -> List[FlowStep]:
         """
-        Post-process flowchart steps after parsing.
+        Post-process flowchart steps for one response; cached, banked and
+        stored steps keep the model's order and are passed in unchanged.
         Default implementation shuffles options and validates structure.
         
         Args:
@@ -102,6 +118,54 @@ class BaseGuidanceRouter(ABC):
         # Shuffle options to randomize correct answer position
         return [shuffle_flow_options(step) for step in steps]
     
+    def flowchart_cache_key(self, request: FlowchartRequest) -> str:
+        """
+        Key under which a generated flowchart is cached.
+        Default normalizes the problem text and keeps every other request field.
+        
+        Args:
+            request: The flowchart request
+            
+        Returns:
+            Cache key string
+        """
+        normalized = " ".join(request.problem.lower().split())
+        return request.model_copy(update={"problem": normalized}).model_dump_json()
+    
+    def flowchart_bank_variant(self, request: FlowchartRequest) -> str:
+        """
+        Variant under which a request's flowchart is looked up in the bank,
+        for apps whose flowcharts depend on more than the problem text.
+        
+        Args:
+            request: The flowchart request
+            
+        Returns:
+            Variant name used when the bank was built
+        """
+        return "default"
+    
+    def banked_flowchart(self, request: FlowchartRequest) -> Optional[List[FlowStep]]:
+        """Steps from the pre-generated bank as stored (not post-processed), or None"""
+        if self.flowchart_bank is None:
+            return None
+        
+        banked = self.flowchart_bank.get(request.problem, self.flowchart_bank_variant(request))
+        record_cache_lookup("flowchart_bank", "miss" if banked is None else "hit")
+        if banked is None:
+            return None
+        return [FlowStep(**step) for step in banked]
+    
+    def store_flowchart(self, steps: List[FlowStep]) -> Optional[str]:
+        """Persist a generated flowchart; returns its id, or None if not stored"""
+        if self.flowchart_store is None or not steps:
+            return None
+        try:
+            with span("store"):
+                return self.flowchart_store.save([step.model_dump() for step in steps])
+        except sqlite3.Error:
+            return None
+    
     def handle_ai_error(self, error: Exception, context: str) -> str:
         """
         Handle AI-related errors and return user-friendly messages.
@@ -124,26 +188,71 @@ class BaseGuidanceRouter(ABC):
     async def _flowchart_endpoint(self, request: FlowchartRequest) -> FlowchartResponse:
         """Internal implementation of the flowchart endpoint"""
         warning = None
+        metadata = None
+        
+        # Popular problems can be pre-generated offline into the flowchart bank
+        banked = self.banked_flowchart(request)
+        if banked is not None:
+            # Stored as banked, so every hit maps to the same content id;
+            # post-processing (shuffling) applies to the response only
+            return FlowchartResponse(
+                steps=self.post_process_flowchart(banked),
+                metadata=debug_metadata({"cache": "bank"}),
+                flowchart_id=self.store_flowchart(banked),
+            )
         
+        served: List[FlowStep] = []
         try:
-            # Generate prompt using app-specific logic
-            prompt = self.generate_flowchart_prompt(request)
-            
-            # Call AI service
-            response = complete(prompt)
-            ai_text = extract_text_response(response)
-            
-            # Parse response using app-specific logic
-            steps = self.parse_flowchart_response(ai_text)
+            # Serve from cache when possible; stale entries refresh in background
+            steps, cache_status = self.flowchart_cache.get_or_load(
+                self.flowchart_cache_key(request),
+                lambda: self._generate_flowchart(request),
+            )
+            metadata = debug_metadata({"cache": cache_status})
             
-            # Post-process (validation, shuffling, etc.)
-            steps = self.post_process_flowchart(steps)
+            # Post-process (shuffling) per response, not before caching
+            with span("post_process"):
+                served = self.post_process_flowchart(steps)
             
         except Exception as e:
             warning = self.handle_ai_error(e, "flowchart generation")
+            record_fallback(f"{self.router.prefix}/flowchart", "empty_steps")
             steps = []
         
-        return FlowchartResponse(steps=steps, warning=warning)
+        return FlowchartResponse(
+            steps=served,
+            warning=warning,
+            metadata=metadata,
+            flowchart_id=self.store_flowchart(steps),
+        )
+    
+    async def _stored_flowchart_endpoint(self, flowchart_id: str, if_none_match: Optional[str] = Header(None)):
+        """Serve a previously generated flowchart by id, with ETag support"""
+        response = stored_flowchart_response(self.flowchart_store, flowchart_id, if_none_match)
+        if response is None:
+            raise HTTPException(status_code=404, detail="Unknown or expired flowchart id")
+        return response
+    
+    def _generate_flowchart(self, request: FlowchartRequest) -> List[FlowStep]:
+        """Run the full generation pipeline for one flowchart"""
+        # Generate prompt using app-specific logic
+        with span("prompt"):
+            prompt = self.generate_flowchart_prompt(request)
+        
+        # Call AI service
+        with span("gemini"):
+            response = complete(prompt, task="flowchart_prompt")
+            ai_text = extract_text_response(response)
+        
+        # Parse response using app-specific logic
+        with span("parse"):
+            steps = self.parse_flowchart_response(ai_text)
+        
+        # Validate before caching, but keep the model's order: cached and stored
+        # steps stay canonical and post_process_flowchart runs per response
+        with span("validate"):
+            validate_flowchart_structure(steps)
+        return steps
     
     async def _step_links_endpoint(self, request: StepLinkRequest) -> StepLinkResponse:
         """Internal implementation of the step links endpoint"""
@@ -152,15 +261,18 @@ class BaseGuidanceRouter(ABC):
         
         try:
             # Generate prompt using app-specific logic
-            prompt = self.generate_links_prompt(request)
+            with span("prompt"):
+                prompt = self.generate_links_prompt(request)
             
             # Call AI service
-            response = complete(prompt)
-            ai_text = extract_text_response(response)
+            with span("gemini"):
+                response = complete(prompt, task="links_prompt")
+                ai_text = extract_text_response(response)
             
             # Parse links (common logic)
-            data = clean_json_response(ai_text)
-            links_data = data.get("links", [])
+            with span("parse"):
+                data = clean_json_response(ai_text)
+                links_data = data.get("links", [])
             
             # Convert to StepLink objects
             from ..core.models import StepLink
@@ -168,5 +280,6 @@ class BaseGuidanceRouter(ABC):
             
         except Exception as e:
             warning = self.handle_ai_error(e, "link generation")
+            record_fallback(f"{self.router.prefix}/step-links", "empty_links")
         
         return StepLinkResponse(links=links, warning=warning)
\ No newline at end of file
@@ -25,6 +25,8 @@ export interface FlowchartRequest {
 export interface FlowchartResponse {
   steps: FlowStep[];
   warning?: string | null;
+  metadata?: Record<string, any> | null;
+  flowchart_id?: string | null;
 }
 
 export interface StepLink {
@@ -0,0 +1,174 @@
+"""Benchmark response compression: bytes on the wire and CPU per response type.
+
+Compresses representative API responses (LogicHinter flowchart, StudyHinter
+flowchart with Unsplash URLs on every option, LogicHinter mentor hints with
+their `visual_payload`, example questions, step links) with the backend's own
+`compress()` helper at several gzip levels and, when the `brotli` package is
+installed, brotli. Each row shows the compressed size, the compression time and
+the estimated transfer time on a slow link (default 256 kbit/s, a busy school
+network), so the CPU cost can be weighed against the bytes saved.
+
+Usage examples:
+  python scripts/compressbench.py
+  python scripts/compressbench.py --gzip-levels 1,6,9 --brotli-qualities 4,5,11 --link-kbps 128
+  python scripts/compressbench.py --json
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import importlib
+import json
+import timeit
+from typing import Callable, Dict, List, Tuple
+
+from microbench import BACKENDS, load_backend, make_step
+
+
+def unsplash_url(n: int) -> str:
+    # Photo ids and ixid tokens are effectively random, which is what limits compression
+    digest = hashlib.sha256(str(n).encode()).hexdigest()
+    ixid = base64.b64encode(hashlib.sha512(str(n).encode()).digest()).decode().rstrip("=")
+    return (
+        f"https://images.unsplash.com/photo-{digest[:13]}-{digest[13:25]}"
+        f"?crop=entropy&cs=tinysrgb&fit=max&fm=jpg&ixid={ixid}&ixlib=rb-4.0.3&q=80&w=400"
+    )
+
+
+def logichinter_flowchart(steps: int) -> dict:
+    return {
+        "steps": [make_step(n) for n in range(1, steps + 1)],
+        "flowchart_id": "q3Zx7LmN2aB0",
+        "complete": True,
+    }
+
+
+def studyhinter_flowchart(steps: int) -> dict:
+    flowchart = {"steps": [make_step(n, description_words=30) for n in range(1, steps + 1)], "flowchart_id": "Vb81kQeR4t9c"}
+    for n, step in enumerate(flowchart["steps"]):
+        for m, option in enumerate(step["options"]):
+            option["image_url"] = unsplash_url(n * 4 + m)
+    return flowchart
+
+
+def mentor_hints() -> dict:
+    return {
+        "hints": [
+            {
+                "title": f"Hint {n}",
+                "body": "Think about what you already know after looking at each element once, "
+                        "and whether remembering it could save you from looking again.",
+            }
+            for n in range(1, 6)
+        ],
+        "visual_payload": {
+            "visual_type": "grid",
+            "visual_data": {"matrix": [[f"{row}{col}" for col in range(1, 5)] for row in "ABC"]},
+            "steps": [{"action": "highlight", "target": f"{row}{col}"} for row, col in zip("ABC", range(1, 4))],
+        },
+        "warning": None,
+    }
+
+
+def example_questions() -> dict:
+    return {
+        "questions": [
+            {"emoji": "🌋", "text": "How do volcanoes form and why do they erupt?", "color": "from-orange-400 to-red-500"},
+            {"emoji": "🧬", "text": "What does DNA actually do inside a cell?", "color": "from-green-400 to-teal-500"},
+            {"emoji": "🪐", "text": "Why do planets orbit the sun instead of flying away?", "color": "from-indigo-400 to-purple-500"},
+            {"emoji": "⚡", "text": "How does electricity get from the power plant to my house?", "color": "from-yellow-400 to-amber-500"},
+        ]
+    }
+
+
+def step_links() -> dict:
+    return {
+        "links": [
+            {"title": f"Resource {n}", "url": f"https://example.com/learn/topic-{n}", "summary": "A short explanation of the idea in this step."}
+            for n in range(1, 6)
+        ]
+    }
+
+
+def payloads(steps: int) -> Dict[str, bytes]:
+    bodies = {
+        "lh_flowchart": logichinter_flowchart(steps),
+        "sh_flowchart_images": studyhinter_flowchart(steps),
+        "lh_mentor_visual": mentor_hints(),
+        "example_questions": example_questions(),
+        "step_links": step_links(),
+    }
+    return {name: json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode() for name, body in bodies.items()}
+
+
+def best_us(call: Callable[[], object], repeat: int) -> float:
+    timer = timeit.Timer(call)
+    loops, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=loops)) / loops * 1e6
+
+
+def transfer_ms(size: int, link_kbps: float) -> float:
+    return size * 8 / (link_kbps * 1000) * 1000
+
+
+def run(args) -> Dict[str, List[dict]]:
+    load_backend("skeleton", BACKENDS["skeleton"])
+    compression = importlib.import_module("skeleton.core.compression")
+
+    settings: List[Tuple[str, str, int]] = [("identity", "identity", 0)]
+    settings += [(f"gzip-{level}", "gzip", level) for level in args.gzip_levels]
+    if compression.brotli is not None:
+        settings += [(f"br-{quality}", "br", quality) for quality in args.brotli_qualities]
+
+    report: Dict[str, List[dict]] = {}
+    for name, body in payloads(args.steps).items():
+        rows = []
+        for label, encoding, level in settings:
+            if encoding == "identity":
+                size, cpu = len(body), 0.0
+            else:
+                call = lambda: compression.compress(body, encoding, gzip_level=level, brotli_quality=level)
+                size, cpu = len(call()), best_us(call, args.repeat)
+            rows.append({
+                "setting": label,
+                "bytes": size,
+                "ratio": round(size / len(body), 3),
+                "cpu_us": round(cpu, 1),
+                "transfer_ms": round(transfer_ms(size, args.link_kbps), 1),
+                "below_threshold": len(body) < args.minimum_size,
+            })
+        report[name] = rows
+    return report
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="Benchmark gzip/brotli on typical API responses")
+    p.add_argument("--steps", type=int, default=8, help="Flowchart size")
+    p.add_argument("--gzip-levels", type=lambda s: [int(x) for x in s.split(",")], default=[1, 6, 9])
+    p.add_argument("--brotli-qualities", type=lambda s: [int(x) for x in s.split(",")], default=[4, 5, 11])
+    p.add_argument("--link-kbps", type=float, default=256.0, help="Slow-link bandwidth for the transfer column")
+    p.add_argument("--minimum-size", type=int, default=1024, help="COMPRESSION_MINIMUM_SIZE to flag small bodies against")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = p.parse_args()
+
+    report = run(args)
+    if args.json:
+        print(json.dumps({"link_kbps": args.link_kbps, "results": report}, indent=2))
+        return 0
+
+    for name, rows in report.items():
+        note = " (below threshold, sent uncompressed)" if rows[0]["below_threshold"] else ""
+        print(f"{name}{note}")
+        print(f"  {'setting':<10} {'bytes':>8} {'ratio':>6} {'cpu':>10} {f'@{args.link_kbps:g}kbps':>12}")
+        for row in rows:
+            print(
+                f"  {row['setting']:<10} {row['bytes']:>8} {row['ratio']:>6.2f} "
+                f"{row['cpu_us']:>8.1f}us {row['transfer_ms']:>10.1f}ms"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
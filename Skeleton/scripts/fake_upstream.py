@@ -0,0 +1,277 @@
+"""Local stand-in for the Gemini and Unsplash APIs, for benchmarking without quota.
+
+Serves:
+  POST /v1beta/models/<model>:generateContent
+  POST /v1beta/models/<model>:streamGenerateContent   (JSON array, or SSE with ?alt=sse)
+  GET  /search/photos                                 (Unsplash)
+
+Usage examples:
+  python scripts/fake_upstream.py --port 9000
+  python scripts/fake_upstream.py --latency gemini=lognormal:900:0.4 --latency unsplash=uniform:50:300 \
+      --error-rate gemini=0.02 --payloads my_payloads/
+
+Then start a backend against it:
+  GEMINI_API_KEY=fake GEMINI_BASE_URL=http://127.0.0.1:9000 UNSPLASH_BASE_URL=http://127.0.0.1:9000 \
+      uvicorn app.main:app
+
+Latency specs are `fixed:MS`, `uniform:MIN_MS:MAX_MS` or `lognormal:MEDIAN_MS:SIGMA`.
+A payload directory may hold `<kind>.txt` files (flowchart, links, questions,
+search_term, hints) that replace the built-in canned model outputs, and
+`--recorded` accepts a JSON-lines file of `{"prompt_sha256": ..., "text": ...}`
+entries that are replayed for exactly matching prompts.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+CANNED_FLOWCHART = {
+    "steps": [
+        {
+            "id": f"step-{n}",
+            "title": f"Step {n}: What should we consider next?",
+            "description": "Think about what the problem is really asking before choosing.",
+            "options": [
+                {"id": "A", "label": "It helps you breathe fresh air", "reason": "This is the key idea.", "correct": True},
+                {"id": "B", "label": "It makes the sky turn green", "reason": "A common mix-up.", "correct": False},
+                {"id": "C", "label": "It only works at night", "reason": "Related but not right.", "correct": False},
+                {"id": "D", "label": "It keeps the oceans frozen", "reason": "Not what the question asks.", "correct": False},
+            ],
+        }
+        for n in range(1, 7)
+    ]
+}
+
+CANNED_TEXT: Dict[str, str] = {
+    "flowchart": json.dumps(CANNED_FLOWCHART),
+    "links": json.dumps({"links": [
+        {"title": "Two pointers explained", "url": "https://example.com/two-pointers", "summary": "How the technique narrows a search."},
+        {"title": "Thinking about invariants", "url": "https://example.com/invariants", "summary": "Why stating invariants helps."},
+    ]}),
+    "questions": json.dumps({"questions": [
+        {"emoji": "🌟", "text": "Why do stars twinkle at night?"},
+        {"emoji": "🦋", "text": "How do butterflies get their colors?"},
+        {"emoji": "🌋", "text": "What is inside a volcano?"},
+        {"emoji": "🐝", "text": "How do bees make honey?"},
+    ]}),
+    "search_term": "sunlight plants leaves",
+    "hints": "\n".join(
+        ["Naive Hints:"]
+        + [f"{n}. Consider the simplest approach for part {n}" for n in range(1, 7)]
+        + ["Optimized Hints:"]
+        + [f"{n}. Avoid repeated work in part {n}" for n in range(1, 7)]
+    ),
+}
+
+
+def classify_prompt(prompt: str) -> str:
+    """Guess which canned output a prompt expects"""
+    if '"links"' in prompt:
+        return "links"
+    if '"questions"' in prompt:
+        return "questions"
+    if '"steps"' in prompt:
+        return "flowchart"
+    if '"terms"' in prompt:
+        return "search_terms"
+    if "search terms" in prompt or "visual concepts" in prompt:
+        return "search_term"
+    return "hints"
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """Turn a latency spec into a sampler returning seconds"""
+    kind, *args = spec.split(":")
+    values = [float(a) for a in args]
+    if kind == "fixed":
+        return lambda: values[0] / 1000
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1]) / 1000
+    if kind == "lognormal":
+        median, sigma = values
+        return lambda: random.lognormvariate(math.log(median), sigma) / 1000
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def parse_pairs(values, convert):
+    pairs = {}
+    for item in values or []:
+        name, _, spec = item.partition("=")
+        pairs[name] = convert(spec)
+    return pairs
+
+
+class FakeUpstream:
+    def __init__(self, latency, error_rate, payloads: Optional[Path], recorded: Optional[Path]):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.texts = dict(CANNED_TEXT)
+        if payloads:
+            for path in payloads.glob("*.txt"):
+                self.texts[path.stem] = path.read_text()
+        self.recorded: Dict[str, str] = {}
+        if recorded:
+            with recorded.open() as fh:
+                for line in fh:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.recorded[entry["prompt_sha256"]] = entry["text"]
+
+    def delay(self, upstream: str) -> None:
+        sampler = self.latency.get(upstream)
+        if sampler:
+            time.sleep(sampler())
+
+    def should_fail(self, upstream: str) -> bool:
+        return random.random() < self.error_rate.get(upstream, 0.0)
+
+    def model_text(self, prompt: str) -> str:
+        digest = hashlib.sha256(prompt.encode()).hexdigest()
+        kind = classify_prompt(prompt)
+        if digest in self.recorded:
+            return self.recorded[digest]
+        if kind == "search_terms":
+            # One term per numbered option in the prompt
+            count = len(re.findall(r"^\d+\. \"", prompt, flags=re.MULTILINE))
+            return json.dumps({"terms": [self.texts["search_term"]] * count})
+        return self.texts[kind]
+
+
+def gemini_envelope(text: str, prompt: str = "") -> dict:
+    # Roughly 4 characters per token, like Gemini on English text
+    prompt_tokens = len(prompt) // 4
+    output_tokens = max(1, len(text) // 4)
+    return {
+        "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP"}],
+        "usageMetadata": {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": output_tokens,
+            "totalTokenCount": prompt_tokens + output_tokens,
+        },
+    }
+
+
+def make_handler(upstream: FakeUpstream):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):  # keep benchmark output clean
+            pass
+
+        def _send(self, status: int, body: bytes, content_type: str = "application/json") -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _error(self, status: int, message: str) -> None:
+            self._send(status, json.dumps({"error": {"code": status, "message": message}}).encode())
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            match = re.match(r"^/v1beta/models/([^:]+):(generateContent|streamGenerateContent)$", url.path)
+            if not match:
+                self._error(404, "Not found")
+                return
+
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            prompt = "".join(
+                part.get("text", "")
+                for content in body.get("contents", [])
+                for part in content.get("parts", [])
+            )
+
+            upstream.delay("gemini")
+            if upstream.should_fail("gemini"):
+                self._error(random.choice([429, 500, 503]), "Injected failure")
+                return
+
+            text = upstream.model_text(prompt)
+            if match.group(2) == "generateContent":
+                self._send(200, json.dumps(gemini_envelope(text, prompt)).encode())
+                return
+
+            # Streaming: split the text into a few chunks
+            size = max(1, len(text) // 4)
+            chunks = [gemini_envelope(text[i:i + size]) for i in range(0, len(text), size)]
+            if parse_qs(url.query).get("alt") == ["sse"]:
+                payload = "".join(f"data: {json.dumps(chunk)}\r\n\r\n" for chunk in chunks)
+                self._send(200, payload.encode(), "text/event-stream")
+            else:
+                self._send(200, json.dumps(chunks).encode())
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/search/photos":
+                self._error(404, "Not found")
+                return
+
+            upstream.delay("unsplash")
+            if upstream.should_fail("unsplash"):
+                self._error(random.choice([403, 500]), "Injected failure")
+                return
+
+            query = parse_qs(url.query).get("query", ["photo"])[0]
+            slug = re.sub(r"[^a-z0-9]+", "-", query.lower()).strip("-") or "photo"
+            result = {
+                "total": 1,
+                "total_pages": 1,
+                "results": [{
+                    "id": slug,
+                    "urls": {
+                        "small": f"https://images.example.com/{slug}-small.jpg",
+                        "regular": f"https://images.example.com/{slug}.jpg",
+                    },
+                }],
+            }
+            self._send(200, json.dumps(result).encode())
+
+    return Handler
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="Fake Gemini/Unsplash upstream for load tests")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=9000)
+    p.add_argument("--latency", action="append", metavar="UPSTREAM=SPEC",
+                   help="Latency per upstream (gemini, unsplash), eg. gemini=lognormal:800:0.4")
+    p.add_argument("--error-rate", action="append", metavar="UPSTREAM=RATE",
+                   help="Fraction of calls that fail, eg. gemini=0.02")
+    p.add_argument("--payloads", type=Path, help="Directory of <kind>.txt canned model outputs")
+    p.add_argument("--recorded", type=Path, help="JSON-lines file of recorded model outputs by prompt hash")
+    p.add_argument("--seed", type=int, help="Random seed for reproducible latency/error sequences")
+    args = p.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    upstream = FakeUpstream(
+        latency=parse_pairs(args.latency, parse_latency),
+        error_rate=parse_pairs(args.error_rate, float),
+        payloads=args.payloads,
+        recorded=args.recorded,
+    )
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(upstream))
+    server.daemon_threads = True
+    print(f"Fake upstream listening on http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
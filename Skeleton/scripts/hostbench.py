@@ -0,0 +1,93 @@
+"""Compare memory of one process per app with all apps in one host process.
+
+Starts a fresh interpreter per configuration (LogicHinter alone, StudyHinter
+alone, both in `app.host`), builds the ASGI app, sends a few warm-up requests
+through the TestClient and reports the resident set size. Upstream calls are
+pointed at an unused local port, so requests take their fallback paths and no
+keys or network are needed.
+
+Usage examples:
+  python scripts/hostbench.py
+  python scripts/hostbench.py --requests 20 --json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+from microbench import BACKENDS
+
+CHILD = r"""
+import json, resource, sys
+from fastapi.testclient import TestClient
+module, prefixes, n = sys.argv[1], json.loads(sys.argv[2]), int(sys.argv[3])
+baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+app = __import__(module, fromlist=["app"]).app
+client = TestClient(app)
+for i in range(n):
+    for prefix in prefixes:
+        client.post(prefix + "/api/flowchart", json={"problem": f"warm-up {i}"})
+        client.get(prefix + "/api/flowchart/unknown")
+with open("/proc/self/statm") as f:
+    rss_kb = int(f.read().split()[1]) * resource.getpagesize() // 1024
+print(json.dumps({"rss_kb": rss_kb, "interpreter_kb": baseline_kb}))
+"""
+
+CONFIGS = {
+    "logichinter": (BACKENDS["logichinter"], "app.main", [""]),
+    "studyhinter": (BACKENDS["studyhinter"], "app.main", [""]),
+    "host (both)": (BACKENDS["skeleton"], "app.host", ["/logichinter", "/studyhinter"]),
+}
+
+
+def measure(backend_dir: Path, module: str, prefixes, requests: int) -> Dict[str, int]:
+    env = {
+        **os.environ,
+        "GEMINI_API_KEY": "bench",
+        "GEMINI_BASE_URL": "http://127.0.0.1:9",
+        "UNSPLASH_BASE_URL": "http://127.0.0.1:9",
+        "FLOWCHART_STORE_PATH": "",
+        "REQUEST_LOGGING_ENABLED": "false",
+    }
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, module, json.dumps(prefixes), str(requests)],
+        cwd=backend_dir, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="Memory per app: separate processes vs one host process")
+    p.add_argument("--requests", type=int, default=5, help="Warm-up requests per app")
+    p.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = p.parse_args()
+
+    report = {name: measure(*config, args.requests) for name, config in CONFIGS.items()}
+    separate = report["logichinter"]["rss_kb"] + report["studyhinter"]["rss_kb"]
+    report["summary"] = {
+        "separate_total_kb": separate,
+        "host_kb": report["host (both)"]["rss_kb"],
+        "saved_kb": separate - report["host (both)"]["rss_kb"],
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print(f"{'configuration':<16} {'rss':>10}")
+    for name in CONFIGS:
+        print(f"{name:<16} {report[name]['rss_kb'] / 1024:>8.1f}MB")
+    summary = report["summary"]
+    print(f"{'separate total':<16} {summary['separate_total_kb'] / 1024:>8.1f}MB")
+    print(f"saved by hosting together: {summary['saved_kb'] / 1024:.1f}MB "
+          f"({summary['saved_kb'] / summary['separate_total_kb']:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,100 @@
+"""Check the cold-start import time of each backend against a budget.
+
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter per
+backend (best of several runs), then reports the total import time and the
+slowest modules. It fails when a backend goes over its budget, or when a module
+listed as lazy (optional or heavy dependencies that are only needed on first
+use, eg. `requests`, `cryptography`) shows up on the startup import path.
+
+Usage examples:
+  python scripts/importbudget.py
+  python scripts/importbudget.py --top 20 --runs 7
+  python scripts/importbudget.py --budget scripts/import_budget.json --json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+from microbench import BACKENDS
+
+DEFAULT_BUDGET = Path(__file__).resolve().with_name("import_budget.json")
+
+
+def import_times(backend_dir: Path) -> Dict[str, Dict[str, int]]:
+    """{module: {"self_us", "cumulative_us"}} for one `import app.main`"""
+    env = {**os.environ, "REQUEST_LOGGING_ENABLED": "false", "PYTHONDONTWRITEBYTECODE": "1"}
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=backend_dir, env=env, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = {"self_us": int(self_us), "cumulative_us": int(cumulative_us)}
+    return times
+
+
+def best_of(backend_dir: Path, runs: int) -> Dict[str, Dict[str, int]]:
+    """Per-module minimum over several runs (the first run also warms the bytecode cache)"""
+    best: Dict[str, Dict[str, int]] = {}
+    for _ in range(runs):
+        for name, entry in import_times(backend_dir).items():
+            if name not in best:
+                best[name] = dict(entry)
+            else:
+                for key, value in entry.items():
+                    best[name][key] = min(best[name][key], value)
+    return best
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="Import-time budget check for the backends")
+    p.add_argument("--budget", type=Path, default=DEFAULT_BUDGET, help="Budget file (JSON)")
+    p.add_argument("--runs", type=int, default=5)
+    p.add_argument("--top", type=int, default=10, help="Slowest modules to list per backend")
+    p.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = p.parse_args()
+
+    budget = json.loads(args.budget.read_text())
+    lazy = budget.get("lazy_modules", [])
+    failures = []
+    report = {}
+
+    for backend, limit_ms in budget["max_ms"].items():
+        times = best_of(BACKENDS[backend], args.runs)
+        total_ms = times["app.main"]["cumulative_us"] / 1000
+        eager = sorted(name for name in times if name.split(".")[0] in lazy or name in lazy)
+        slowest = sorted(times.items(), key=lambda item: item[1]["self_us"], reverse=True)[: args.top]
+        report[backend] = {
+            "total_ms": round(total_ms, 1),
+            "budget_ms": limit_ms,
+            "eager_lazy_modules": eager,
+            "slowest_self_ms": {name: round(entry["self_us"] / 1000, 2) for name, entry in slowest},
+        }
+        if total_ms > limit_ms:
+            failures.append(f"{backend}: {total_ms:.0f} ms > budget {limit_ms} ms")
+        if eager:
+            failures.append(f"{backend}: imported at startup but should be lazy: {', '.join(eager)}")
+
+    if args.json:
+        print(json.dumps({"results": report, "failures": failures}, indent=2))
+    else:
+        for backend, row in report.items():
+            print(f"{backend}: {row['total_ms']:.1f} ms (budget {row['budget_ms']} ms)")
+            for name, ms in row["slowest_self_ms"].items():
+                print(f"  {ms:>8.2f} ms  {name}")
+        for failure in failures:
+            print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,103 @@
+"""Benchmark the fast-JSON backend (orjson) against the standard library.
+
+Measures the JSON work on an 8-step flowchart request: rendering the API
+response, decoding the Gemini envelope, parsing the embedded model text and
+running it through the JSON repair helper. Each case runs once with the
+backend forced to stdlib `json` and once with orjson (when installed).
+
+Usage examples:
+  python scripts/jsonbench.py
+  python scripts/jsonbench.py --steps 8 --repeat 7 --json
+"""
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import sys
+import timeit
+from typing import Callable, Dict, List, Tuple
+
+from microbench import BACKENDS, flowchart_json, load_backend
+
+
+def gemini_envelope(text: str) -> bytes:
+    return json.dumps({
+        "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP"}],
+        "usageMetadata": {"promptTokenCount": 600, "candidatesTokenCount": len(text) // 4},
+    }).encode()
+
+
+def build_cases(steps: int) -> Tuple[List[Tuple[str, Callable[[], object]]], object]:
+    load_backend("skeleton", BACKENDS["skeleton"])
+    jsonfast = importlib.import_module("skeleton.core.jsonfast")
+    models = importlib.import_module("skeleton.core.models")
+    utils = importlib.import_module("skeleton.core.utils")
+    from fastapi.encoders import jsonable_encoder
+
+    text = flowchart_json(steps)
+    fenced = f"```json\n{text}\n```"
+    envelope = gemini_envelope(fenced)
+    response = models.FlowchartResponse(
+        steps=[models.FlowStep(**step) for step in json.loads(text)["steps"]],
+        metadata={"cache": "miss"},
+    )
+    encoded = jsonable_encoder(response)
+
+    return [
+        ("render_response", lambda: jsonfast.FastJSONResponse(encoded).body),
+        ("decode_envelope", lambda: jsonfast.loads(envelope)),
+        ("parse_model_text", lambda: jsonfast.loads(text)),
+        ("repair_fenced_text", lambda: utils.clean_json_response(fenced)),
+        ("full_pipeline", lambda: jsonfast.dumps(jsonable_encoder(models.FlowchartResponse(
+            steps=[models.FlowStep(**s) for s in utils.clean_json_response(
+                jsonfast.loads(envelope)["candidates"][0]["content"]["parts"][0]["text"]
+            )["steps"]],
+        )))),
+    ], jsonfast
+
+
+def best_us(call: Callable[[], object], repeat: int) -> float:
+    timer = timeit.Timer(call)
+    loops, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=loops)) / loops * 1e6
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="Benchmark stdlib json vs orjson on flowchart payloads")
+    p.add_argument("--steps", type=int, default=8, help="Flowchart size")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = p.parse_args()
+
+    cases, jsonfast = build_cases(args.steps)
+    fast_module = jsonfast.orjson
+
+    report: Dict[str, Dict[str, float]] = {}
+    for name, call in cases:
+        jsonfast.orjson = None
+        row = {"json_us": round(best_us(call, args.repeat), 2)}
+        if fast_module is not None:
+            jsonfast.orjson = fast_module
+            row["orjson_us"] = round(best_us(call, args.repeat), 2)
+            row["speedup"] = round(row["json_us"] / row["orjson_us"], 2)
+        report[name] = row
+    jsonfast.orjson = fast_module
+
+    if args.json:
+        print(json.dumps({"steps": args.steps, "results": report}, indent=2))
+        return 0
+
+    if fast_module is None:
+        print("orjson is not installed; showing stdlib timings only", file=sys.stderr)
+    print(f"{args.steps}-step flowchart")
+    print(f"{'case':<20} {'json':>11} {'orjson':>11} {'speedup':>8}")
+    for name, row in report.items():
+        fast = f"{row['orjson_us']:>9.1f}us" if "orjson_us" in row else f"{'-':>11}"
+        speedup = f"{row['speedup']:>7.2f}x" if "speedup" in row else f"{'-':>8}"
+        print(f"{name:<20} {row['json_us']:>9.1f}us {fast} {speedup}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
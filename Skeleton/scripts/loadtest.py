@@ -0,0 +1,247 @@
+"""Asyncio load generator for the guidance backends.
+
+Drives /api/flowchart, /api/mentor/ai and /api/step-links with a fixed number
+of concurrent keep-alive connections and reports throughput and latency
+percentiles per endpoint. Endpoints the target doesn't serve (per its
+/openapi.json, eg. /api/mentor/ai on StudyHinter) are skipped with a warning
+instead of being measured as 404s. Uses only the standard library.
+
+Usage examples:
+  python scripts/loadtest.py --target http://127.0.0.1:8000 --endpoints flowchart,mentor --concurrency 20 --duration 30
+  python scripts/loadtest.py --target http://127.0.0.1:8001 --endpoints flowchart,step-links --requests 500 --unique --json
+
+Pair it with scripts/fake_upstream.py to benchmark without spending real quota.
+`--unique` makes every problem distinct so the response caches are bypassed.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+import urllib.request
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+PROBLEMS = [
+    "Two Sum",
+    "Longest Substring Without Repeating Characters",
+    "Merge Intervals",
+    "Why does the moon glow?",
+    "How do volcanoes erupt?",
+    "Number of Islands",
+    "How are rainbows formed?",
+    "Climbing Stairs",
+]
+
+ENDPOINTS = {
+    "flowchart": "/api/flowchart",
+    "mentor": "/api/mentor/ai",
+    "step-links": "/api/step-links",
+}
+
+
+def request_body(endpoint: str, problem: str) -> dict:
+    if endpoint == "flowchart":
+        # Each app ignores the field meant for the other one
+        return {"problem": problem, "approach": "both", "difficulty": "below_grade_6"}
+    if endpoint == "mentor":
+        return {"problem": problem, "approach": "both"}
+    return {
+        "problem": problem,
+        "step_title": "Choose a data structure",
+        "step_description": "Decide what lets you look things up quickly",
+    }
+
+
+def served_paths(target: str, timeout: float = 10.0) -> Optional[Set[str]]:
+    """Paths in the target's OpenAPI schema, or None if it can't be fetched"""
+    try:
+        with urllib.request.urlopen(f"{target.rstrip('/')}/openapi.json", timeout=timeout) as response:
+            return set(json.loads(response.read())["paths"])
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+class Connection:
+    """Minimal HTTP/1.1 keep-alive client on asyncio streams"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def post_json(self, path: str, payload: dict, timeout: float) -> Tuple[int, bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        body = json.dumps(payload).encode()
+        head = (
+            f"POST {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+        )
+        self.writer.write(head.encode() + body)
+        try:
+            return await asyncio.wait_for(self._read_response(), timeout)
+        except Exception:
+            self.close()
+            raise
+
+    async def _read_response(self) -> Tuple[int, bytes]:
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed by server")
+        status = int(status_line.split()[1])
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding") == "chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).strip(), 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            body = b"".join(chunks)
+        else:
+            body = await self.reader.readexactly(int(headers.get("content-length", 0)))
+
+        if headers.get("connection") == "close":
+            self.close()
+        return status, body
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run(args) -> Dict[str, dict]:
+    target = urlparse(args.target)
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    for endpoint in endpoints:
+        if endpoint not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint {endpoint!r}; choose from {', '.join(ENDPOINTS)}")
+
+    served = served_paths(args.target)
+    if served is None:
+        print("warning: could not read /openapi.json; running every endpoint", file=sys.stderr)
+    else:
+        for endpoint in [e for e in endpoints if ENDPOINTS[e] not in served]:
+            print(f"skipping {endpoint}: {ENDPOINTS[endpoint]} is not served by {args.target}", file=sys.stderr)
+        endpoints = [e for e in endpoints if ENDPOINTS[e] in served]
+    if not endpoints:
+        raise SystemExit(f"None of the requested endpoints is served by {args.target}")
+
+    latencies: Dict[str, List[float]] = {e: [] for e in endpoints}
+    errors: Dict[str, int] = {e: 0 for e in endpoints}
+    counter = itertools.count()
+    deadline = time.perf_counter() + args.duration if args.requests is None else None
+
+    def next_job() -> Optional[Tuple[str, dict]]:
+        n = next(counter)
+        if args.requests is not None and n >= args.requests:
+            return None
+        if deadline is not None and time.perf_counter() >= deadline:
+            return None
+        endpoint = endpoints[n % len(endpoints)]
+        problem = random.choice(PROBLEMS)
+        if args.unique:
+            problem = f"{problem} #{n}"
+        return endpoint, request_body(endpoint, problem)
+
+    async def worker() -> None:
+        conn = Connection(target.hostname, target.port or 80)
+        while True:
+            job = next_job()
+            if job is None:
+                break
+            endpoint, payload = job
+            start = time.perf_counter()
+            try:
+                status, _ = await conn.post_json(ENDPOINTS[endpoint], payload, args.timeout)
+                if status >= 400:
+                    errors[endpoint] += 1
+            except Exception:
+                errors[endpoint] += 1
+                continue
+            latencies[endpoint].append(time.perf_counter() - start)
+        conn.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    report = {}
+    for endpoint in endpoints:
+        values = sorted(latencies[endpoint])
+        report[endpoint] = {
+            "requests": len(values),
+            "errors": errors[endpoint],
+            "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(values, 50) * 1000, 1),
+            "p95_ms": round(percentile(values, 95) * 1000, 1),
+            "p99_ms": round(percentile(values, 99) * 1000, 1),
+            "max_ms": round(values[-1] * 1000, 1) if values else 0.0,
+        }
+    report["_total"] = {
+        "elapsed_s": round(elapsed, 2),
+        "concurrency": args.concurrency,
+        "throughput_rps": round(sum(len(v) for v in latencies.values()) / elapsed, 2) if elapsed else 0.0,
+    }
+    return report
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="Load test the guidance endpoints")
+    p.add_argument("--target", default="http://127.0.0.1:8000", help="Backend base URL")
+    p.add_argument("--endpoints", default="flowchart", help=f"Comma list of {', '.join(ENDPOINTS)}")
+    p.add_argument("--concurrency", type=int, default=10)
+    group = p.add_mutually_exclusive_group()
+    group.add_argument("--duration", type=float, default=30.0, help="Seconds to run (default)")
+    group.add_argument("--requests", type=int, help="Total number of requests instead of a duration")
+    p.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    p.add_argument("--unique", action="store_true", help="Use a distinct problem per request (no cache hits)")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = p.parse_args()
+
+    random.seed(args.seed)
+    report = asyncio.run(run(args))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    total = report.pop("_total")
+    print(f"{'endpoint':<12} {'reqs':>6} {'errs':>5} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for endpoint, row in report.items():
+        print(
+            f"{endpoint:<12} {row['requests']:>6} {row['errors']:>5} {row['throughput_rps']:>8} "
+            f"{row['p50_ms']:>7}ms {row['p95_ms']:>7}ms {row['p99_ms']:>7}ms {row['max_ms']:>7}ms"
+        )
+    print(f"total: {total['throughput_rps']} req/s over {total['elapsed_s']}s at concurrency {total['concurrency']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
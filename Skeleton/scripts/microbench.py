@@ -0,0 +1,292 @@
+"""Micro-benchmarks for the parse/sanitize/shuffle hot path of all three backends.
+
+Times the JSON cleaners, no-code sanitizers, option shufflers and validators
+on a corpus of realistic and pathological model outputs (huge fenced text with
+prose around it, truncated JSON, trailing commas everywhere). Uses only the
+standard library plus each backend's own dependencies.
+
+Usage examples:
+  python scripts/microbench.py --save bench/baseline.json
+  python scripts/microbench.py --compare bench/baseline.json --threshold 0.2
+  python scripts/microbench.py --filter parse_flowchart --cassette backend/cassettes/upstream.jsonl
+
+`--compare` exits with status 1 when any case got slower than the baseline by
+more than the threshold (fractional, on the best-of-repeats time). `--current`
+compares two saved result files without running anything.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import timeit
+import types
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKENDS = {
+    "skeleton": REPO_ROOT / "Skeleton" / "backend",
+    "logichinter": REPO_ROOT / "app1-LogicHinter" / "backend",
+    "studyhinter": REPO_ROOT / "app2-StudyHinter" / "backend",
+}
+
+
+def load_backend(alias: str, backend_dir: Path) -> types.ModuleType:
+    """Register a backend's `app` package under another name so all three can coexist"""
+    package = types.ModuleType(alias)
+    package.__path__ = [str(backend_dir / "app")]
+    package.__package__ = alias
+    sys.modules[alias] = package
+    return package
+
+
+# =========================
+# ======  CORPUS  =========
+# =========================
+
+def make_step(n: int, description_words: int = 12) -> dict:
+    return {
+        "id": f"step-{n}",
+        "title": f"Step {n}: Which idea helps us move forward here?",
+        "description": " ".join(["Think carefully about what the problem asks"] * max(1, description_words // 7)),
+        "options": [
+            {"id": "A", "label": "Keep a running record of what we have seen", "reason": "It avoids repeated work.", "correct": True},
+            {"id": "B", "label": "Check every pair again from scratch", "reason": "Correct but slow.", "correct": False},
+            {"id": "C", "label": "Sort first, then guess", "reason": "Sorting alone does not answer it.", "correct": False},
+            {"id": "D", "label": "Stop after the first element", "reason": "Misses most cases.", "correct": False},
+        ],
+    }
+
+
+def flowchart_json(steps: int, description_words: int = 12, indent: int = 2) -> str:
+    return json.dumps({"steps": [make_step(n, description_words) for n in range(1, steps + 1)]}, indent=indent)
+
+
+def with_trailing_commas(text: str) -> str:
+    """Add a trailing comma before every closing bracket, as models sometimes do"""
+    return text.replace("\n}", ",\n}").replace("\n]", ",\n]").replace("}\n", "},\n").rstrip(",\n")
+
+
+LINKS = {
+    "links": [
+        {"title": "Hash maps explained", "url": "https://example.com/hash-maps", "summary": "How constant-time lookups work."},
+        {"title": "Two pointers", "url": "https://example.com/two-pointers", "summary": "Walking an array from both ends."},
+        {"title": "Invariants", "url": "https://example.com/invariants", "summary": "Why stating what stays true helps."},
+    ]
+}
+
+CODE_HEAVY = "\n".join(
+    ["Here is how you might think about it:", "```python", "def solve(nums):", "    seen = {};", "```"] * 400
+)
+
+
+def build_corpus(cassette: Path | None) -> Dict[str, Dict[str, str]]:
+    """Model outputs grouped by what they should parse into"""
+    realistic = flowchart_json(6)
+    huge = flowchart_json(200, description_words=120)
+    flowcharts = {
+        "realistic": f"```json\n{realistic}\n```",
+        "bare": json.dumps(json.loads(realistic)),
+        "huge_fenced": (
+            "Sure! Here is the flowchart you asked for.\n\n```json\n"
+            + huge
+            + "\n```\n\nLet me know if you want more steps. " * 3
+        ),
+        "trailing_commas": with_trailing_commas(flowchart_json(60)),
+        "truncated": realistic[: int(len(realistic) * 0.7)],
+    }
+
+    links_text = json.dumps(LINKS, indent=2)
+    links = {
+        "realistic": f"```json\n{links_text}\n```",
+        "trailing_commas": with_trailing_commas(links_text),
+        "truncated": links_text[: int(len(links_text) * 0.6)],
+    }
+
+    if cassette is not None:
+        for n, text in enumerate(cassette_texts(cassette)):
+            if '"steps"' in text:
+                flowcharts[f"recorded_{n}"] = text
+            elif '"links"' in text:
+                links[f"recorded_{n}"] = text
+
+    return {"flowcharts": flowcharts, "links": links}
+
+
+def cassette_texts(path: Path) -> List[str]:
+    """Model text of every Gemini response recorded in a cassette file"""
+    texts = []
+    with path.open() as fh:
+        for line in fh:
+            entry = json.loads(line)
+            if entry.get("kind") != "gemini":
+                continue
+            try:
+                texts.append(entry["response"]["candidates"][0]["content"]["parts"][0]["text"])
+            except (KeyError, IndexError, TypeError):
+                continue
+    return texts
+
+
+# =========================
+# ======  CASES  ==========
+# =========================
+
+def tolerant(fn: Callable[[Any], Any], arg: Any) -> Callable[[], None]:
+    """Call fn(arg), treating parse failures as a normal (timed) outcome"""
+    def call() -> None:
+        try:
+            fn(arg)
+        except ValueError:  # json.JSONDecodeError and pydantic's ValidationError included
+            pass
+    return call
+
+
+def build_cases(corpus: Dict[str, Dict[str, str]]) -> List[Tuple[str, Callable[[], None]]]:
+    skeleton, logic, study = load_targets()
+    flowcharts, links = corpus["flowcharts"], corpus["links"]
+    cases: List[Tuple[str, Callable[[], None]]] = []
+
+    for name, text in flowcharts.items():
+        unfenced = text.strip().removeprefix("```json").removesuffix("```").strip()
+        cases += [
+            (f"logichinter.parse_flowchart_text[{name}]", tolerant(logic.parse_flowchart_text, text)),
+            (f"logichinter._attempt_json_load[{name}]", tolerant(logic._attempt_json_load, unfenced)),
+            (f"studyhinter.clean_json[{name}]", tolerant(study.clean_json, text)),
+            (f"skeleton.clean_json_response[{name}]", tolerant(skeleton.clean_json_response, text)),
+        ]
+
+    for name, text in links.items():
+        cases.append((f"logichinter.parse_step_links[{name}]", tolerant(logic.parse_step_links, text)))
+
+    cases += [
+        ("logichinter.enforce_no_code[label]", tolerant(logic.enforce_no_code, "Keep a running record of what we have seen")),
+        ("logichinter.enforce_no_code[code_heavy]", tolerant(logic.enforce_no_code, CODE_HEAVY)),
+    ]
+
+    for name, steps in (("6_steps", 6), ("200_steps", 200)):
+        payload = json.loads(flowchart_json(steps))
+        logic_steps = [logic.FlowStep(**s) for s in payload["steps"]]
+        study_steps = [study.FlowStep(**s) for s in payload["steps"]]
+        skeleton_steps = [skeleton.FlowStep(**s) for s in payload["steps"]]
+        cases += [
+            (f"logichinter.sanitize_flow_steps[{name}]", tolerant(logic.sanitize_flow_steps, logic_steps)),
+            (f"logichinter.shuffle_options[{name}]", tolerant(lambda ss: [logic.shuffle_options(s) for s in ss], logic_steps)),
+            (f"studyhinter.shuffle_options[{name}]", tolerant(lambda ss: [study.shuffle_options(s) for s in ss], study_steps)),
+            (f"skeleton.shuffle_flow_options[{name}]", tolerant(lambda ss: [skeleton.shuffle_flow_options(s) for s in ss], skeleton_steps)),
+            (f"skeleton.validate_flowchart_structure[{name}]", tolerant(skeleton.validate_flowchart_structure, skeleton_steps)),
+        ]
+
+    return cases
+
+
+def load_targets():
+    """Import the modules holding the benchmarked functions"""
+    for alias, backend_dir in BACKENDS.items():
+        load_backend(alias, backend_dir)
+    return (
+        importlib.import_module("skeleton.core.utils"),
+        importlib.import_module("logichinter.routers.guidance"),
+        importlib.import_module("studyhinter.routers.guidance"),
+    )
+
+
+# =========================
+# ======  RUNNER  =========
+# =========================
+
+def measure(call: Callable[[], None], repeat: int) -> Dict[str, float]:
+    timer = timeit.Timer(call)
+    loops, _ = timer.autorange()
+    per_call = [t / loops for t in timer.repeat(repeat=repeat, number=loops)]
+    return {
+        "best_us": round(min(per_call) * 1e6, 3),
+        "median_us": round(statistics.median(per_call) * 1e6, 3),
+        "loops": loops,
+        "repeat": repeat,
+    }
+
+
+def run(args) -> dict:
+    cases = build_cases(build_corpus(args.cassette))
+    if args.filter:
+        cases = [(name, call) for name, call in cases if args.filter in name]
+
+    results = {}
+    for name, call in cases:
+        results[name] = measure(call, args.repeat)
+        if not args.quiet:
+            print(f"{name:<60} {results[name]['best_us']:>12.2f}us", file=sys.stderr)
+
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> int:
+    """Print per-case deltas; return how many cases regressed beyond the threshold"""
+    regressions = 0
+    print(f"{'case':<60} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, row in sorted(current["results"].items()):
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<60} {'-':>12} {row['best_us']:>10.2f}us {'new':>8}")
+            continue
+        change = (row["best_us"] - before["best_us"]) / before["best_us"] if before["best_us"] else 0.0
+        flag = ""
+        if change > threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{name:<60} {before['best_us']:>10.2f}us {row['best_us']:>10.2f}us {change:>+7.1%}{flag}")
+
+    missing = sorted(set(baseline["results"]) - set(current["results"]))
+    for name in missing:
+        print(f"{name:<60} {'(not run)':>12}")
+    print(f"{regressions} regression(s) beyond {threshold:.0%}")
+    return regressions
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="Micro-benchmark the parse/sanitize/shuffle hot path")
+    p.add_argument("--filter", help="Only run cases whose name contains this text")
+    p.add_argument("--repeat", type=int, default=5, help="Timing repeats per case (best is kept)")
+    p.add_argument("--cassette", type=Path, help="Add recorded Gemini outputs from a cassette file to the corpus")
+    p.add_argument("--save", type=Path, help="Write results as JSON to this file")
+    p.add_argument("--compare", type=Path, metavar="BASELINE", help="Compare against a saved result file")
+    p.add_argument("--current", type=Path, help="With --compare: use this saved result instead of running")
+    p.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown before flagging (0.25 = 25%%)")
+    p.add_argument("--quiet", action="store_true", help="Don't print per-case progress")
+    args = p.parse_args()
+
+    if args.current:
+        current = json.loads(args.current.read_text())
+    else:
+        current = run(args)
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(current, indent=2) + "\n")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        return 1 if compare(baseline, current, args.threshold) else 0
+
+    if not args.save:
+        print(json.dumps(current, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,66 @@
+"""Check the estimated input tokens of every registered prompt against a budget.
+
+Loads each backend's guidance module (without starting it), renders every
+template in its prompt registry with the template's example values and
+estimates the token count (see `core/prompts.estimate_tokens`). It fails when
+a variant goes over its budget in `scripts/prompt_budget.json`, or when a
+registered prompt has no budget yet.
+
+Usage examples:
+  python scripts/promptbudget.py
+  python scripts/promptbudget.py --json
+"""
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import sys
+from pathlib import Path
+
+from microbench import BACKENDS, load_backend
+
+DEFAULT_BUDGET = Path(__file__).resolve().with_name("prompt_budget.json")
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="Prompt token budget check for the backends")
+    p.add_argument("--budget", type=Path, default=DEFAULT_BUDGET, help="Budget file (JSON)")
+    p.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = p.parse_args()
+
+    budget = json.loads(args.budget.read_text())["max_tokens"]
+    failures = []
+    report = {}
+
+    for backend, limits in budget.items():
+        load_backend(backend, BACKENDS[backend])
+        registry = importlib.import_module(f"{backend}.routers.guidance").prompts
+        rows = report.setdefault(backend, {})
+        for template in registry:
+            tokens = template.estimated_tokens()
+            limit = limits.get(template.name, {}).get(template.variant)
+            rows.setdefault(template.name, {})[template.variant] = {"tokens": tokens, "budget": limit}
+            if limit is None:
+                failures.append(f"{backend}.{template.name} [{template.variant}]: no budget")
+            elif tokens > limit:
+                failures.append(f"{backend}.{template.name} [{template.variant}]: {tokens} tokens > budget {limit}")
+
+    if args.json:
+        print(json.dumps({"results": report, "failures": failures}, indent=2))
+    else:
+        for backend, rows in report.items():
+            print(f"{backend}:")
+            for name, variants in rows.items():
+                cells = "  ".join(
+                    f"{variant} {row['tokens']:>5} / {row['budget'] if row['budget'] is not None else '-'}"
+                    for variant, row in variants.items()
+                )
+                print(f"  {name:<28} {cells}")
+        for failure in failures:
+            print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,203 @@
+"""Offline check that compact prompt variants still yield valid flowcharts.
+
+Renders every evaluated flowchart template in both variants for each problem
+in a corpus, sends it through the backend's own LLM client and parser, and
+checks the result against the flowchart schema (step count, options per step,
+exactly one correct option). By default responses are replayed from a
+recorded cassette, so the check needs no network or API key; record the
+corpus once with real keys (`--mode record`), or point the backends at
+`fake_upstream.py` with `--mode off` for a smoke test (its canned answers say
+nothing about prompt quality). No corpus is committed yet, so a plain replay
+fails until one is recorded.
+
+Reports, per template and variant: schema-valid rate, mean estimated input
+tokens and mean reported output tokens. Fails when a compact variant's valid
+rate is below `--min-valid`, or more than `--tolerance` below the full one's.
+
+Usage examples:
+  GEMINI_API_KEY=... python scripts/prompteval.py --mode record
+  python scripts/prompteval.py
+  python scripts/prompteval.py --backends studyhinter --problems my_topics.txt --json
+"""
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import os
+import statistics
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from microbench import BACKENDS, load_backend
+
+DEFAULT_CASSETTES = Path(__file__).resolve().with_name("prompt_eval")
+
+DEFAULT_PROBLEMS = {
+    "logichinter": [
+        "Given an array of integers and a target, return the indices of the two numbers that add up to the target.",
+        "Reverse a singly linked list.",
+        "Find the length of the longest substring without repeating characters.",
+        "Design an LRU cache with O(1) get and put.",
+        "Place n queens on an n x n board so that no two attack each other.",
+        "Merge k sorted linked lists into one sorted list.",
+        "Count the number of islands in a grid of land and water.",
+        "Find the minimum number of coins that make up an amount.",
+    ],
+    "studyhinter": [
+        "Why is the sky blue?",
+        "How do plants make food?",
+        "How do volcanoes erupt?",
+        "What is the water cycle?",
+        "How does the heart pump blood?",
+        "Why do we have seasons?",
+        "How do magnets work?",
+        "Why is the ocean salty?",
+    ],
+}
+
+
+def logichinter_steps(guidance: Any, text: str) -> list:
+    return guidance.sanitize_flow_steps(guidance.parse_flowchart_text(text))
+
+
+def studyhinter_steps(guidance: Any, text: str) -> list:
+    return [guidance.FlowStep(**step) for step in guidance.clean_json(text)["steps"]]
+
+
+# backend -> (parser, {template: (min steps, max steps, min options, max options)})
+EVALS: Dict[str, Tuple[Callable[[Any, str], list], Dict[str, Tuple[int, int, int, int]]]] = {
+    "logichinter": (logichinter_steps, {
+        "flowchart_prompt": (5, 8, 3, 4),
+        "first_step_prompt": (1, 8, 3, 4),
+        "remaining_steps_prompt": (4, 7, 3, 4),
+    }),
+    "studyhinter": (studyhinter_steps, {
+        "flowchart_prompt": (4, 7, 4, 4),
+    }),
+}
+
+
+def schema_errors(steps: list, shape: Tuple[int, int, int, int]) -> List[str]:
+    min_steps, max_steps, min_options, max_options = shape
+    errors = []
+    if not min_steps <= len(steps) <= max_steps:
+        errors.append(f"{len(steps)} steps")
+    for step in steps:
+        if not min_options <= len(step.options) <= max_options:
+            errors.append(f"{step.id}: {len(step.options)} options")
+        if sum(1 for option in step.options if option.correct) != 1:
+            errors.append(f"{step.id}: not exactly one correct option")
+        if any(not option.label.strip() for option in step.options):
+            errors.append(f"{step.id}: empty label")
+    return errors
+
+
+def evaluate(backend: str, problems: List[str]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """{template: {variant: summary}} for one backend"""
+    load_backend(backend, BACKENDS[backend])
+    guidance = importlib.import_module(f"{backend}.routers.guidance")
+    client = importlib.import_module(f"{backend}.core.gemini_client")
+    parse, shapes = EVALS[backend]
+
+    results: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for name, shape in shapes.items():
+        for variant in ("full", "compact"):
+            template = guidance.prompts.template(name, variant)
+            if template.variant != variant:
+                continue
+            rows = []
+            for problem in problems:
+                values = {**template.example, "problem": problem}
+                row: Dict[str, Any] = {"problem": problem, "input_tokens": template.estimated_tokens(**values)}
+                try:
+                    response = client.complete(template.render(**values), task=name)
+                except client.GeminiError as e:
+                    row["error"] = "unrecorded" if isinstance(e.__context__, client.CassetteMiss) else str(e)
+                    rows.append(row)
+                    continue
+                row["output_tokens"] = client.extract_usage(response)[1]
+                try:
+                    errors = schema_errors(parse(guidance, client.extract_text_response(response)), shape)
+                except Exception as e:
+                    errors = [f"unparseable: {type(e).__name__}"]
+                row["errors"] = errors
+                rows.append(row)
+
+            answered = [row for row in rows if "errors" in row]
+            valid = [row for row in answered if not row["errors"]]
+            results.setdefault(name, {})[variant] = {
+                "problems": len(rows),
+                "answered": len(answered),
+                "valid": len(valid),
+                "valid_rate": round(len(valid) / len(answered), 3) if answered else None,
+                "mean_input_tokens": round(statistics.mean(row["input_tokens"] for row in rows), 1),
+                "mean_output_tokens": round(statistics.mean(row["output_tokens"] for row in answered), 1) if answered else None,
+                "failures": {row["problem"]: row.get("errors") or row.get("error") for row in rows if row.get("errors") or row.get("error")},
+            }
+    return results
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="Offline schema check of compact prompt variants")
+    p.add_argument("--backends", default=",".join(EVALS), help="Comma list of backends to evaluate")
+    p.add_argument("--problems", type=Path, help="File with one problem per line (default: built-in corpus)")
+    p.add_argument("--mode", choices=("replay", "record", "off"), default="replay", help="Cassette mode for the LLM calls")
+    p.add_argument("--cassettes", type=Path, default=DEFAULT_CASSETTES, help="Directory of per-backend cassettes")
+    p.add_argument("--min-valid", type=float, default=0.9, help="Lowest acceptable valid rate for compact variants")
+    p.add_argument("--tolerance", type=float, default=0.05, help="How far compact may trail full on valid rate")
+    p.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = p.parse_args()
+
+    report = {}
+    failures = []
+    for backend in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        problems = DEFAULT_PROBLEMS[backend]
+        if args.problems:
+            problems = [line.strip() for line in args.problems.read_text().splitlines() if line.strip()]
+        # Each backend reads its own settings on import
+        cassette = (args.cassettes / f"{backend}.jsonl").resolve()
+        if args.mode == "replay" and not cassette.exists():
+            failures.append(f"{backend}: no recorded corpus at {cassette} (run with --mode record and real keys)")
+            continue
+        os.environ.update({
+            "CASSETTE_MODE": args.mode,
+            "CASSETTE_PATH": str(cassette),
+            "FLOWCHART_STORE_PATH": "",
+            "REQUEST_LOGGING_ENABLED": "false",
+        })
+        report[backend] = evaluate(backend, problems)
+
+        for name, variants in report[backend].items():
+            full, compact = variants.get("full"), variants.get("compact")
+            if compact is None:
+                continue
+            if compact["valid_rate"] is None:
+                failures.append(f"{backend}.{name}: no recorded responses for the compact variant (run with --mode record)")
+            elif compact["valid_rate"] < args.min_valid:
+                failures.append(f"{backend}.{name}: compact valid rate {compact['valid_rate']:.0%} < {args.min_valid:.0%}")
+            elif full["valid_rate"] is not None and compact["valid_rate"] < full["valid_rate"] - args.tolerance:
+                failures.append(
+                    f"{backend}.{name}: compact valid rate {compact['valid_rate']:.0%} trails full {full['valid_rate']:.0%}"
+                )
+
+    if args.json:
+        print(json.dumps({"results": report, "failures": failures}, indent=2))
+    else:
+        for backend, templates in report.items():
+            print(f"{backend}:")
+            for name, variants in templates.items():
+                for variant, row in variants.items():
+                    rate = "-" if row["valid_rate"] is None else f"{row['valid_rate']:.0%}"
+                    print(
+                        f"  {name:<28} {variant:<8} valid {row['valid']}/{row['answered']} ({rate})"
+                        f"  in ~{row['mean_input_tokens']:.0f} tok  out {row['mean_output_tokens'] or '-'} tok"
+                    )
+        for failure in failures:
+            print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
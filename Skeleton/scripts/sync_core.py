@@ -0,0 +1,69 @@
+"""Copy Skeleton's shared core modules into the apps, or check they are in sync.
+
+The apps deploy their `backend/` directories on their own, so instead of
+importing Skeleton at runtime each keeps a verbatim copy of the shared
+infrastructure modules (LLM client, caches, middleware, metrics, ...). Edit a
+module in `Skeleton/backend/app/core/` and run this script to update both apps.
+
+Usage examples:
+  python scripts/sync_core.py            # copy changed modules into the apps
+  python scripts/sync_core.py --check    # exit 1 if any app copy differs (CI)
+"""
+from __future__ import annotations
+
+import argparse
+import filecmp
+import shutil
+import sys
+from pathlib import Path
+
+from microbench import BACKENDS
+
+SHARED_MODULES = (
+    "bank.py",
+    "cache.py",
+    "cassette.py",
+    "compression.py",
+    "concurrency.py",
+    "deadline.py",
+    "etag.py",
+    "gemini_client.py",
+    "jobs.py",
+    "jsonfast.py",
+    "logs.py",
+    "metrics.py",
+    "profiling.py",
+    "prompts.py",
+    "store.py",
+    "timing.py",
+    "warmup.py",
+)
+APPS = ("logichinter", "studyhinter")
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="Sync Skeleton's shared core modules into the apps")
+    p.add_argument("--check", action="store_true", help="Only report differences; exit 1 if any")
+    args = p.parse_args()
+
+    source = BACKENDS["skeleton"] / "app" / "core"
+    drifted = []
+    for app in APPS:
+        target = BACKENDS[app] / "app" / "core"
+        for name in SHARED_MODULES:
+            if (target / name).exists() and filecmp.cmp(source / name, target / name, shallow=False):
+                continue
+            drifted.append(target / name)
+            if not args.check:
+                shutil.copyfile(source / name, target / name)
+
+    for path in drifted:
+        print(f"{'out of sync' if args.check else 'updated'}: {path.relative_to(BACKENDS['skeleton'].parents[1])}")
+    if args.check and drifted:
+        print("Run scripts/sync_core.py to update the app copies", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
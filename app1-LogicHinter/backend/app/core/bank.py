@@ -0,0 +1,95 @@
+"""
+Read-only bank of pre-generated flowcharts for popular problems.
+A build script runs the normal prompt pipeline offline and writes a JSON-lines
+file (one reviewable record per problem and variant) plus a `.idx` offset
+index keyed by normalized title. At runtime the data file is memory-mapped,
+so a lookup is a dict probe and one slice, with no upstream call.
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+def normalize_title(title: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    return " ".join(title.lower().split()).rstrip("?!. ")
+
+
+def bank_key(title: str, variant: str) -> str:
+    return f"{variant}:{normalize_title(title)}"
+
+
+class FlowchartBank:
+    """Memory-mapped JSON-lines bank with a tab-separated offset index"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._index: Dict[str, Tuple[int, int]] = {}
+        with open(f"{path}.idx") as fh:
+            for line in fh:
+                key, offset, length = line.rstrip("\n").split("\t")
+                self._index[key] = (int(offset), int(length))
+
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self._index else None
+
+    def get(self, title: str, variant: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the banked steps for a problem, or None"""
+        location = self._index.get(bank_key(title, variant))
+        if location is None:
+            return None
+        offset, length = location
+        return json.loads(self._map[offset:offset + length])["steps"]
+
+    def preload(self) -> None:
+        """Fault the mapped file into memory so early lookups don't wait on disk"""
+        if self._map is None:
+            return
+        if hasattr(mmap, "MADV_WILLNEED"):
+            self._map.madvise(mmap.MADV_WILLNEED)
+        for offset in range(0, len(self._map), mmap.PAGESIZE):
+            self._map[offset]
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+def open_bank(path: Optional[str]) -> Optional[FlowchartBank]:
+    """Open the bank at `path`; None when unset or not built yet"""
+    if not path or not os.path.exists(path) or not os.path.exists(f"{path}.idx"):
+        return None
+    return FlowchartBank(path)
+
+
+def write_bank(path: str, entries: Iterable[Tuple[str, str, List[Dict[str, Any]]]]) -> int:
+    """
+    Write a bank from (title, variant, steps) entries, replacing any existing one.
+
+    Returns:
+        Number of entries written (later duplicates of a key win)
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    index: Dict[str, Tuple[int, int]] = {}
+    offset = 0
+    with open(f"{path}.tmp", "wb") as data:
+        for title, variant, steps in entries:
+            key = bank_key(title, variant)
+            record = {"key": key, "title": title, "variant": variant, "steps": steps}
+            line = (json.dumps(record, ensure_ascii=False) + "\n").encode()
+            data.write(line)
+            index[key] = (offset, len(line))
+            offset += len(line)
+
+    with open(f"{path}.idx.tmp", "w") as out:
+        for key, (start, length) in index.items():
+            out.write(f"{key}\t{start}\t{length}\n")
+
+    os.replace(f"{path}.tmp", path)
+    os.replace(f"{path}.idx.tmp", f"{path}.idx")
+    return len(index)
@@ -0,0 +1,187 @@
+"""
+In-process stale-while-revalidate cache for AI generations.
+Fresh entries are served directly, stale entries are served immediately while
+a background refresh runs, and any entry still held is served if the upstream
+fails ("stale-if-error") instead of falling back to generic templates.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from .logs import log_event
+from .metrics import record_cache_lookup
+
+# Shared by every cache; background refreshes never run on the request path
+_refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="swr-refresh")
+
+
+class SWRCache:
+    """
+    LRU-bounded cache with a fresh window and a stale window per entry.
+
+    Statuses returned by `get_or_load`:
+        "hit"            - entry younger than the fresh window
+        "stale"          - entry within the stale window, refreshed in background
+        "miss"           - value produced by the loader on the request path
+        "stale-if-error" - loader failed, an older entry was served instead
+    """
+
+    def __init__(
+        self,
+        fresh_seconds: float,
+        stale_seconds: float,
+        max_entries: int = 512,
+        name: str = "default",
+    ):
+        self.name = name
+        self.fresh_seconds = fresh_seconds
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Tuple[Optional[Any], Optional[float]]:
+        """
+        Look up an entry without loading.
+
+        Returns:
+            (value, age in seconds), or (None, None) when absent
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, None
+            self._entries.move_to_end(key)
+        stored_at, value = entry
+        return value, time.monotonic() - stored_at
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry when full"""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        cacheable: Callable[[Any], bool] = lambda value: True,
+    ) -> Tuple[Any, str]:
+        """
+        Serve a cached value or produce one with `loader`.
+
+        Args:
+            key: Cache key
+            loader: Produces a new value; may raise on upstream failure
+            cacheable: Decides whether a freshly loaded value may be stored
+
+        Returns:
+            (value, status) where status is one of the values listed on the class
+
+        Raises:
+            Whatever `loader` raised, if there is no entry to fall back on
+        """
+        try:
+            value, status = self._get_or_load(key, loader, cacheable)
+        except Exception:
+            record_cache_lookup(self.name, "miss")
+            raise
+        record_cache_lookup(self.name, status)
+        return value, status
+
+    def _get_or_load(self, key, loader, cacheable) -> Tuple[Any, str]:
+        value, age = self.get(key)
+
+        if age is not None and age < self.fresh_seconds:
+            return value, "hit"
+
+        if age is not None and age < self.fresh_seconds + self.stale_seconds:
+            self.revalidate(key, loader, cacheable)
+            return value, "stale"
+
+        try:
+            fresh = loader()
+        except Exception:
+            if age is None:
+                raise
+            return value, "stale-if-error"
+
+        if cacheable(fresh):
+            self.set(key, fresh)
+        return fresh, "miss"
+
+    def lookup(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        cacheable: Callable[[Any], bool] = lambda value: True,
+    ) -> Tuple[Optional[Any], str]:
+        """
+        Serve a fresh or stale entry without loading on the request path, for
+        callers that produce misses themselves (eg. several at once). A stale
+        entry is refreshed in the background with `loader`.
+
+        Returns:
+            (value, "hit" | "stale"), or (None, "miss")
+        """
+        value, age = self.get(key)
+        if age is not None and age < self.fresh_seconds:
+            status = "hit"
+        elif age is not None and age < self.fresh_seconds + self.stale_seconds:
+            self.revalidate(key, loader, cacheable)
+            status = "stale"
+        else:
+            value, status = None, "miss"
+        record_cache_lookup(self.name, status)
+        return value, status
+
+    def revalidate(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        cacheable: Callable[[Any], bool] = lambda value: True,
+    ) -> None:
+        """Refresh an entry in the background, at most once per key at a time"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def _refresh() -> None:
+            try:
+                fresh = loader()
+                if cacheable(fresh):
+                    self.set(key, fresh)
+            except Exception as e:
+                # Keep serving the old entry; the next stale hit retries
+                log_event("cache_refresh_failed", logging.WARNING, cache=self.name, error=type(e).__name__)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        _refresh_pool.submit(_refresh)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def cache_for_route(
+    route: str,
+    windows: Dict[str, Tuple[float, float]],
+    max_entries: int = 512,
+) -> SWRCache:
+    """
+    Build a cache using the (fresh, stale) window configured for a route.
+    Routes without a window never serve from cache except on upstream errors.
+    """
+    fresh_seconds, stale_seconds = windows.get(route, (0.0, 0.0))
+    return SWRCache(fresh_seconds, stale_seconds, max_entries=max_entries, name=route)
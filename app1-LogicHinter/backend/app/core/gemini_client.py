@@ -1,31 +1,340 @@
-import requests
-from typing import Any
+"""
+Shared LLM client for all skeleton apps (Gemini, Anthropic, OpenRouter).
+Handles authentication, request formatting, connection pooling, timeouts,
+error handling and response text extraction. Every upstream call goes through
+one pooled HTTP session with metrics and cassette recording, so apps get these
+by calling `complete()` instead of building requests themselves. Token usage
+reported by the provider is counted per route and task (the prompt builder
+that made the call), with a cost estimate from `settings.model_prices`. Calls
+that don't name a model get the one `settings.task_models` routes their task
+to, so cheap sub-tasks can run on a smaller, faster model.
+
+Apps keep a verbatim copy of this module; edit it here and run
+`scripts/sync_core.py` to update them. `requests` (with urllib3 and ssl) is
+imported on first use, keeping it off the cold-start import path.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from . import jsonfast
+from .cassette import CassetteMiss, recorded
 from .config import settings
+from .deadline import DeadlineExceeded, remaining, timeout_for
+from .logs import log_event, note_tokens
+from .metrics import current_route, record_llm_call, record_llm_usage, track_upstream
+
+if TYPE_CHECKING:
+    import requests
+
+DEFAULT_MODEL = "gemini-2.0-flash"
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MAX_TOKENS = 300
+ANTHROPIC_URL = "https://api.anthropic.com/v1/messages"
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_limiter: Optional[threading.BoundedSemaphore] = None
+
+
+class GeminiError(Exception):
+    """Custom exception for LLM API errors (any provider)"""
+    def __init__(self, message: str, status_code: Optional[int] = None, provider: str = "gemini"):
+        super().__init__(message)
+        self.status_code = status_code
+        self.provider = provider
+
+
+def http_session() -> requests.Session:
+    """
+    Process-wide pooled session, so repeated upstream calls reuse
+    keep-alive connections instead of paying a TLS handshake each time.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                pool_size = getattr(settings, "upstream_pool_size", 16)
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def use_session(session: requests.Session) -> None:
+    """Use an existing session, eg. one shared by several apps hosted in one process"""
+    global _session
+    _session = session
+
+
+def upstream_limiter() -> threading.BoundedSemaphore:
+    """Process-wide cap on concurrent upstream calls (UPSTREAM_MAX_CONCURRENCY)"""
+    global _limiter
+    if _limiter is None:
+        with _session_lock:
+            if _limiter is None:
+                _limiter = threading.BoundedSemaphore(getattr(settings, "upstream_max_concurrency", 16))
+    return _limiter
+
+
+def use_limiter(limiter: threading.BoundedSemaphore) -> None:
+    """Use an existing limiter, eg. one shared by several apps hosted in one process"""
+    global _limiter
+    _limiter = limiter
+
+
+@contextmanager
+def upstream_slot() -> Iterator[None]:
+    """
+    Hold one upstream slot for the duration of a call, waiting at most
+    for whatever is left of the request budget.
+
+    Raises:
+        DeadlineExceeded: If no slot frees up in time
+    """
+    limiter = upstream_limiter()
+    left = remaining()
+    if not limiter.acquire(timeout=None if left is None else max(left, 0.0)):
+        raise DeadlineExceeded("No upstream slot became free within the request budget")
+    try:
+        yield
+    finally:
+        limiter.release()
+
+
+def preconnect(*base_urls: str, timeout: float = 5.0) -> None:
+    """Open pooled connections (DNS + TLS) to upstream hosts before the first request"""
+    for url in base_urls:
+        http_session().head(url, timeout=timeout)
+
+
+def warmup_prompt() -> None:
+    """Send a tiny prompt so the first real request finds the upstream path warm"""
+    complete("Reply with OK.", max_tokens=4, task="warmup_prompt")
+
+
+def llm_configured() -> bool:
+    """Whether LLM calls can be answered: a Gemini key is set, or they are replayed from a cassette"""
+    return bool(settings.gemini_api_key) or settings.cassette_mode == "replay"
+
+
+def _require_key(name: str, env_var: str) -> str:
+    key = getattr(settings, name, None)
+    if not key:
+        raise GeminiError(f"{env_var} not found in environment", provider=name.split("_")[0])
+    return key
+
 
+# Each builder returns (url, headers, payload) for one provider
 
-def complete(prompt: str) -> Any:
-    if not settings.gemini_api_key:
-        raise RuntimeError("GEMINI_API_KEY not found in environment")
+def _gemini_request(prompt: str, model: str, max_tokens: Optional[int]) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+    key = _require_key("gemini_api_key", "GEMINI_API_KEY")
+    # Key in a header, not the query string, so it never shows up in URLs or error text
+    url = f"{settings.gemini_base_url}/v1beta/models/{model}:generateContent"
+    headers = {"x-goog-api-key": key, "Content-Type": "application/json"}
+    payload: Dict[str, Any] = {"contents": [{"parts": [{"text": prompt}]}]}
+    if max_tokens:
+        payload["generationConfig"] = {"maxOutputTokens": max_tokens}
+    return url, headers, payload
 
-    url = (
-        "https://generativelanguage.googleapis.com"
-        f"/v1beta/models/gemini-2.0-flash:generateContent?key={settings.gemini_api_key}"
-    )
 
+def _anthropic_request(prompt: str, model: str, max_tokens: Optional[int]) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+    key = _require_key("anthropic_api_key", "ANTHROPIC_API_KEY")
+    headers = {"x-api-key": key, "anthropic-version": "2023-06-01", "Content-Type": "application/json"}
     payload = {
-        "contents": [
-            {
-                "parts": [
-                    {"text": prompt}
-                ]
-            }
-        ]
+        "model": model,
+        "max_tokens": max_tokens or DEFAULT_MAX_TOKENS,
+        "messages": [{"role": "user", "content": prompt}],
     }
+    return ANTHROPIC_URL, headers, payload
 
-    headers = {
-        "Content-Type": "application/json"
+
+def _openrouter_request(prompt: str, model: str, max_tokens: Optional[int]) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+    key = _require_key("openrouter_key", "OPENROUTER_KEY")
+    headers = {"Authorization": f"Bearer {key}", "Content-Type": "application/json"}
+    payload = {
+        "model": model if "/" in model else f"anthropic/{model}",
+        "messages": [
+            {"role": "system", "content": "You are a helpful mentor."},
+            {"role": "user", "content": prompt},
+        ],
+        "max_tokens": max_tokens or DEFAULT_MAX_TOKENS,
     }
+    return OPENROUTER_URL, headers, payload
+
+
+PROVIDERS: Dict[str, Callable[[str, str, Optional[int]], Tuple[str, Dict[str, str], Dict[str, Any]]]] = {
+    "gemini": _gemini_request,
+    "anthropic": _anthropic_request,
+    "openrouter": _openrouter_request,
+}
+
+
+# Task names every app uses: each is named after the prompt builder that makes
+# the call, so metrics, logs and `task_models` read the same across apps
+TASKS = (
+    "flowchart_prompt",
+    "first_step_prompt",
+    "remaining_steps_prompt",
+    "mentor_prompt",
+    "links_prompt",
+    "search_term_prompt",
+    "search_terms_prompt",
+    "example_questions_prompt",
+    "warmup_prompt",
+)
+
+
+def unknown_task_models() -> List[str]:
+    """`task_models` keys that match no task in `TASKS`, so they route no call"""
+    return sorted(set(getattr(settings, "task_models", {})) - set(TASKS))
+
+
+def model_for(task: str) -> str:
+    """The model `settings.task_models` routes `task` to, else the default model"""
+    return getattr(settings, "task_models", {}).get(task, DEFAULT_MODEL)
+
+
+def complete(
+    prompt: str,
+    model: Optional[str] = None,
+    provider: str = "gemini",
+    max_tokens: Optional[int] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    task: str = "other",
+) -> Dict[str, Any]:
+    """
+    Send a completion request to an LLM provider.
+
+    Args:
+        prompt: The text prompt to send
+        model: The model to use (default: the task's model, see `model_for`)
+        provider: "gemini", "anthropic" or "openrouter"
+        max_tokens: Output token cap (provider default when None)
+        timeout: Upper bound in seconds, further capped by the request budget
+        task: Prompt builder name (one of `TASKS`) that token usage and latency are counted under
+
+    Returns:
+        The full JSON response from the provider
+
+    Raises:
+        GeminiError: If the API key is missing or the request fails
+    """
+    if provider not in PROVIDERS:
+        raise GeminiError(f"Unknown LLM provider: {provider}", provider=provider)
+    model = model or model_for(task)
+    record_llm_call(current_route(), task, model)
+
+    import requests
+
+    def call() -> Dict[str, Any]:
+        # Built only for a live call, so replaying a cassette needs no API key
+        url, headers, payload = PROVIDERS[provider](prompt, model, max_tokens)
+        with upstream_slot(), track_upstream(provider):
+            start = time.perf_counter()
+            response = http_session().post(url, json=payload, headers=headers, timeout=timeout_for(timeout))
+            response.raise_for_status()
+            body = jsonfast.loads(response.content)
+        record_usage(task, model, body, time.perf_counter() - start)
+        return body
+
+    try:
+        return recorded(provider, f"{model}\n{prompt}", call)
+    except GeminiError:
+        raise
+    except CassetteMiss as e:
+        raise GeminiError(str(e), provider=provider)
+    except DeadlineExceeded:
+        raise GeminiError(f"Request time budget exhausted before calling {provider}", provider=provider)
+    except requests.exceptions.Timeout:
+        raise GeminiError(f"Request to {provider} timed out", provider=provider)
+    # GeminiError messages can reach clients as warnings: the exception text
+    # (which may quote URLs) is only logged, the message names the status
+    except requests.exceptions.RequestException as e:
+        status_code = getattr(e.response, 'status_code', None)
+        log_event("llm_request_failed", logging.WARNING, provider=provider, status=status_code, error=str(e))
+        raise GeminiError(
+            f"Request to {provider} failed" + (f" with status {status_code}" if status_code else ""),
+            status_code,
+            provider=provider,
+        )
+    except Exception as e:
+        log_event("llm_request_failed", logging.WARNING, provider=provider, error=repr(e))
+        raise GeminiError(f"Unexpected error calling {provider} ({type(e).__name__})", provider=provider)
+
+
+def extract_text_response(response: Dict[str, Any]) -> str:
+    """
+    Extract the text content from a provider response.
+
+    Args:
+        response: The JSON response from Gemini, Anthropic or OpenRouter
+
+    Returns:
+        The text content of the first candidate/choice
+
+    Raises:
+        GeminiError: If response format is invalid
+    """
+    try:
+        if "candidates" in response:
+            return response["candidates"][0]["content"]["parts"][0]["text"]
+        if "choices" in response:
+            return response["choices"][0]["message"]["content"]
+        if "content" in response:
+            return "".join(block.get("text", "") for block in response["content"])
+        return response["completion"]
+    except (KeyError, IndexError, TypeError, AttributeError) as e:
+        raise GeminiError(f"Invalid response format from LLM API: {str(e)}")
+
+
+def extract_usage(response: Dict[str, Any]) -> Tuple[int, int]:
+    """
+    Input and output token counts reported in a provider response.
+
+    Returns:
+        (input tokens, output tokens); 0 for counts the provider left out
+    """
+    usage = response.get("usageMetadata")
+    if isinstance(usage, dict):
+        # Gemini; thinking tokens are billed as output
+        output = usage.get("candidatesTokenCount", 0) + usage.get("thoughtsTokenCount", 0)
+        return usage.get("promptTokenCount", 0), output
+    usage = response.get("usage")
+    if not isinstance(usage, dict):
+        return 0, 0
+    if "input_tokens" in usage:
+        # Anthropic; cached prompt tokens are reported separately
+        prompt = (
+            usage.get("input_tokens", 0)
+            + (usage.get("cache_creation_input_tokens") or 0)
+            + (usage.get("cache_read_input_tokens") or 0)
+        )
+        return prompt, usage.get("output_tokens", 0)
+    return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+
+def record_usage(task: str, model: str, response: Dict[str, Any], seconds: float) -> None:
+    """Count one live call's tokens, estimated cost and latency under the current route and `task`"""
+    input_tokens, output_tokens = extract_usage(response)
+    prices = getattr(settings, "model_prices", {}).get(model)
+    cost = None
+    if prices is not None:
+        cost = (input_tokens * prices[0] + output_tokens * prices[1]) / 1_000_000
+    record_llm_usage(current_route(), task, model, input_tokens, output_tokens, seconds, cost)
+    note_tokens(task, model, input_tokens, output_tokens)
+
 
-    response = requests.post(url, json=payload, headers=headers, timeout=30)
-    response.raise_for_status()
-    return response.json()
\ No newline at end of file
+def complete_text(prompt: str, **kwargs: Any) -> str:
+    """`complete()` followed by `extract_text_response()`"""
+    return extract_text_response(complete(prompt, **kwargs))
@@ -0,0 +1,242 @@
+"""
+In-process background jobs for generations that outlive an HTTP request.
+A handler submits the work and answers 202 with a job id straight away; a
+small worker pool runs it under its own time budget, and clients poll
+`GET /api/jobs/{id}` or listen on `GET /api/jobs/{id}/events` (SSE) for the
+result. Finished jobs are kept for a TTL, and `DELETE /api/jobs/{id}` cancels
+one: a queued job never starts, and a running job's budget counts as spent,
+so it stops at its next upstream call.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from . import jsonfast
+from .deadline import deadline_scope
+from .logs import log_event
+from .metrics import record_job
+
+FINISHED = ("done", "failed", "cancelled")
+
+# How often an SSE stream checks its job, and sends a comment to keep proxies from closing it
+EVENTS_POLL_SECONDS = 0.25
+EVENTS_KEEPALIVE_SECONDS = 15.0
+
+
+class JobQueueFull(RuntimeError):
+    """Raised when too many jobs are already queued or running"""
+
+
+class JobAccepted(BaseModel):
+    job_id: str
+    status: str
+
+
+class Job:
+    """One submitted unit of work and its outcome"""
+
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.status = "queued"
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_event = threading.Event()
+        self.future: Optional[Future] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "result": jsonable_encoder(self.result),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """
+    Bounded worker pool plus a TTL-limited map of job id to Job.
+
+    Jobs run in a copy of the submitting request's context (so their log events
+    carry its request id) under a deadline of `budget_seconds`.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_pending: int = 32,
+        ttl_seconds: float = 900.0,
+        budget_seconds: float = 120.0,
+        max_entries: int = 512,
+    ):
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self.budget_seconds = budget_seconds
+        self.max_entries = max_entries
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="jobs")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn: Callable[[], Any]) -> Job:
+        """
+        Queue `fn` to run in the background.
+
+        Raises:
+            JobQueueFull: If `max_pending` jobs are already queued or running
+        """
+        with self._lock:
+            self._evict()
+            if sum(1 for job in self._jobs.values() if not job.finished) >= self.max_pending:
+                record_job(kind, "rejected")
+                raise JobQueueFull(f"{self.max_pending} jobs already in progress")
+            job = Job(kind)
+            self._jobs[job.id] = job
+
+        job.future = self._pool.submit(contextvars.copy_context().run, self._run, job, fn)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._evict()
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued or running job; finished jobs are returned unchanged"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return job
+            job.finished_at = time.time()
+            job.status = "cancelled"
+
+        job.cancel_event.set()
+        if job.future is not None:
+            job.future.cancel()
+        record_job(job.kind, "cancelled", job.finished_at - job.created_at)
+        log_event("job_cancelled", kind=job.kind, job_id=job.id)
+        return job
+
+    def _run(self, job: Job, fn: Callable[[], Any]) -> None:
+        with self._lock:
+            if job.status != "queued":
+                return
+            job.status = "running"
+            job.started_at = time.time()
+
+        try:
+            with deadline_scope(self.budget_seconds, job.cancel_event):
+                result = fn()
+        except Exception as e:
+            self._finish(job, "failed", error=str(e) or type(e).__name__)
+        else:
+            self._finish(job, "done", result=result)
+
+    def _finish(self, job: Job, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        with self._lock:
+            if job.status == "cancelled":
+                # Cancelled while running: the outcome is dropped
+                return
+            # Status last, so pollers never see "done" without the result
+            job.result, job.error = result, error
+            job.finished_at = time.time()
+            job.status = status
+
+        seconds = job.finished_at - job.created_at
+        record_job(job.kind, status, seconds)
+        log_event(
+            "job_finished",
+            logging.WARNING if status == "failed" else logging.INFO,
+            kind=job.kind,
+            job_id=job.id,
+            status=status,
+            seconds=round(seconds, 3),
+            error=error,
+        )
+
+    def _evict(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+        # Over capacity: drop the oldest finished jobs, never unfinished ones
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished]:
+            if len(self._jobs) <= self.max_entries:
+                break
+            del self._jobs[job_id]
+
+
+def jobs_router(queue: JobQueue, prefix: str = "/jobs") -> APIRouter:
+    """Status, SSE and cancel endpoints for the jobs in `queue`"""
+    router = APIRouter(prefix=prefix, tags=["jobs"])
+
+    def find(job_id: str) -> Job:
+        job = queue.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Unknown or expired job id")
+        return job
+
+    @router.get("/{job_id}")
+    async def job_status(job_id: str):
+        return jsonfast.FastJSONResponse(find(job_id).to_dict(), headers={"Cache-Control": "no-store"})
+
+    @router.delete("/{job_id}")
+    async def cancel_job(job_id: str):
+        find(job_id)
+        return jsonfast.FastJSONResponse(queue.cancel(job_id).to_dict(), headers={"Cache-Control": "no-store"})
+
+    @router.get("/{job_id}/events")
+    async def job_events(job_id: str):
+        job = find(job_id)
+
+        async def events():
+            # One event per status change; the last one carries the result
+            status = None
+            idle = 0.0
+            while True:
+                if job.status != status:
+                    status = job.status
+                    idle = 0.0
+                    yield b"event: " + status.encode() + b"\ndata: " + jsonfast.dumps(job.to_dict()) + b"\n\n"
+                if job.finished:
+                    return
+                await asyncio.sleep(EVENTS_POLL_SECONDS)
+                idle += EVENTS_POLL_SECONDS
+                if idle >= EVENTS_KEEPALIVE_SECONDS:
+                    idle = 0.0
+                    yield b": keep-alive\n\n"
+
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+        )
+
+    return router
@@ -0,0 +1,42 @@
+"""
+Pluggable JSON backend: orjson when installed, the standard library otherwise.
+Used for API responses (FastJSONResponse), Gemini envelope decoding and the
+JSON repair helpers. Decode errors are always `json.JSONDecodeError`
+(orjson's error subclasses it), so existing `except` clauses keep working.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Union
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+JSONDecodeError = json.JSONDecodeError
+
+
+def loads(data: Union[str, bytes, bytearray]) -> Any:
+    """Parse JSON from text or bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the fastest available backend"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
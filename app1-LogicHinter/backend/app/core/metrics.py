@@ -0,0 +1,293 @@
+"""
+Prometheus-style metrics for skeleton apps.
+Counters and histograms are kept in-process and rendered in the text
+exposition format at /metrics. Recording is a dict lookup plus a bisect under
+a per-metric lock, so it is cheap enough for the request hot path.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+
+from .logs import note_cache, note_fallback, note_upstream
+
+# Upper bounds (seconds) suited to both fast endpoints and slow LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# ASGI scope of the request being handled, for labelling work done inside it by route
+_scope: ContextVar[Optional[dict]] = ContextVar("metrics_request_scope", default=None)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter with a fixed set of label names"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets and a fixed set of label names"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, (list(s[0]), s[1], s[2])) for labels, s in self._values.items()]
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                label_text = _format_labels(self.labelnames, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {total}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class Registry:
+    """Holds every metric so they can be rendered together"""
+
+    def __init__(self):
+        self._metrics: List = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+)
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    "upstream_request_duration_seconds", "Upstream call latency by provider", ("provider",)
+)
+UPSTREAM_ERRORS = REGISTRY.counter(
+    "upstream_errors_total", "Failed upstream calls by provider and error type", ("provider", "error")
+)
+FALLBACKS = REGISTRY.counter(
+    "fallback_total", "Responses or parts served from a fallback path", ("route", "fallback")
+)
+JSON_PARSE_FAILURES = REGISTRY.counter(
+    "json_parse_failures_total", "Model outputs that could not be parsed as JSON", ("parser",)
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    "cache_lookups_total", "Cache lookups by cache and status (hit, stale, miss, ...)", ("cache", "status")
+)
+LLM_CALLS = REGISTRY.counter(
+    "llm_calls_total", "LLM calls by route, task and the model the task is routed to (cassette replays included)",
+    ("route", "task", "model"),
+)
+LLM_TOKENS = REGISTRY.counter(
+    "llm_tokens_total", "LLM tokens reported by providers by route, task, model and direction (input, output)",
+    ("route", "task", "model", "direction"),
+)
+LLM_COST = REGISTRY.counter(
+    "llm_cost_usd_total", "Estimated LLM spend in USD by route, task and model (priced models only)",
+    ("route", "task", "model"),
+)
+LLM_LATENCY = REGISTRY.histogram(
+    "llm_request_duration_seconds", "LLM call latency by route, task and model", ("route", "task", "model")
+)
+JOBS = REGISTRY.counter(
+    "jobs_total", "Background jobs by kind and final status (done, failed, cancelled, rejected)", ("kind", "status")
+)
+JOB_DURATION = REGISTRY.histogram(
+    "job_duration_seconds", "Background job time from submission to finish by kind", ("kind",),
+    buckets=DEFAULT_BUCKETS + (60.0, 120.0, 300.0),
+)
+
+
+@contextmanager
+def track_upstream(provider: str) -> Iterator[None]:
+    """Record latency, and the error type on failure, for one upstream call"""
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = type(e).__name__
+        UPSTREAM_ERRORS.inc(provider, error)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        UPSTREAM_LATENCY.observe(elapsed, provider)
+        note_upstream(provider, elapsed, error)
+
+
+def record_fallback(route: str, fallback: str) -> None:
+    FALLBACKS.inc(route, fallback)
+    note_fallback(fallback)
+
+
+def record_json_parse_failure(parser: str) -> None:
+    JSON_PARSE_FAILURES.inc(parser)
+
+
+def record_cache_lookup(cache: str, status: str) -> None:
+    CACHE_LOOKUPS.inc(cache, status)
+    note_cache(cache, status)
+
+
+def current_route() -> str:
+    """Route template of the current request, or "background" outside one"""
+    scope = _scope.get()
+    if scope is None:
+        return "background"
+    return getattr(scope.get("route"), "path", None) or "unmatched"
+
+
+def record_llm_call(route: str, task: str, model: str) -> None:
+    LLM_CALLS.inc(route, task, model)
+
+
+def record_llm_usage(
+    route: str,
+    task: str,
+    model: str,
+    input_tokens: int,
+    output_tokens: int,
+    seconds: float,
+    cost: Optional[float] = None,
+) -> None:
+    LLM_TOKENS.inc(route, task, model, "input", amount=input_tokens)
+    LLM_TOKENS.inc(route, task, model, "output", amount=output_tokens)
+    LLM_LATENCY.observe(seconds, route, task, model)
+    if cost is not None:
+        LLM_COST.inc(route, task, model, amount=cost)
+
+
+def record_job(kind: str, status: str, seconds: Optional[float] = None) -> None:
+    JOBS.inc(kind, status)
+    if seconds is not None:
+        JOB_DURATION.observe(seconds, kind)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per matched route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = ["500"]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+            await send(message)
+
+        token = _scope.set(scope)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _scope.reset(token)
+            route = scope.get("route")
+            # Use the route template so path parameters don't explode label cardinality
+            route_path = getattr(route, "path", None) or "unmatched"
+            REQUEST_LATENCY.observe(time.perf_counter() - start, scope["method"], route_path, status[0])
+
+
+def mount_metrics(app: FastAPI, path: str = "/metrics") -> None:
+    """
+    Add request metrics middleware and the text exposition endpoint to an app.
+
+    Args:
+        app: The FastAPI application
+        path: Where to expose the metrics
+    """
+    app.add_middleware(MetricsMiddleware)
+
+    async def metrics_endpoint() -> PlainTextResponse:
+        return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+    app.add_api_route(path, metrics_endpoint, methods=["GET"], include_in_schema=False)
@@ -0,0 +1,217 @@
+"""
+Opt-in stack-sampling profiler for production debugging.
+Admin-gated endpoints capture every thread's stack at a fixed interval, either
+over N seconds of live traffic or for a single request tagged with
+`X-Profile: 1`, and return collapsed stacks (for flamegraph tools) or a
+pstats-style table. Nothing is mounted unless profiling is enabled, so it
+costs nothing when off.
+"""
+from __future__ import annotations
+
+import asyncio
+import hmac
+import os
+import sys
+import threading
+import uuid
+from collections import Counter, OrderedDict
+from typing import Optional, Tuple
+
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+ADMIN_HEADER = "X-Admin-Token"
+PROFILE_HEADER = b"x-profile"
+
+MAX_SECONDS = 60.0
+KEEP_REQUEST_PROFILES = 20
+
+# Leaf frames of threads that are just waiting for work
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+Frame = Tuple[str, str, int]
+
+
+def _frame_key(frame) -> Frame:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name, code.co_firstlineno)
+
+
+class StackSampler:
+    """Samples the stacks of all other threads on a background thread"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "StackSampler":
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "StackSampler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+        while not self._stop.is_set():
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                leaf = _frame_key(frame)
+                if leaf[:2] in _IDLE_LEAVES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_key(frame))
+                    frame = frame.f_back
+                self.samples[tuple(reversed(stack))] += 1
+            self.sample_count += 1
+            self._stop.wait(self.interval)
+
+    def collapsed(self) -> str:
+        """Render as collapsed stacks: `root;child;leaf count` per line"""
+        lines = []
+        for stack, count in self.samples.most_common():
+            names = ";".join(f"{name} ({filename}:{line})" for filename, name, line in stack)
+            lines.append(f"{names} {count}")
+        return "\n".join(lines) + "\n"
+
+    def top(self, limit: int = 40) -> str:
+        """Render a pstats-style table of self and cumulative samples per function"""
+        own: Counter = Counter()
+        cumulative: Counter = Counter()
+        for stack, count in self.samples.items():
+            own[stack[-1]] += count
+            for frame in set(stack):
+                cumulative[frame] += count
+
+        total = sum(self.samples.values()) or 1
+        lines = [
+            f"{self.sample_count} sampling rounds, {total} busy stack samples, "
+            f"interval {self.interval * 1000:.1f}ms",
+            "",
+            f"{'self':>8} {'self%':>7} {'cum':>8} {'cum%':>7}  filename:lineno(function)",
+        ]
+        for frame, count in cumulative.most_common(limit):
+            filename, name, line = frame
+            lines.append(
+                f"{own[frame]:>8} {own[frame] * 100 / total:>6.1f}% "
+                f"{count:>8} {count * 100 / total:>6.1f}%  {filename}:{line}({name})"
+            )
+        return "\n".join(lines) + "\n"
+
+    def render(self, fmt: str) -> str:
+        return self.top() if fmt == "pstats" else self.collapsed()
+
+
+class ProfilerMiddleware:
+    """
+    Profiles single requests that carry `X-Profile: 1` and a valid admin
+    token. The profile is kept in memory and its id returned in the
+    `X-Profile-Id` response header.
+    """
+
+    def __init__(
+        self,
+        app,
+        admin_token: str,
+        profiles: "OrderedDict[str, StackSampler]",
+        interval: float = 0.001,
+    ):
+        self.app = app
+        self.admin_token = admin_token.encode()
+        self.profiles = profiles
+        self.interval = interval
+
+    def _wants_profile(self, headers) -> bool:
+        values = dict(headers)
+        return values.get(PROFILE_HEADER) == b"1" and hmac.compare_digest(
+            values.get(ADMIN_HEADER.lower().encode(), b""), self.admin_token
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wants_profile(scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex[:12]
+        sampler = StackSampler(self.interval).start()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.profiles[profile_id] = sampler.stop()
+            while len(self.profiles) > KEEP_REQUEST_PROFILES:
+                self.profiles.popitem(last=False)
+
+
+def mount_profiler(app: FastAPI, admin_token: str, prefix: str = "/admin/profile") -> None:
+    """
+    Add the profiling middleware and admin endpoints to an app.
+
+    Args:
+        app: The FastAPI application
+        admin_token: Secret expected in the X-Admin-Token header
+        prefix: URL prefix of the profiling endpoints
+    """
+    request_profiles: "OrderedDict[str, StackSampler]" = OrderedDict()
+    busy = threading.Lock()
+
+    def check_token(token: Optional[str]) -> None:
+        if not token or not hmac.compare_digest(token.encode(), admin_token.encode()):
+            raise HTTPException(status_code=403, detail="Admin token required")
+
+    async def profile_window(
+        seconds: float = Query(10.0, gt=0, le=MAX_SECONDS),
+        interval: float = Query(0.005, ge=0.001, le=1.0),
+        format: str = Query("collapsed", pattern="^(collapsed|pstats)$"),
+        x_admin_token: Optional[str] = Header(None),
+    ) -> PlainTextResponse:
+        """Sample all threads for `seconds` of live traffic"""
+        check_token(x_admin_token)
+        if not busy.acquire(blocking=False):
+            raise HTTPException(status_code=409, detail="A profile is already running")
+        sampler = StackSampler(interval)
+        try:
+            sampler.start()
+            await asyncio.sleep(seconds)
+        finally:
+            # Also on client disconnect / cancellation, or the thread samples forever
+            sampler.stop()
+            busy.release()
+        return PlainTextResponse(sampler.render(format))
+
+    async def request_profile(
+        profile_id: str,
+        format: str = Query("collapsed", pattern="^(collapsed|pstats)$"),
+        x_admin_token: Optional[str] = Header(None),
+    ) -> PlainTextResponse:
+        """Fetch the profile captured for a request tagged with X-Profile: 1"""
+        check_token(x_admin_token)
+        sampler = request_profiles.get(profile_id)
+        if sampler is None:
+            raise HTTPException(status_code=404, detail="Unknown or expired profile id")
+        return PlainTextResponse(sampler.render(format))
+
+    app.add_middleware(ProfilerMiddleware, admin_token=admin_token, profiles=request_profiles)
+    app.add_api_route(prefix, profile_window, methods=["GET"], include_in_schema=False)
+    app.add_api_route(f"{prefix}/{{profile_id}}", request_profile, methods=["GET"], include_in_schema=False)
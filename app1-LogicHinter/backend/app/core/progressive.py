@@ -0,0 +1,112 @@
+"""
+In-memory registry for flowcharts that are generated progressively.
+The first step is returned to the client right away; the remaining steps are
+produced on a background worker and appended here, and readers block (with a
+timeout) only when they ask for a step that has not arrived yet.
+"""
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+_generation_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="progressive")
+
+
+class ProgressiveFlowchart:
+    """Steps of one flowchart, filled in as generation progresses"""
+
+    def __init__(self, flowchart_id: str, first_steps: List[Any]):
+        self.id = flowchart_id
+        self.steps: List[Any] = list(first_steps)
+        self.complete = False
+        self.error: Optional[str] = None
+        self.created_at = time.monotonic()
+        self._changed = threading.Condition()
+
+    @property
+    def total_steps(self) -> Optional[int]:
+        """Known once generation has finished"""
+        return len(self.steps) if self.complete else None
+
+    def extend(self, steps: List[Any], complete: bool = False) -> None:
+        with self._changed:
+            self.steps.extend(steps)
+            self.complete = self.complete or complete
+            self._changed.notify_all()
+
+    def fail(self, error: str) -> None:
+        with self._changed:
+            self.error = error
+            self.complete = True
+            self._changed.notify_all()
+
+    def wait_for_step(self, n: int, timeout: float) -> Optional[Any]:
+        """
+        Return step `n` (1-based), waiting up to `timeout` seconds for it.
+
+        Returns:
+            The step, or None if generation finished without it or the wait timed out
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: len(self.steps) >= n or self.complete, timeout)
+            return self.steps[n - 1] if len(self.steps) >= n else None
+
+
+class ProgressiveStore:
+    """Bounded, TTL-limited map of flowchart id to ProgressiveFlowchart"""
+
+    def __init__(self, ttl_seconds: float = 1800.0, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._flowcharts: "OrderedDict[str, ProgressiveFlowchart]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(
+        self,
+        first_steps: List[Any],
+        generate_rest: Callable[[], List[Any]],
+        on_complete: Optional[Callable[[List[Any]], None]] = None,
+    ) -> ProgressiveFlowchart:
+        """
+        Register a flowchart and generate the rest of its steps in the background.
+
+        Args:
+            first_steps: Steps already available to return to the client
+            generate_rest: Produces the remaining steps; may raise
+            on_complete: Called with every step once generation succeeded
+        """
+        flowchart = ProgressiveFlowchart(uuid.uuid4().hex[:12], first_steps)
+        with self._lock:
+            self._evict()
+            self._flowcharts[flowchart.id] = flowchart
+
+        def _generate() -> None:
+            try:
+                flowchart.extend(generate_rest(), complete=True)
+            except Exception as e:
+                flowchart.fail(str(e))
+                return
+            if on_complete is not None:
+                on_complete(list(flowchart.steps))
+
+        # Runs in the request's context, so its deadline, spans and route label carry over
+        _generation_pool.submit(contextvars.copy_context().run, _generate)
+        return flowchart
+
+    def get(self, flowchart_id: str) -> Optional[ProgressiveFlowchart]:
+        with self._lock:
+            self._evict()
+            return self._flowcharts.get(flowchart_id)
+
+    def _evict(self) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._flowcharts:
+            oldest = next(iter(self._flowcharts.values()))
+            if oldest.created_at >= cutoff and len(self._flowcharts) < self.max_entries:
+                break
+            self._flowcharts.popitem(last=False)
@@ -0,0 +1,103 @@
+"""
+Prompt template registry with token estimates.
+Prompts are registered once per app as `str.format`-style templates (literal
+braces doubled, as in f-strings) and parsed at registration, so rendering is
+a join over pre-split parts. A template may have a "compact" variant that
+says the same in fewer input tokens; `PromptRegistry(variant=...)` picks which
+one is sent, falling back to "full" where there is no compact text. Token
+counts are estimated offline (no tokenizer dependency) and checked against
+per-template budgets by `scripts/promptbudget.py`.
+"""
+from __future__ import annotations
+
+import re
+from string import Formatter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+VARIANTS = ("full", "compact")
+
+# Words, single digits and single punctuation marks: close to how SentencePiece
+# and BPE tokenizers split English prompts with JSON examples in them
+_TOKEN_PIECES = re.compile(r"[A-Za-z]+|\d|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate LLM token count; long words count as several tokens"""
+    return sum(1 + len(piece) // 8 for piece in _TOKEN_PIECES.findall(text))
+
+
+class PromptTemplate:
+    """One variant of a prompt, parsed once into literal text and field names"""
+
+    def __init__(self, name: str, variant: str, text: str, example: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.variant = variant
+        self.text = text
+        self.example = example or {}
+        self._parts: List[Tuple[str, Optional[str]]] = []
+        for literal, field, spec, conversion in Formatter().parse(text):
+            if spec or conversion:
+                raise ValueError(f"Prompt {name!r} uses a format spec or conversion in {{{field}}}")
+            self._parts.append((literal, field))
+        self.fields = {field for _, field in self._parts if field is not None}
+
+    def render(self, **values: Any) -> str:
+        """
+        Fill in the template.
+
+        Raises:
+            KeyError: If a field has no value
+        """
+        return "".join(
+            literal if field is None else literal + str(values[field])
+            for literal, field in self._parts
+        )
+
+    def estimated_tokens(self, **values: Any) -> int:
+        """Token estimate with `values`, or the registered example values"""
+        return estimate_tokens(self.render(**(values or self.example)))
+
+
+class PromptRegistry:
+    """An app's prompt templates by name and variant"""
+
+    def __init__(self, variant: str = "full"):
+        if variant not in VARIANTS:
+            raise ValueError(f"Unknown prompt variant {variant!r}; expected one of {VARIANTS}")
+        self.variant = variant
+        self._templates: Dict[str, Dict[str, PromptTemplate]] = {}
+
+    def register(
+        self,
+        name: str,
+        full: str,
+        compact: Optional[str] = None,
+        example: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Add a prompt.
+
+        Args:
+            name: Prompt name (also the task name its LLM calls are counted under)
+            full: The complete prompt text
+            compact: A shorter variant with the same output format (and a subset of the fields)
+            example: Typical field values, used for budgets and evaluation
+        """
+        variants = {"full": PromptTemplate(name, "full", full, example)}
+        if compact is not None:
+            variants["compact"] = PromptTemplate(name, "compact", compact, example)
+            if not variants["compact"].fields <= variants["full"].fields:
+                raise ValueError(f"Compact variant of {name!r} uses fields the full one doesn't have")
+        self._templates[name] = variants
+
+    def template(self, name: str, variant: Optional[str] = None) -> PromptTemplate:
+        variants = self._templates[name]
+        return variants.get(variant or self.variant) or variants["full"]
+
+    def render(self, name: str, variant: Optional[str] = None, **values: Any) -> str:
+        """Render a prompt in `variant`, by default the registry's configured one"""
+        return self.template(name, variant).render(**values)
+
+    def __iter__(self) -> Iterator[PromptTemplate]:
+        for variants in self._templates.values():
+            yield from variants.values()
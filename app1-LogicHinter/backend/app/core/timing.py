@@ -0,0 +1,110 @@
+"""
+Lightweight span timing exposed as a Server-Timing response header.
+Routers wrap pipeline stages in `span("name")`; the middleware collects the
+spans of the current request and emits them so browser devtools can show the
+breakdown. Outside a request (background refreshes, scripts) spans are no-ops.
+"""
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DEBUG_HEADER = b"x-debug-timing"
+
+_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("server_timing_spans", default=None)
+_debug: ContextVar[bool] = ContextVar("server_timing_debug", default=False)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a block and attach it to the current request"""
+    spans = _spans.get()
+    if spans is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans.append((name, time.perf_counter() - start))
+
+
+def summary() -> Dict[str, Dict[str, float]]:
+    """
+    Aggregate the current request's spans by name.
+
+    Returns:
+        {name: {"ms": total milliseconds, "count": number of spans}}
+    """
+    totals: Dict[str, Dict[str, float]] = {}
+    for name, seconds in _spans.get() or []:
+        entry = totals.setdefault(name, {"ms": 0.0, "count": 0})
+        entry["ms"] += seconds * 1000
+        entry["count"] += 1
+    for entry in totals.values():
+        entry["ms"] = round(entry["ms"], 2)
+    return totals
+
+
+def debug_enabled() -> bool:
+    """Whether the current request asked for debug timing"""
+    return _debug.get()
+
+
+def debug_metadata(metadata: Optional[dict] = None) -> Optional[dict]:
+    """Add the timing breakdown to response metadata when debug timing is on"""
+    if not _debug.get():
+        return metadata
+    return {**(metadata or {}), "timings": summary()}
+
+
+def header_value(total_seconds: float) -> str:
+    """Format the collected spans plus the total as a Server-Timing value"""
+    parts = []
+    for name, entry in summary().items():
+        part = f"{name};dur={entry['ms']}"
+        if entry["count"] > 1:
+            part += f';desc="{entry["count"]} calls"'
+        parts.append(part)
+    parts.append(f"total;dur={round(total_seconds * 1000, 2)}")
+    return ", ".join(parts)
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware that collects spans per request and adds the
+    Server-Timing header. Debug mode (setting or `X-Debug-Timing: 1`)
+    lets routers also return the breakdown in the response body.
+    """
+
+    def __init__(self, app, debug: bool = False):
+        self.app = app
+        self.debug = debug
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        spans_token = _spans.set([])
+        debug = self.debug or (DEBUG_HEADER, b"1") in scope["headers"]
+        debug_token = _debug.set(debug)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                value = header_value(time.perf_counter() - start)
+                headers.append((b"server-timing", value.encode("latin-1")))
+                headers.append((b"timing-allow-origin", b"*"))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _spans.reset(spans_token)
+            _debug.reset(debug_token)
@@ -1,12 +1,44 @@
 from __future__ import annotations
 
+import logging
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .routers import guidance
+from .core.compression import CompressionMiddleware
 from .core.config import settings
+from .core.deadline import DeadlineMiddleware
+from .core.etag import ConditionalGetMiddleware
+from .core.gemini_client import TASKS, preconnect, unknown_task_models, warmup_prompt
+from .core.jsonfast import FastJSONResponse
+from .core.logs import RequestLoggingMiddleware, configure_logging, log_event
+from .core.metrics import mount_metrics
+from .core.profiling import mount_profiler
+from .core.timing import ServerTimingMiddleware
+from .core.warmup import Readiness, Tasks, mount_readiness, warmup_lifespan, warmup_tasks
+
+configure_logging(settings.log_level)
+
+readiness = Readiness()
+
+
+def startup_tasks(app: FastAPI) -> Tasks:
+    return warmup_tasks(
+        app,
+        connect=lambda: preconnect(settings.gemini_base_url),
+        banks=[guidance.flowchart_bank],
+        stores=[guidance.flowchart_store],
+        prompt=warmup_prompt if settings.warmup_prompt_enabled else None,
+    )
 
-app = FastAPI(title=settings.app_name, version="0.1.0")
+
+app = FastAPI(
+    title=settings.app_name,
+    version="0.1.0",
+    default_response_class=FastJSONResponse,
+    lifespan=warmup_lifespan(readiness, startup_tasks, settings.warmup_enabled),
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -14,7 +46,41 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    DeadlineMiddleware,
+    default_budget=settings.request_budget_seconds,
+    route_budgets=settings.route_budgets,
+)
+if settings.conditional_get_enabled:
+    app.add_middleware(ConditionalGetMiddleware, policies=settings.cache_control_policies)
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        gzip_level=settings.gzip_level,
+        brotli_quality=settings.brotli_quality,
+        exclude_paths=settings.compression_exclude_paths,
+    )
+if settings.server_timing_enabled:
+    app.add_middleware(ServerTimingMiddleware, debug=settings.server_timing_debug)
+if settings.metrics_enabled:
+    mount_metrics(app)
+if settings.profiling_enabled and settings.admin_token:
+    mount_profiler(app, settings.admin_token)
+if settings.request_logging_enabled:
+    app.add_middleware(
+        RequestLoggingMiddleware,
+        sample_rate=settings.request_log_sample_rate,
+        slow_ms=settings.request_log_slow_ms,
+    )
 app.include_router(guidance.router)
+mount_readiness(app, readiness)
+
+log_event("startup", gemini_key_loaded=bool(settings.gemini_api_key))
+# A misspelled or renamed task in TASK_MODELS would silently fall back to the default model
+unknown_tasks = unknown_task_models()
+if unknown_tasks:
+    log_event("task_models_unknown", logging.WARNING, tasks=unknown_tasks, known=list(TASKS))
 
 
 @app.get("/")
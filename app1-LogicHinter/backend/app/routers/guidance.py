@@ -2,15 +2,36 @@ from __future__ import annotations
 import json
 import random
 import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Header, HTTPException
 from pydantic import BaseModel, Field, HttpUrl, ValidationError
 
+from ..core import deadline, jsonfast
+from ..core.bank import open_bank
+from ..core.cache import cache_for_route
+from ..core.concurrency import map_in_context
 from ..core.config import settings
-from ..core.gemini_client import complete as gemini_complete
+from ..core.gemini_client import complete as gemini_complete, extract_text_response, llm_configured
+from ..core.metrics import record_cache_lookup, record_fallback, record_json_parse_failure
+from ..core.progressive import ProgressiveStore
+from ..core.prompts import PromptRegistry
+from ..core.store import open_store, stored_flowchart_response
+from ..core.timing import debug_metadata, span
 
 router = APIRouter(prefix="/api", tags=["guidance"])
+prompts = PromptRegistry(settings.prompt_variant)
+
+mentor_cache = cache_for_route("/api/mentor/ai", settings.cache_windows, settings.cache_max_entries)
+flowchart_cache = cache_for_route("/api/flowchart", settings.cache_windows, settings.cache_max_entries)
+flowchart_bank = open_bank(settings.flowchart_bank_path)
+progressive_flowcharts = ProgressiveStore(ttl_seconds=settings.progressive_ttl_seconds)
+flowchart_store = open_store(
+    settings.flowchart_store_path, settings.flowchart_retention_days, settings.flowchart_store_max_rows
+)
+batch_pool = ThreadPoolExecutor(max_workers=settings.flowchart_batch_workers, thread_name_prefix="flowchart-batch")
 
 
 # =========================
@@ -29,6 +50,7 @@ class GuidanceResponse(BaseModel):
     hints: list[str]
     visual_payload: Optional[Dict[str, Any]] = None
     warning: str | None = None
+    metadata: Optional[Dict[str, Any]] = None
 
 
 class FlowOption(BaseModel):
@@ -48,11 +70,41 @@ class FlowStep(BaseModel):
 class FlowchartRequest(BaseModel):
     problem: str
     approach: str | None = "both"
+    progressive: bool = False  # return step 1 now, fetch the rest by flowchart_id
 
 
 class FlowchartResponse(BaseModel):
     steps: list[FlowStep]
     warning: str | None = None
+    metadata: Optional[Dict[str, Any]] = None
+    flowchart_id: str | None = None
+    complete: bool = True
+
+
+class FlowchartBatchRequest(BaseModel):
+    problems: list[str] = Field(..., min_length=1)
+    approach: str | None = "both"
+
+
+class FlowchartBatchItem(BaseModel):
+    problem: str
+    steps: list[FlowStep]
+    warning: str | None = None
+    metadata: Optional[Dict[str, Any]] = None
+    flowchart_id: str | None = None
+
+
+class FlowchartBatchResponse(BaseModel):
+    items: list[FlowchartBatchItem]
+    warning: str | None = None
+
+
+class FlowchartStepResponse(BaseModel):
+    flowchart_id: str
+    index: int
+    step: FlowStep
+    total_steps: int | None = None
+    complete: bool = False
 
 
 class FlowchartPayload(BaseModel):
@@ -118,6 +170,12 @@ def suggest_visuals(problem: str) -> list[str]:
 # === FALLBACK BUILDER ===
 # =========================
 
+# Mentor output sections by approach, each with HINTS_PER_SECTION numbered items
+HINT_SECTIONS = {"naive": "Naive Hints", "optimized": "Optimized Hints"}
+HINTS_PER_SECTION = 6
+HINT_ITEM = re.compile(r"^\d+[.)]\s*(.*)$")
+
+
 def fallback_hints(problem: str, visuals: list[str], approach: str) -> list[str]:
     hints = []
 
@@ -146,20 +204,33 @@ def fallback_hints(problem: str, visuals: list[str], approach: str) -> list[str]
     return [enforce_no_code(h) for h in hints]
 
 
-def shuffle_options(step: FlowStep) -> FlowStep:
+def normalize_problem(problem: str) -> str:
+    return " ".join(problem.lower().split())
+
+
+def shuffle_options(step: FlowStep, seed: str | None = None) -> FlowStep:
     shuffled = step.options.copy()
-    random.shuffle(shuffled)
+    (random.Random(f"{seed}:{step.id}") if seed else random).shuffle(shuffled)
     return FlowStep(**{**step.dict(), "options": shuffled})
 
 
+def shuffle_steps(steps: list[FlowStep], seed: str | None = None) -> list[FlowStep]:
+    # Shuffled per response: cached, progressive and stored flowcharts keep the
+    # model's order, so each request sees its own option order. Seeded with a
+    # progressive flowchart's id, the order is fixed for that id, so repeated
+    # GETs return the same body (and ETag)
+    with span("shuffle"):
+        return [shuffle_options(step, seed) for step in steps]
+
+
 def _attempt_json_load(text: str) -> dict:
     try:
-        return json.loads(text)
+        return jsonfast.loads(text)
     except json.JSONDecodeError as exc:
         text_without_trailing_commas = re.sub(r",(\s*[}\]])", r"\1", text)
 
         if text_without_trailing_commas != text:
-            return json.loads(text_without_trailing_commas)
+            return jsonfast.loads(text_without_trailing_commas)
 
         raise exc
 
@@ -182,6 +253,7 @@ def parse_flowchart_text(ai_text: str) -> list[FlowStep]:
         except json.JSONDecodeError as err:
             load_errors.append(err)
     else:
+        record_json_parse_failure("parse_flowchart_text")
         raise load_errors[-1] if load_errors else ValueError("No JSON object found in Gemini output")
 
     try:
@@ -224,7 +296,11 @@ def parse_step_links(ai_text: str) -> list[StepLink]:
     cleaned = re.sub(r"^```", "", cleaned).strip()
     cleaned = re.sub(r"```$", "", cleaned).strip()
 
-    raw = _attempt_json_load(cleaned)
+    try:
+        raw = _attempt_json_load(cleaned)
+    except json.JSONDecodeError:
+        record_json_parse_failure("parse_step_links")
+        raise
     links = raw.get("links") if isinstance(raw, dict) else None
 
     if not isinstance(links, list):
@@ -268,24 +344,15 @@ def mentor(request: GuidanceRequest) -> GuidanceResponse:
     )
 
 
-@router.post("/step-links", response_model=StepLinkResponse)
-def step_links(request: StepLinkRequest) -> StepLinkResponse:
-    warning = None
-
-    if not settings.gemini_api_key:
-        return StepLinkResponse(
-            links=[],
-            warning="Gemini key not configured. Unable to fetch links for this step.",
-        )
-
-    prompt = f"""
+def links_prompt(problem: str, step_title: str, step_description: str) -> str:
+    return f"""
 You are LogicHinter — an AI that shares learning resources, not code.
 
 Provide 2-3 trustworthy links that teach a programmer how to perform the following problem-solving step without giving them the solution code.
 
-Step title: {request.step_title}
-Step description: {request.step_description}
-Problem context: {request.problem}
+Step title: {step_title}
+Step description: {step_description}
+Problem context: {problem}
 
 Rules:
 - Only return links to articles or docs that explain the technique, not full solutions.
@@ -296,12 +363,30 @@ Rules:
 {{"links":[{{"title":"...","url":"https://...","summary":"..."}}]}}
 """
 
+
+@router.post("/step-links", response_model=StepLinkResponse)
+def step_links(request: StepLinkRequest) -> StepLinkResponse:
+    warning = None
+
+    if not llm_configured():
+        record_fallback("/api/step-links", "empty_links")
+        return StepLinkResponse(
+            links=[],
+            warning="Gemini key not configured. Unable to fetch links for this step.",
+        )
+
+    with span("prompt"):
+        prompt = links_prompt(request.problem, request.step_title, request.step_description)
+
     try:
-        resp = gemini_complete(prompt)
-        ai_text = resp["candidates"][0]["content"]["parts"][0]["text"]
-        links = parse_step_links(ai_text)
+        with span("gemini"):
+            resp = gemini_complete(prompt, task="links_prompt")
+            ai_text = extract_text_response(resp)
+        with span("parse"):
+            links = parse_step_links(ai_text)
     except Exception as exc:
         warning = f"Gemini failed to fetch links: {exc}"
+        record_fallback("/api/step-links", "empty_links")
         links = []
 
     return StepLinkResponse(
@@ -310,42 +395,59 @@ Rules:
     )
 
 
-@router.post("/mentor/ai", response_model=GuidanceResponse)
-def mentor_ai(request: GuidanceRequest) -> GuidanceResponse:
-
-    print("✅ Gemini key loaded:", bool(settings.gemini_api_key))
-
-    visuals = request.visuals if request.visuals else suggest_visuals(request.problem)
-    warning = None
+def parse_hint_sections(text: str) -> dict[str, list[str]]:
+    """
+    Split mentor output into its Naive Hints / Optimized Hints sections of
+    numbered items. Wrapped lines are joined onto their item; text outside a
+    section is dropped.
+    """
+    sections: dict[str, list[str]] = {name: [] for name in HINT_SECTIONS}
+    headings = {heading.lower(): name for name, heading in HINT_SECTIONS.items()}
+    current = None
+    for raw in text.split("\n"):
+        line = raw.strip().strip("•-* ")
+        if not line:
+            continue
+        heading = line.strip("*#: ").lower()
+        if heading in headings:
+            current = headings[heading]
+            continue
+        if current is None:
+            continue
+        item = HINT_ITEM.match(line)
+        if item:
+            sections[current].append(item.group(1))
+        elif sections[current]:
+            sections[current][-1] += " " + line
+
+    return {
+        name: [enforce_no_code(f"{n}. {text}") for n, text in enumerate(items[:HINTS_PER_SECTION], start=1)]
+        for name, items in sections.items()
+    }
 
-    # Default: fallback
-    hints = fallback_hints(request.problem, visuals, request.approach)
 
-    if not settings.gemini_api_key:
-        visual_payload = {
-            "visual_type": "grid",
-            "visual_data": {
-                "matrix": [
-                    ["A1", "A2", "A3", "A4"],
-                    ["B1", "B2", "B3", "B4"],
-                    ["C1", "C2", "C3", "C4"],
-                ]
-            },
-            "steps": [
-                {"action": "highlight", "target": "A1"},
-                {"action": "highlight", "target": "B2"},
-                {"action": "highlight", "target": "C3"},
-            ],
-        }
+def complete_hint_sections(sections: dict[str, list[str]]) -> bool:
+    return all(len(sections.get(name, [])) == HINTS_PER_SECTION for name in HINT_SECTIONS)
 
-        return GuidanceResponse(
-            hints=hints,
-            visual_payload=visual_payload,
-            warning="Gemini key not configured. Using fallback hints."
-        )
 
-    try:
-        prompt = f"""
+def hints_for_approach(sections: dict[str, list[str]], problem: str, visuals: list[str], approach: str) -> list[str]:
+    """The hint lines for `approach`, sliced from the sections of one "both" generation"""
+    hints = []
+    for name, heading in HINT_SECTIONS.items():
+        if approach not in (name, "both"):
+            continue
+        if len(sections.get(name, [])) == HINTS_PER_SECTION:
+            hints.append(f"{heading}:")
+            hints.extend(sections[name])
+        else:
+            # The model left this section short; fill it from the template hints
+            record_fallback("/api/mentor/ai", "partial_hints")
+            hints.extend(fallback_hints(problem, visuals, name))
+    return hints
+
+
+def mentor_prompt(problem: str, visuals: list[str]) -> str:
+    return f"""
 You are LogicHinter — an AI that teaches algorithms without showing code.
 
 Rules:
@@ -354,7 +456,7 @@ Rules:
 - Be concise
 - Follow the structure exactly
 
-User selected approach: {request.approach}
+User selected approach: both
 
 Use this exact format:
 
@@ -377,7 +479,7 @@ Optimized Hints:
 6. How to Explain in an Interview: ...
 
 Problem:
-{request.problem}
+{problem}
 
 Detected visuals:
 {', '.join(visuals)}
@@ -386,20 +488,67 @@ Do NOT add explanations or greetings.
 Only output the structured hints.
 """
 
-        resp = gemini_complete(prompt)
 
-        ai_text = resp["candidates"][0]["content"]["parts"][0]["text"]
+def generate_mentor_hints(problem: str, visuals: list[str]) -> dict[str, list[str]]:
+    """Hint sections for every approach, from one "both" generation"""
+    with span("prompt"):
+        prompt = mentor_prompt(problem, visuals)
 
-        ai_hints = [
-            enforce_no_code(line.strip("•- "))
-            for line in ai_text.split("\n")
-            if line.strip()
-        ]
+    with span("gemini"):
+        resp = gemini_complete(prompt, task="mentor_prompt")
+
+        ai_text = extract_text_response(resp)
+
+    with span("sanitize"):
+        return parse_hint_sections(ai_text)
 
-        hints = ai_hints
+
+@router.post("/mentor/ai", response_model=GuidanceResponse)
+def mentor_ai(request: GuidanceRequest) -> GuidanceResponse:
+    visuals = request.visuals if request.visuals else suggest_visuals(request.problem)
+    warning = None
+
+    # Default: fallback
+    hints = fallback_hints(request.problem, visuals, request.approach)
+
+    if not llm_configured():
+        visual_payload = {
+            "visual_type": "grid",
+            "visual_data": {
+                "matrix": [
+                    ["A1", "A2", "A3", "A4"],
+                    ["B1", "B2", "B3", "B4"],
+                    ["C1", "C2", "C3", "C4"],
+                ]
+            },
+            "steps": [
+                {"action": "highlight", "target": "A1"},
+                {"action": "highlight", "target": "B2"},
+                {"action": "highlight", "target": "C3"},
+            ],
+        }
+
+        record_fallback("/api/mentor/ai", "fallback_hints")
+        return GuidanceResponse(
+            hints=hints,
+            visual_payload=visual_payload,
+            warning="Gemini key not configured. Using fallback hints."
+        )
+
+    metadata = None
+    try:
+        # One cached generation per problem serves every approach
+        sections, cache_status = mentor_cache.get_or_load(
+            (normalize_problem(request.problem), tuple(visuals)),
+            lambda: generate_mentor_hints(request.problem, visuals),
+            cacheable=complete_hint_sections,
+        )
+        hints = hints_for_approach(sections, request.problem, visuals, request.approach)
+        metadata = debug_metadata({"cache": cache_status})
 
     except Exception as e:
         warning = f"Gemini failed: {e}. Using fallback hints."
+        record_fallback("/api/mentor/ai", "fallback_hints")
 
     if any(token in request.problem for token in ("```", "#include", "public static", "def")):
         warning = (warning + " Code fragments removed.") if warning else "Code fragments removed."
@@ -424,22 +573,35 @@ Only output the structured hints.
         hints=hints,
         visual_payload=visual_payload,
         warning=warning,
+        metadata=metadata,
     )
 
 
-@router.post("/flowchart", response_model=FlowchartResponse)
-def flowchart_builder(request: FlowchartRequest) -> FlowchartResponse:
-    warning = None
-    selected_approach = request.approach or "both"
-
-    if not settings.gemini_api_key:
-        return FlowchartResponse(
-            steps=[],
-            warning="Gemini key not configured. Unable to generate flowchart.",
-        )
-
-    try:
-        prompt = f"""
+FLOWCHART_JSON_SHAPE = """{
+  "steps": [
+    {
+      "id": "slug-step-name",
+      "title": "Short title",
+      "description": "What the user should consider now",
+      "options": [
+        { "id": "option-id", "label": "Choice text", "reason": "Why this helps or hurts", "correct": true }
+      ]
+    }
+  ]
+}"""
+
+# Flowchart prompt templates: fill-ins in {braces}, literal braces doubled.
+# The compact variants are sent when PROMPT_VARIANT=compact.
+FLOWCHART_EXAMPLE = {
+    "problem": "Given an array of integers and a target, return the indices of the two numbers that add up to the target.",
+    "selected_approach": "both",
+    "json_shape": FLOWCHART_JSON_SHAPE,
+    "first_title": "Restate the goal",
+    "first_description": "What exactly must the answer contain?",
+    "correct": "Two indices whose values sum to the target",
+}
+
+GENERATE_FLOWCHART_PROMPT = """
 You are LogicHinter, a thinking companion that guides users through algorithms without providing code.
 
 Build an in-depth, multi-level decision flowchart the user will click through step by step.
@@ -468,20 +630,309 @@ Return ONLY valid JSON in this structure:
 }}
 
 Problem:
-{request.problem}
+{problem}
+"""
+
+GENERATE_FLOWCHART_PROMPT_COMPACT = """
+You are LogicHinter: guide the user through an algorithm problem without giving code.
+Build a 5-8 step decision flowchart, from understanding the problem to validating edge cases.
+Each step has 3-4 short options, exactly one correct (not always first), each with a short reason it helps or hurts. No code or pseudocode.
+Branch: "{selected_approach}" (naive: baselines, brute force, exploration; optimized: pruning, data structures, efficiency trade-offs; both: balance them).
+
+Return JSON only:
+{{"steps":[{{"id":"slug-step-name","title":"Short title","description":"What to consider now","options":[{{"id":"option-id","label":"Choice text","reason":"Why it helps or hurts","correct":true}}]}}]}}
+
+Problem:
+{problem}
+"""
+
+prompts.register("flowchart_prompt", GENERATE_FLOWCHART_PROMPT, GENERATE_FLOWCHART_PROMPT_COMPACT, example=FLOWCHART_EXAMPLE)
+
+FIRST_STEP_PROMPT = """
+You are LogicHinter, a thinking companion that guides users through algorithms without providing code.
+
+Write ONLY THE FIRST STEP of a decision flowchart the user will click through step by step.
+The first step should make sure the user understands the problem before choosing a strategy.
+
+Constraints:
+- Exactly 1 step with 3 or 4 options and EXACTLY one correct.
+- Vary the order of the correct option so it is NOT always first.
+- No code or pseudocode. Keep options and reasons short and actionable.
+- User selected the "{selected_approach}" branch. If naive, emphasize baselines, brute-force anchors, and exploration. If optimized, emphasize pruning, structure choices, and efficiency trade-offs. If both, balance the path.
+
+Return ONLY valid JSON in this structure:
+{json_shape}
+
+Problem:
+{problem}
+"""
+
+FIRST_STEP_PROMPT_COMPACT = """
+You are LogicHinter: guide the user through an algorithm problem without giving code.
+Write ONLY the first step of a decision flowchart: check the user understands the problem before picking a strategy.
+1 step, 3-4 short options, exactly one correct (not always first), each with a short reason. No code or pseudocode.
+Branch: "{selected_approach}" (naive: baselines, brute force, exploration; optimized: pruning, data structures, efficiency trade-offs; both: balance them).
+
+Return JSON only:
+{{"steps":[{{"id":"slug-step-name","title":"Short title","description":"What to consider now","options":[{{"id":"option-id","label":"Choice text","reason":"Why it helps or hurts","correct":true}}]}}]}}
+
+Problem:
+{problem}
+"""
+
+prompts.register("first_step_prompt", FIRST_STEP_PROMPT, FIRST_STEP_PROMPT_COMPACT, example=FLOWCHART_EXAMPLE)
+
+REMAINING_STEPS_PROMPT = """
+You are LogicHinter, a thinking companion that guides users through algorithms without providing code.
+
+The user is clicking through a decision flowchart. They already completed step 1:
+- Title: {first_title}
+- Description: {first_description}
+- Correct choice: {correct}
+
+Continue the flowchart from there.
+
+Constraints:
+- 4 to 7 MORE steps that move from step 1 to validation. Do NOT repeat step 1.
+- Each step must have 3 or 4 options with EXACTLY one correct.
+- Vary the order of the correct option so it is NOT always first.
+- No code or pseudocode. Keep options and reasons short and actionable.
+- Focus on reasoning: why each option helps or harms progress.
+- Encourage baselines, pattern choice, optimization direction, and edge-case validation.
+- User selected the "{selected_approach}" branch. If naive, emphasize baselines, brute-force anchors, and exploration. If optimized, emphasize pruning, structure choices, and efficiency trade-offs. If both, balance the path.
+
+Return ONLY valid JSON in this structure:
+{json_shape}
+
+Problem:
+{problem}
+"""
+
+REMAINING_STEPS_PROMPT_COMPACT = """
+You are LogicHinter: guide the user through an algorithm problem without giving code.
+The user finished step 1 of a decision flowchart ("{first_title}", correct choice: {correct}).
+Write 4-7 MORE steps from there to validation; do not repeat step 1.
+Each step has 3-4 short options, exactly one correct (not always first), each with a short reason it helps or hurts. No code or pseudocode.
+Branch: "{selected_approach}" (naive: baselines, brute force, exploration; optimized: pruning, data structures, efficiency trade-offs; both: balance them).
+
+Return JSON only:
+{{"steps":[{{"id":"slug-step-name","title":"Short title","description":"What to consider now","options":[{{"id":"option-id","label":"Choice text","reason":"Why it helps or hurts","correct":true}}]}}]}}
+
+Problem:
+{problem}
 """
 
-        resp = gemini_complete(prompt)
-        ai_text = resp["candidates"][0]["content"]["parts"][0]["text"]
+prompts.register("remaining_steps_prompt", REMAINING_STEPS_PROMPT, REMAINING_STEPS_PROMPT_COMPACT, example=FLOWCHART_EXAMPLE)
+
+
+def generate_flowchart(problem: str, selected_approach: str) -> list[FlowStep]:
+    with span("prompt"):
+        prompt = prompts.render("flowchart_prompt", problem=problem, selected_approach=selected_approach)
+
+    return flowchart_steps_from_prompt(prompt, task="flowchart_prompt")
+
+
+def flowchart_steps_from_prompt(prompt: str, task: str) -> list[FlowStep]:
+    with span("gemini"):
+        resp = gemini_complete(prompt, task=task)
+        ai_text = extract_text_response(resp)
+
+    with span("parse"):
         ai_steps = parse_flowchart_text(ai_text)
 
-        sanitized = sanitize_flow_steps(ai_steps)
-        steps = [shuffle_options(step) for step in sanitized]
+    with span("sanitize"):
+        return sanitize_flow_steps(ai_steps)
+
+
+def generate_first_step(problem: str, selected_approach: str) -> list[FlowStep]:
+    with span("prompt"):
+        prompt = prompts.render(
+            "first_step_prompt",
+            problem=problem,
+            selected_approach=selected_approach,
+            json_shape=FLOWCHART_JSON_SHAPE,
+        )
+
+    steps = flowchart_steps_from_prompt(prompt, task="first_step_prompt")
+    if not steps:
+        raise ValueError("Gemini returned no first step")
+    return steps[:1]
+
+
+def generate_remaining_steps(problem: str, selected_approach: str, first_step: FlowStep) -> list[FlowStep]:
+    correct = next((option.label for option in first_step.options if option.correct), "")
+    prompt = prompts.render(
+        "remaining_steps_prompt",
+        problem=problem,
+        selected_approach=selected_approach,
+        json_shape=FLOWCHART_JSON_SHAPE,
+        first_title=first_step.title,
+        first_description=first_step.description,
+        correct=correct,
+    )
+
+    steps = flowchart_steps_from_prompt(prompt, task="remaining_steps_prompt")
+    return [step for step in steps if step.id != first_step.id]
+
+
+def start_progressive_flowchart(problem: str, selected_approach: str) -> FlowchartResponse:
+    cache_key = (normalize_problem(problem), selected_approach)
+    cached, age = flowchart_cache.get(cache_key)
+    if cached is not None and age < flowchart_cache.fresh_seconds:
+        record_cache_lookup(flowchart_cache.name, "hit")
+        return FlowchartResponse(steps=shuffle_steps(cached), metadata=debug_metadata({"cache": "hit"}))
+
+    first = generate_first_step(problem, selected_approach)
+    progress = progressive_flowcharts.start(
+        first,
+        lambda: generate_remaining_steps(problem, selected_approach, first[0]),
+        # The full flowchart also serves later non-progressive requests
+        on_complete=lambda steps: flowchart_cache.set(cache_key, steps),
+    )
+    return FlowchartResponse(
+        steps=shuffle_steps(first, seed=progress.id),
+        flowchart_id=progress.id,
+        complete=False,
+        metadata=debug_metadata({"cache": "progressive"}),
+    )
+
+
+def store_flowchart(steps: list[FlowStep]) -> str | None:
+    if flowchart_store is None or not steps:
+        return None
+    try:
+        with span("store"):
+            return flowchart_store.save([step.dict() for step in steps])
+    except sqlite3.Error:
+        return None
+
+
+def banked_flowchart(problem: str, selected_approach: str) -> list[FlowStep] | None:
+    if flowchart_bank is None:
+        return None
+
+    banked = flowchart_bank.get(problem, selected_approach)
+    record_cache_lookup("flowchart_bank", "miss" if banked is None else "hit")
+    if banked is None:
+        return None
+    return [FlowStep(**step) for step in banked]
+
+
+@router.post("/flowchart", response_model=FlowchartResponse)
+def flowchart_builder(request: FlowchartRequest) -> FlowchartResponse:
+    warning = None
+    selected_approach = request.approach or "both"
+
+    # Popular problems are pre-generated offline (scripts/build_flowchart_bank.py)
+    banked = banked_flowchart(request.problem, selected_approach)
+    if banked is not None:
+        # Stored as banked, so every hit maps to the same content id
+        return FlowchartResponse(
+            steps=shuffle_steps(banked),
+            flowchart_id=store_flowchart(banked),
+            metadata=debug_metadata({"cache": "bank"}),
+        )
+
+    if not llm_configured():
+        record_fallback("/api/flowchart", "empty_steps")
+        return FlowchartResponse(
+            steps=[],
+            warning="Gemini key not configured. Unable to generate flowchart.",
+        )
+
+    if request.progressive:
+        try:
+            return start_progressive_flowchart(request.problem, selected_approach)
+        except Exception as e:
+            record_fallback("/api/flowchart", "empty_steps")
+            return FlowchartResponse(steps=[], warning=f"Gemini failed: {e}.")
+
+    metadata = None
+    try:
+        steps, cache_status = flowchart_cache.get_or_load(
+            (normalize_problem(request.problem), selected_approach),
+            lambda: generate_flowchart(request.problem, selected_approach),
+        )
+        metadata = debug_metadata({"cache": cache_status})
     except Exception as e:
         warning = f"Gemini failed: {e}."
+        record_fallback("/api/flowchart", "empty_steps")
         steps = []
 
     return FlowchartResponse(
-        steps=steps,
+        steps=shuffle_steps(steps),
         warning=warning,
-    )
\ No newline at end of file
+        metadata=metadata,
+        flowchart_id=store_flowchart(steps),
+    )
+
+
+@router.post("/flowchart/batch", response_model=FlowchartBatchResponse)
+def flowchart_batch(request: FlowchartBatchRequest) -> FlowchartBatchResponse:
+    if len(request.problems) > settings.flowchart_batch_max_items:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {settings.flowchart_batch_max_items} problems per batch",
+        )
+
+    # Every distinct problem goes through the single-flowchart path (bank, shared
+    # cache, store) on the batch pool; the upstream limiter caps Gemini calls
+    def build(problem: str) -> FlowchartBatchItem:
+        result = flowchart_builder(FlowchartRequest(problem=problem, approach=request.approach))
+        return FlowchartBatchItem(
+            problem=problem,
+            steps=result.steps,
+            warning=result.warning,
+            metadata=result.metadata,
+            flowchart_id=result.flowchart_id,
+        )
+
+    distinct = list(dict.fromkeys(request.problems))
+    built = dict(zip(distinct, map_in_context(batch_pool, build, distinct)))
+    items = [built[problem] for problem in request.problems]
+
+    failed = sum(1 for item in items if not item.steps)
+    warning = f"{failed} of {len(items)} flowcharts could not be generated." if failed else None
+    return FlowchartBatchResponse(items=items, warning=warning)
+
+
+@router.get("/flowchart/{flowchart_id}", response_model=FlowchartResponse)
+def stored_flowchart(flowchart_id: str, if_none_match: str | None = Header(None)):
+    response = stored_flowchart_response(flowchart_store, flowchart_id, if_none_match)
+    if response is not None:
+        return response
+
+    # Progressive flowcharts are addressable by their id once complete
+    progress = progressive_flowcharts.get(flowchart_id)
+    if progress is not None and progress.complete and not progress.error:
+        return FlowchartResponse(steps=shuffle_steps(progress.steps, seed=progress.id), flowchart_id=progress.id)
+
+    raise HTTPException(status_code=404, detail="Unknown or expired flowchart id")
+
+
+@router.get("/flowchart/{flowchart_id}/steps/{n}", response_model=FlowchartStepResponse)
+def flowchart_step(flowchart_id: str, n: int) -> FlowchartStepResponse:
+    progress = progressive_flowcharts.get(flowchart_id)
+    if progress is None or n < 1:
+        raise HTTPException(status_code=404, detail="Unknown or expired flowchart id")
+
+    # Only waits when the background generation hasn't produced step n yet; with
+    # the budget spent it just checks, and a missing step gets the 504 below
+    left = deadline.remaining()
+    with span("wait"):
+        step = progress.wait_for_step(n, settings.request_budget_seconds if left is None else max(0.0, left))
+
+    if step is None:
+        if progress.error:
+            raise HTTPException(status_code=502, detail=f"Gemini failed: {progress.error}.")
+        if progress.complete:
+            raise HTTPException(status_code=404, detail=f"Flowchart has only {progress.total_steps} steps")
+        raise HTTPException(status_code=504, detail="Step is still being generated, retry shortly")
+
+    return FlowchartStepResponse(
+        flowchart_id=progress.id,
+        index=n,
+        step=shuffle_options(step, seed=progress.id),
+        total_steps=progress.total_steps,
+        complete=progress.complete,
+    )
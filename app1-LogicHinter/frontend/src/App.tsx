@@ -1,7 +1,14 @@
 import { LayoutGroup, motion } from "framer-motion"
-import { useMemo, useState } from "react"
+import { useMemo, useRef, useState } from "react"
 import { MicButton } from "./components/ui/MicButton"
-import { FlowOption, FlowStep, StepLink, requestFlowchart, requestStepLinks } from "./lib/flowchart"
+import {
+  FlowOption,
+  FlowStep,
+  StepLink,
+  requestFlowchart,
+  requestFlowchartStep,
+  requestStepLinks,
+} from "./lib/flowchart"
 
 const shuffleOptions = <T,>(options: T[]): T[] => [...options].sort(() => Math.random() - 0.5)
 
@@ -42,6 +49,8 @@ export default function App() {
   const [activeApproach, setActiveApproach] = useState<"naive" | "optimized">("naive")
   const [activeLinkCardStepId, setActiveLinkCardStepId] = useState<string | null>(null)
   const [streamingFlowchart, setStreamingFlowchart] = useState(false)
+  const [loadingMoreSteps, setLoadingMoreSteps] = useState(false)
+  const flowchartRun = useRef(0)
 
   const hasActiveFlow = useMemo(
     () => question !== null || loadingFlowchart || flowchartSteps.length > 0,
@@ -53,12 +62,35 @@ export default function App() {
     [input, loadingFlowchart]
   )
   const activeStep = flowchartSteps[currentStepIndex]
-  const completed = flowchartSteps.length > 0 && currentStepIndex >= flowchartSteps.length
+  const completed = flowchartSteps.length > 0 && currentStepIndex >= flowchartSteps.length && !loadingMoreSteps
   const activeLinkStep = useMemo(
     () => flowchartSteps.find((step) => step.id === activeLinkCardStepId) ?? null,
     [activeLinkCardStepId, flowchartSteps]
   )
-  const showLoadingPlaceholder = loadingFlowchart && flowchartSteps.length === 0
+  const showLoadingPlaceholder =
+    (loadingFlowchart && flowchartSteps.length === 0) || (loadingMoreSteps && currentStepIndex >= flowchartSteps.length)
+
+  // Progressive flowcharts arrive as step 1 plus an id; pull the rest while the user works on step 1
+  const loadRemainingSteps = async (flowchartId: string, run: number) => {
+    setLoadingMoreSteps(true)
+    try {
+      for (let n = 2; ; n += 1) {
+        const response = await requestFlowchartStep(flowchartId, n)
+        if (!response || flowchartRun.current !== run) break
+
+        const [step] = attachShuffledOptions([response.step])
+        setFlowchartSteps((prev) => [...prev, step])
+        setSelections((prev) => ({ ...prev, [step.id]: null }))
+        if (response.complete && response.total_steps === n) break
+      }
+    } catch (error) {
+      if (flowchartRun.current === run) {
+        setFlowchartWarning(error instanceof Error ? error.message : "Unable to load the remaining steps.")
+      }
+    } finally {
+      if (flowchartRun.current === run) setLoadingMoreSteps(false)
+    }
+  }
 
   const startFlowchart = async (message: string) => {
     const trimmed = message.trim()
@@ -78,13 +110,18 @@ export default function App() {
     setStreamingFlowchart(false)
     setFlowchartSteps([])
     setSelections({})
+    setLoadingMoreSteps(false)
+    const run = ++flowchartRun.current
 
     try {
-      const response = await requestFlowchart(trimmed, approach, () => setStreamingFlowchart(true))
+      const response = await requestFlowchart(trimmed, approach, () => setStreamingFlowchart(true), true)
       const normalizedSteps = attachShuffledOptions(response.steps)
       setFlowchartSteps(normalizedSteps)
       setSelections(createEmptySelections(normalizedSteps))
       setFlowchartWarning(response.warning ?? null)
+      if (response.flowchart_id && !response.complete) {
+        void loadRemainingSteps(response.flowchart_id, run)
+      }
     } catch (error) {
       const messageText = error instanceof Error ? error.message : "Unable to reach the AI mentor."
       setFlowchartSteps([])
@@ -396,7 +433,8 @@ export default function App() {
                             <div className="flex items-center justify-between">
                               <p className="text-sm font-semibold text-mist">{activeStep.title}</p>
                               <p className="text-xs text-mist/60">
-                                Step {Math.min(currentStepIndex + 1, flowchartSteps.length)} of {flowchartSteps.length || "?"}
+                                Step {Math.min(currentStepIndex + 1, flowchartSteps.length)} of{" "}
+                                {loadingMoreSteps ? "?" : flowchartSteps.length || "?"}
                               </p>
                             </div>
                             <p className="text-sm text-mist/70">{activeStep.description}</p>
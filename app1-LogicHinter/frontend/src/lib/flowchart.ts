@@ -15,6 +15,16 @@ export interface FlowStep {
 export interface FlowchartResponse {
   steps: FlowStep[]
   warning?: string | null
+  flowchart_id?: string | null
+  complete?: boolean
+}
+
+export interface FlowchartStepResponse {
+  flowchart_id: string
+  index: number
+  step: FlowStep
+  total_steps?: number | null
+  complete: boolean
 }
 
 export interface StepLink {
@@ -34,11 +44,12 @@ export async function requestFlowchart(
   problem: string,
   approach: "naive" | "optimized",
   onStreamChunk?: (chunk: string) => void,
+  progressive = false,
 ): Promise<FlowchartResponse> {
   const response = await fetch(`${API_BASE}/api/flowchart`, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ problem, approach }),
+    body: JSON.stringify({ problem, approach, progressive }),
   })
 
   const reader = response.body?.getReader()
@@ -83,6 +94,28 @@ export async function requestFlowchart(
   }
 }
 
+// Resolves to null once the flowchart has no step n
+export async function requestFlowchartStep(flowchartId: string, n: number): Promise<FlowchartStepResponse | null> {
+  let response = await fetch(`${API_BASE}/api/flowchart/${flowchartId}/steps/${n}`)
+
+  // 504: the server stopped waiting before the step was generated
+  while (response.status === 504) {
+    response = await fetch(`${API_BASE}/api/flowchart/${flowchartId}/steps/${n}`)
+  }
+
+  if (response.status === 404) {
+    return null
+  }
+
+  if (!response.ok) {
+    const errorText = await response.text()
+    const detail = errorText ? `: ${errorText}` : ""
+    throw new Error(`Flowchart step request failed (${response.status})${detail}`)
+  }
+
+  return (await response.json()) as FlowchartStepResponse
+}
+
 export async function requestStepLinks(
   problem: string,
   stepTitle: string,
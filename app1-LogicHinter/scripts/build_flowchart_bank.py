@@ -0,0 +1,99 @@
+"""Pre-generate flowcharts for popular problems into the offline flowchart bank.
+
+Runs each title through the same prompt/parse/sanitize pipeline as
+/api/flowchart and writes `backend/data/flowchart_bank.jsonl` plus its `.idx`
+index. The API serves banked problems without calling Gemini; the JSON-lines
+file is meant to be reviewed (and hand-edited) before deploying.
+
+Usage examples:
+  python scripts/build_flowchart_bank.py
+  python scripts/build_flowchart_bank.py --titles my_titles.txt --approaches both --out backend/data/flowchart_bank.jsonl
+
+Requires GEMINI_API_KEY (or CASSETTE_MODE=replay with a recorded cassette).
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1] / "backend"
+
+POPULAR_TITLES = [
+    "Two Sum",
+    "Valid Parentheses",
+    "Merge Two Sorted Lists",
+    "Best Time to Buy and Sell Stock",
+    "Valid Anagram",
+    "Binary Search",
+    "Climbing Stairs",
+    "Maximum Subarray",
+    "Contains Duplicate",
+    "Reverse Linked List",
+    "Linked List Cycle",
+    "Invert Binary Tree",
+    "Maximum Depth of Binary Tree",
+    "Longest Substring Without Repeating Characters",
+    "Longest Palindromic Substring",
+    "Container With Most Water",
+    "3Sum",
+    "Group Anagrams",
+    "Product of Array Except Self",
+    "Top K Frequent Elements",
+    "Search in Rotated Sorted Array",
+    "Merge Intervals",
+    "Number of Islands",
+    "Course Schedule",
+    "Coin Change",
+    "Longest Increasing Subsequence",
+    "House Robber",
+    "Word Break",
+    "Kth Largest Element in an Array",
+    "LRU Cache",
+    "Trapping Rain Water",
+    "Median of Two Sorted Arrays",
+]
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="Build the offline flowchart bank")
+    p.add_argument("--titles", type=Path, help="File with one problem title per line (default: built-in list)")
+    p.add_argument("--approaches", default="naive,optimized,both", help="Comma list of approaches to bank")
+    p.add_argument("--out", type=Path, help="Bank path (default: settings.flowchart_bank_path)")
+    args = p.parse_args()
+
+    titles = POPULAR_TITLES
+    if args.titles:
+        titles = [line.strip() for line in args.titles.read_text().splitlines() if line.strip()]
+    approaches = [a.strip() for a in args.approaches.split(",") if a.strip()]
+    out = args.out.resolve() if args.out else None
+
+    # Settings read .env and the default bank path relative to backend/
+    os.chdir(BACKEND)
+    sys.path.insert(0, str(BACKEND))
+    from app.core.bank import write_bank
+    from app.core.config import settings
+    from app.routers.guidance import generate_flowchart
+
+    entries = []
+    failures = 0
+    for title in titles:
+        for approach in approaches:
+            try:
+                steps = generate_flowchart(title, approach)
+            except Exception as e:
+                failures += 1
+                print(f"  ✗ {title} [{approach}]: {e}", file=sys.stderr)
+                continue
+            entries.append((title, approach, [step.dict() for step in steps]))
+            print(f"  ✓ {title} [{approach}] ({len(steps)} steps)", file=sys.stderr)
+
+    path = str(out or settings.flowchart_bank_path)
+    written = write_bank(path, entries)
+    print(f"Wrote {written} flowcharts to {path} ({failures} failed)")
+    return 1 if failures and not written else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,140 @@
+"""
+Response compression with gzip and, when the `brotli` package is installed,
+brotli. Responses below a size threshold, already-encoded responses, event
+streams and excluded routes are sent as-is. A strong ETag from an inner
+middleware is weakened (`W/"..."`) on compressed responses, since the bytes on
+the wire differ while the content is the same.
+"""
+from __future__ import annotations
+
+import gzip
+from typing import Iterable, Optional
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+_SKIP_STATUSES = {204, 206, 304}
+
+
+def choose_encoding(accept_encoding: str, brotli_available: bool = brotli is not None) -> Optional[str]:
+    """Pick "br" or "gzip" from an Accept-Encoding header (q=0 disables a coding)"""
+    offered = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        offered[coding.strip()] = quality
+
+    if brotli_available and offered.get("br", 0) > 0:
+        return "br"
+    if offered.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 5) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing buffered responses.
+
+    Args:
+        app: The ASGI app
+        minimum_size: Smallest body (bytes) worth compressing
+        gzip_level: gzip compresslevel (1-9)
+        brotli_quality: brotli quality (0-11)
+        exclude_paths: Route templates or path prefixes never compressed (eg. streams)
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+        exclude_paths: Iterable[str] = (),
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.exclude_paths = tuple(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+
+        accept = dict(scope["headers"]).get(b"accept-encoding", b"").decode("latin-1")
+        encoding = choose_encoding(accept)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[dict] = None
+        chunks = []
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = dict(message.get("headers", []))
+                route_path = getattr(scope.get("route"), "path", None)
+                if (
+                    message["status"] in _SKIP_STATUSES
+                    or b"content-encoding" in headers
+                    or headers.get(b"content-type", b"").startswith(b"text/event-stream")
+                    or (route_path is not None and route_path in self.exclude_paths)
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            await self._send_buffered(start_message, b"".join(chunks), encoding, send)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _send_buffered(self, start_message: dict, body: bytes, encoding: str, send) -> None:
+        headers = list(start_message.get("headers", []))
+        vary = [(b"vary", b"Accept-Encoding")]
+
+        if len(body) < self.minimum_size:
+            await send({**start_message, "headers": headers + vary})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        compressed = compress(body, encoding, self.gzip_level, self.brotli_quality)
+        rewritten = []
+        for name, value in headers:
+            if name == b"content-length":
+                continue
+            if name == b"etag" and not value.startswith(b"W/"):
+                value = b"W/" + value
+            rewritten.append((name, value))
+        rewritten += vary + [
+            (b"content-encoding", encoding.encode()),
+            (b"content-length", str(len(compressed)).encode()),
+        ]
+
+        await send({**start_message, "headers": rewritten})
+        await send({"type": "http.response.body", "body": compressed})
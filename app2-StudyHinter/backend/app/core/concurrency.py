@@ -0,0 +1,26 @@
+"""
+Fan request work out over a thread pool without losing the request context.
+Deadlines, Server-Timing spans and request-log fields live in contextvars, so
+each task runs in a copy of the submitting request's context and keeps
+counting against the same budget and showing up in the same log line.
+Upstream concurrency is capped separately by the LLM client's limiter.
+"""
+from __future__ import annotations
+
+import contextvars
+from concurrent.futures import Executor
+from typing import Callable, Iterable, List, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def map_in_context(pool: Executor, fn: Callable[[T], R], items: Iterable[T]) -> List[R]:
+    """
+    Run `fn` over `items` on `pool`, in order, each in a copy of the current context.
+
+    Raises:
+        Whatever `fn` raised first (in item order); callers usually catch per item inside `fn`
+    """
+    futures = [pool.submit(contextvars.copy_context().run, fn, item) for item in items]
+    return [future.result() for future in futures]
@@ -1,6 +1,7 @@
 import os
 from pydantic_settings import BaseSettings
 from pydantic import Field
+from typing import Literal
 
 
 class Settings(BaseSettings):
@@ -12,6 +13,114 @@ class Settings(BaseSettings):
     # Unsplash API key for fetching images
     unsplash_access_key: str | None = Field(default=None, alias="UNSPLASH_ACCESS_KEY")
 
+    # Point both at Skeleton/scripts/fake_upstream.py for local benchmarks
+    gemini_base_url: str = "https://generativelanguage.googleapis.com"
+    unsplash_base_url: str = "https://api.unsplash.com"
+
+    # Optional providers for gemini_client.complete(provider=...)
+    anthropic_api_key: str | None = Field(default=None, alias="ANTHROPIC_API_KEY")
+    openrouter_key: str | None = Field(default=None, alias="OPENROUTER_KEY")
+    # Keep-alive connections per upstream host in the shared HTTP session
+    upstream_pool_size: int = 16
+    # Upstream calls in flight at once (LLM and image search); extra calls wait
+    # for a slot within their request budget
+    upstream_max_concurrency: int = 16
+    # USD per million (input, output) tokens, for the llm_cost_usd_total estimate;
+    # models missing here have their tokens counted but no cost
+    model_prices: dict[str, tuple[float, float]] = {
+        "gemini-2.0-flash": (0.10, 0.40),
+        "gemini-2.0-flash-lite": (0.075, 0.30),
+    }
+    # Model per LLM task (a name from gemini_client.TASKS): short, low-stakes
+    # sub-tasks run on flash-lite; tasks missing here use gemini-2.0-flash
+    task_models: dict[str, str] = {
+        "search_term_prompt": "gemini-2.0-flash-lite",
+        "search_terms_prompt": "gemini-2.0-flash-lite",
+        "links_prompt": "gemini-2.0-flash-lite",
+        "example_questions_prompt": "gemini-2.0-flash-lite",
+    }
+
+    # Prompt templates sent to the model: "full", or "compact" (fewer input tokens).
+    # Compact is NOT validated against real model output yet: record a corpus and
+    # pass Skeleton/scripts/prompteval.py before switching
+    prompt_variant: Literal["full", "compact"] = "full"
+
+    # Request time budgets (seconds); upstream timeouts are derived from these
+    request_budget_seconds: float = 25.0
+    route_budgets: dict[str, float] = {
+        "/api/flowchart": 27.0,
+        "/api/diagram": 8.0,
+        "/api/example-questions": 10.0,
+        "/api/flowchart/batch": 90.0,
+    }
+
+    # Stale-while-revalidate windows per cached route: (fresh seconds, stale seconds)
+    cache_windows: dict[str, tuple[float, float]] = {
+        "/api/flowchart": (3600.0, 86400.0),
+        "/api/example-questions": (300.0, 3600.0),
+    }
+    cache_max_entries: int = 512
+
+    # Pre-generated flowcharts for popular problems, served before calling Gemini
+    flowchart_bank_path: str | None = "data/flowchart_bank.jsonl"
+
+    # POST /api/flowchart/batch: problems per request, and how many are generated at once
+    flowchart_batch_max_items: int = 30
+    flowchart_batch_workers: int = 6
+
+    # Background jobs (POST /api/flowchart/jobs, GET /api/jobs/{id}): generations
+    # run off the request path with their own budget; results are kept for the TTL
+    job_workers: int = 4
+    job_max_pending: int = 32
+    job_budget_seconds: float = 120.0
+    job_ttl_seconds: float = 900.0
+
+    # Generated flowcharts are kept for reloads and sharing (GET /api/flowchart/{id})
+    flowchart_store_path: str | None = "data/flowcharts.sqlite3"
+    flowchart_retention_days: float = 30.0
+    flowchart_store_max_rows: int = 50000
+
+    # ETag/If-None-Match on GET routes, with a Cache-Control policy per route template
+    conditional_get_enabled: bool = True
+    cache_control_policies: dict[str, str] = {
+        "/api/diagram": "public, max-age=86400, stale-while-revalidate=604800",
+        "/api/example-questions": "public, max-age=60, stale-while-revalidate=300",
+    }
+
+    # gzip/brotli response compression (brotli only if the package is installed)
+    compression_enabled: bool = True
+    compression_minimum_size: int = 1024
+    gzip_level: int = 6
+    brotli_quality: int = 5
+    compression_exclude_paths: list[str] = []
+
+    # Structured JSON logs on stdout; routine requests are sampled, errors,
+    # slow requests and fallbacks are always logged
+    log_level: str = "INFO"
+    request_logging_enabled: bool = True
+    request_log_sample_rate: float = 1.0
+    request_log_slow_ms: float = 2000.0
+
+    # Warm up on startup (connections, schemas, banks) before /ready reports ready;
+    # the prompt costs a few tokens per deploy
+    warmup_enabled: bool = True
+    warmup_prompt_enabled: bool = False
+
+    # Expose Prometheus-style metrics at /metrics
+    metrics_enabled: bool = True
+
+    # Server-Timing header per request; debug also returns timings in metadata
+    server_timing_enabled: bool = True
+    server_timing_debug: bool = False
+
+    # Upstream cassette: "off", "record" real responses, or "replay" them offline
+    cassette_mode: Literal["off", "record", "replay"] = "off"
+    cassette_path: str = "cassettes/upstream.jsonl"
+
+    # Admin-gated sampling profiler (/admin/profile); off unless enabled with a token
+    profiling_enabled: bool = False
+    admin_token: str | None = None
+
     class Config:
         # Looks for .env in backend/ by default
         env_file = os.environ.get("ENV_FILE", ".env")
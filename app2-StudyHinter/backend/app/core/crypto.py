@@ -1,19 +1,28 @@
 from __future__ import annotations
 
 import os
-from typing import Optional
+from typing import Any, Optional
+
+# `cryptography` and `keyring` are only needed by the key tooling, so they are
+# imported on first use rather than whenever this module is loaded.
+
+
+def _fernet_class() -> Any:
+    try:
+        from cryptography.fernet import Fernet
+    except ImportError:  # pragma: no cover - handled at runtime
+        raise RuntimeError(
+            "cryptography is required for key encryption. Install with `pip install cryptography`."
+        )
+    return Fernet
 
-try:
-    from cryptography.fernet import Fernet
-except Exception as e:  # pragma: no cover - handled at runtime
-    raise RuntimeError(
-        "cryptography is required for key encryption. Install with `pip install cryptography`."
-    )
 
-try:
-    import keyring
-except Exception:  # keyring is optional; we'll only use if available
-    keyring = None
+def _keyring() -> Optional[Any]:
+    try:
+        import keyring
+    except Exception:  # keyring is optional; we'll only use if available
+        return None
+    return keyring
 
 
 def generate_master_key() -> str:
@@ -22,17 +31,17 @@ def generate_master_key() -> str:
     Store this key in `MASTER_KEY` env var or in OS keyring under service
     name `LogicHinter` and username `MASTER_KEY`.
     """
-    return Fernet.generate_key().decode()
+    return _fernet_class().generate_key().decode()
 
 
 def encrypt(plaintext: str, master_key: str) -> str:
-    f = Fernet(master_key.encode())
+    f = _fernet_class()(master_key.encode())
     token = f.encrypt(plaintext.encode())
     return token.decode()
 
 
 def decrypt(token: str, master_key: str) -> str:
-    f = Fernet(master_key.encode())
+    f = _fernet_class()(master_key.encode())
     return f.decrypt(token.encode()).decode()
 
 
@@ -45,6 +54,7 @@ def get_master_key() -> str:
     if mk:
         return mk
 
+    keyring = _keyring()
     if keyring is not None:
         stored = keyring.get_password("LogicHinter", "MASTER_KEY")
         if stored:
@@ -57,6 +67,7 @@ def get_master_key() -> str:
 
 
 def store_master_key_in_keyring(master_key: str) -> None:
+    keyring = _keyring()
     if keyring is None:
         raise RuntimeError("`keyring` package is not available; install it to use OS keyring storage")
     keyring.set_password("LogicHinter", "MASTER_KEY", master_key)
\ No newline at end of file
@@ -0,0 +1,117 @@
+"""
+Startup warm-up and readiness for skeleton apps.
+A lifespan hook runs warm-up tasks (pooled upstream connections, OpenAPI and
+validator schemas, flowchart banks and stores, optionally a tiny prompt) on a
+background thread once the server starts. `/ready` answers 503 until they have
+finished, so the platform only routes traffic to warm instances, while `/`
+stays a plain liveness check. A failed task is reported but doesn't keep the
+instance out of rotation, since every route has a fallback.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from .logs import log_event
+
+Tasks = Dict[str, Callable[[], Any]]
+
+
+class Readiness:
+    """Warm-up progress shared by the lifespan hook and /ready"""
+
+    def __init__(self):
+        self.ready = False
+        self.checks: Dict[str, str] = {}
+        self.warm_seconds: Optional[float] = None
+
+
+def warmup_tasks(
+    app: FastAPI,
+    connect: Optional[Callable[[], Any]] = None,
+    banks: Iterable[Any] = (),
+    stores: Iterable[Any] = (),
+    prompt: Optional[Callable[[], Any]] = None,
+) -> Tasks:
+    """
+    The standard warm-up tasks for an app.
+
+    Args:
+        app: The FastAPI app (its OpenAPI schema is built up front)
+        connect: Opens pooled upstream connections
+        banks: Flowchart banks to page in (None entries are skipped)
+        stores: Flowchart stores to open (None entries are skipped)
+        prompt: Sends a tiny prompt upstream
+    """
+    tasks: Tasks = {"schemas": app.openapi}
+    if connect is not None:
+        tasks["upstream_connections"] = connect
+    for n, bank in enumerate(b for b in banks if b is not None):
+        tasks[f"flowchart_bank_{n}"] = bank.preload
+    for n, store in enumerate(s for s in stores if s is not None):
+        tasks[f"flowchart_store_{n}"] = store.open
+    if prompt is not None:
+        tasks["warmup_prompt"] = prompt
+    return tasks
+
+
+def run_warmup(state: Readiness, tasks: Tasks) -> None:
+    """Run every task once, recording how each went, then mark the app ready"""
+    start = time.perf_counter()
+    for name, task in tasks.items():
+        task_start = time.perf_counter()
+        try:
+            task()
+            state.checks[name] = f"ok ({(time.perf_counter() - task_start) * 1000:.0f} ms)"
+        except Exception as e:
+            state.checks[name] = f"failed: {type(e).__name__}"
+            log_event("warmup_failed", logging.WARNING, task=name, error=str(e))
+
+    state.warm_seconds = round(time.perf_counter() - start, 3)
+    state.ready = True
+    log_event("warmup_complete", seconds=state.warm_seconds, checks=state.checks)
+
+
+def warmup_lifespan(state: Readiness, tasks: Callable[[FastAPI], Tasks], enabled: bool = True):
+    """
+    Lifespan hook starting the warm-up in the background.
+
+    Args:
+        state: Readiness reported by /ready
+        tasks: Builds the warm-up tasks for the app
+        enabled: When False the app is ready immediately
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        if enabled:
+            threading.Thread(target=run_warmup, args=(state, tasks(app)), name="warmup", daemon=True).start()
+        else:
+            state.ready = True
+        yield
+
+    return lifespan
+
+
+def mount_readiness(app: FastAPI, state: Readiness, path: str = "/ready") -> None:
+    """Add the readiness endpoint (200 once warm, 503 before)"""
+
+    async def ready_endpoint() -> JSONResponse:
+        body = {
+            "status": "ready" if state.ready else "warming",
+            "warm_seconds": state.warm_seconds,
+            "checks": state.checks,
+        }
+        return JSONResponse(
+            body,
+            status_code=200 if state.ready else 503,
+            headers={"Cache-Control": "no-store"},
+        )
+
+    app.add_api_route(path, ready_endpoint, methods=["GET"], include_in_schema=False)
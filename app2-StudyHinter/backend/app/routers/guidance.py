@@ -13,15 +13,28 @@ from __future__ import annotations
 import json
 import random
 import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Header, HTTPException, Response
 from pydantic import BaseModel, Field, HttpUrl
 
+from ..core import deadline, jsonfast
+from ..core.bank import open_bank
+from ..core.cache import cache_for_route
+from ..core.cassette import recorded
+from ..core.concurrency import map_in_context
 from ..core.config import settings
-from ..core.gemini_client import complete as gemini_complete
+from ..core.gemini_client import complete as gemini_complete, extract_text_response, http_session, llm_configured, upstream_slot
+from ..core.jobs import JobAccepted, JobQueue, JobQueueFull, jobs_router
+from ..core.metrics import record_cache_lookup, record_fallback, record_json_parse_failure, track_upstream
+from ..core.prompts import PromptRegistry
+from ..core.store import open_store, stored_flowchart_response
+from ..core.timing import debug_enabled, debug_metadata, span
 
 router = APIRouter(prefix="/api", tags=["skeleton"])
+prompts = PromptRegistry(settings.prompt_variant)
 
 # ================================================================
 #                 SECTION 1 — CHANGE THESE
@@ -47,18 +60,9 @@ Respond in short bullet points.
 """
 
 
-def flowchart_prompt(problem: str, difficulty: str = "below_grade_6") -> str:
-    # Set age range and complexity based on difficulty
-    if difficulty == "below_grade_6":
-        age_range = "6-11 years old (grades 1-5)"
-        complexity_level = "simple, concrete concepts with everyday examples"
-        vocabulary_level = "basic vocabulary, short sentences, and familiar concepts"
-    else:  # above_grade_6
-        age_range = "12-16 years old (grades 6-10)"
-        complexity_level = "more advanced concepts with abstract thinking"
-        vocabulary_level = "intermediate vocabulary and more complex explanations"
-    
-    return f"""
+# Flowchart prompt templates: fill-ins in {braces}, literal braces doubled.
+# The compact variant is sent when PROMPT_VARIANT=compact.
+FLOWCHART_PROMPT = """
 You are StudyHinter — an AI that creates **logical, educational quiz questions** for children.
 
 TARGET AUDIENCE: {age_range}
@@ -136,6 +140,56 @@ TOPIC: {problem}
 REMEMBER: Every option must be a LOGICAL answer to the question. No random scenes or activities!
 """
 
+FLOWCHART_PROMPT_COMPACT = """
+You are StudyHinter. Write a multiple-choice quiz that teaches a topic step by step.
+Audience: {age_range}. Use {complexity_level} and {vocabulary_level}.
+
+Rules:
+- 4 to 7 steps; each step asks one question directly about the topic.
+- Each step has 4 options (A-D), all plausible answers to its question; exactly one is "correct": true and scientifically accurate.
+- Wrong options are common misconceptions or related but incorrect ideas, never random scenes, activities or objects.
+- Labels are complete, natural sentences a child would say (eg. "helps you breathe fresh air").
+- Each reason says why the option is right or wrong.
+
+Return JSON only:
+{{"steps":[{{"id":"step-1","title":"Question about the topic","description":"What is being asked","options":[{{"id":"A","label":"...","reason":"...","correct":true}},{{"id":"B","label":"...","reason":"...","correct":false}}]}}]}}
+
+TOPIC: {problem}
+"""
+
+prompts.register(
+    "flowchart_prompt",
+    FLOWCHART_PROMPT,
+    FLOWCHART_PROMPT_COMPACT,
+    example={
+        "problem": "How do plants make food?",
+        "age_range": "6-11 years old (grades 1-5)",
+        "complexity_level": "simple, concrete concepts with everyday examples",
+        "vocabulary_level": "basic vocabulary, short sentences, and familiar concepts",
+    },
+)
+
+
+def flowchart_prompt(problem: str, difficulty: str = "below_grade_6", variant: str | None = None) -> str:
+    # Set age range and complexity based on difficulty
+    if difficulty == "below_grade_6":
+        age_range = "6-11 years old (grades 1-5)"
+        complexity_level = "simple, concrete concepts with everyday examples"
+        vocabulary_level = "basic vocabulary, short sentences, and familiar concepts"
+    else:  # above_grade_6
+        age_range = "12-16 years old (grades 6-10)"
+        complexity_level = "more advanced concepts with abstract thinking"
+        vocabulary_level = "intermediate vocabulary and more complex explanations"
+    
+    return prompts.render(
+        "flowchart_prompt",
+        variant,
+        problem=problem,
+        age_range=age_range,
+        complexity_level=complexity_level,
+        vocabulary_level=vocabulary_level,
+    )
+
 
 
 
@@ -194,6 +248,26 @@ class FlowchartRequest(BaseModel):
 class FlowchartResponse(BaseModel):
     steps: list[FlowStep]
     warning: Optional[str] = None
+    metadata: Optional[Dict[str, Any]] = None
+    flowchart_id: Optional[str] = None
+
+
+class FlowchartBatchRequest(BaseModel):
+    problems: list[str] = Field(..., min_length=1)
+    difficulty: str = "below_grade_6"
+
+
+class FlowchartBatchItem(BaseModel):
+    problem: str
+    steps: list[FlowStep]
+    warning: Optional[str] = None
+    metadata: Optional[Dict[str, Any]] = None
+    flowchart_id: Optional[str] = None
+
+
+class FlowchartBatchResponse(BaseModel):
+    items: list[FlowchartBatchItem]
+    warning: Optional[str] = None
 
 
 class StepLink(BaseModel):
@@ -222,7 +296,11 @@ def clean_json(text: str) -> dict:
     match = re.search(r"\{.*\}", cleaned, flags=re.DOTALL)
     if match:
         cleaned = match.group(0)
-    return json.loads(cleaned)
+    try:
+        return jsonfast.loads(cleaned)
+    except json.JSONDecodeError:
+        record_json_parse_failure("clean_json")
+        raise
 
 
 def shuffle_options(step: FlowStep) -> FlowStep:
@@ -230,16 +308,43 @@ def shuffle_options(step: FlowStep) -> FlowStep:
     random.shuffle(options)
     return FlowStep(**{**step.dict(), "options": options})
 
+
+def shuffle_steps(steps: list[FlowStep]) -> list[FlowStep]:
+    # Shuffled per response: cached and stored flowcharts keep the model's
+    # order, so each request sees its own option order
+    with span("shuffle"):
+        return [shuffle_options(step) for step in steps]
+
+
+def normalize_problem(problem: str) -> str:
+    return " ".join(problem.lower().split())
+
+
+flowchart_cache = cache_for_route("/api/flowchart", settings.cache_windows, settings.cache_max_entries)
+flowchart_bank = open_bank(settings.flowchart_bank_path)
+flowchart_store = open_store(
+    settings.flowchart_store_path, settings.flowchart_retention_days, settings.flowchart_store_max_rows
+)
+batch_pool = ThreadPoolExecutor(max_workers=settings.flowchart_batch_workers, thread_name_prefix="flowchart-batch")
+flowchart_jobs = JobQueue(
+    workers=settings.job_workers,
+    max_pending=settings.job_max_pending,
+    ttl_seconds=settings.job_ttl_seconds,
+    budget_seconds=settings.job_budget_seconds,
+)
+router.include_router(jobs_router(flowchart_jobs))
+
 #routes
 @router.post("/mentor", response_model=MentorResponse)
 def mentor(request: MentorRequest) -> MentorResponse:
-    if not settings.gemini_api_key:
+    if not llm_configured():
         return MentorResponse(output=[], images=[], warning="Missing Gemini key")
 
     try:
         prompt = mentor_prompt(request.query)
-        resp = gemini_complete(prompt)
-        text = resp["candidates"][0]["content"]["parts"][0]["text"]
+        with span("gemini"):
+            resp = gemini_complete(prompt, task="mentor_prompt")
+        text = extract_text_response(resp)
         lines = [line.strip() for line in text.split("\n") if line.strip()]
 
         # image fetching
@@ -252,60 +357,259 @@ def mentor(request: MentorRequest) -> MentorResponse:
 
 
 
+def generate_flowchart_steps(problem: str, difficulty: str) -> list[FlowStep]:
+    with span("prompt"):
+        prompt = flowchart_prompt(problem, difficulty)
+    with span("gemini"):
+        resp = gemini_complete(prompt, task="flowchart_prompt")
+    with span("parse"):
+        raw = clean_json(extract_text_response(resp))
+    return [FlowStep(**s) for s in raw["steps"]]
+
+
+def attach_images(flowcharts: list[list[FlowStep]]) -> tuple[list[list[FlowStep]], list[str | None]]:
+    """
+    Add an Unsplash image to every option of every flowchart.
+    Search terms for all options are generated together (a few Gemini calls in
+    total instead of one per option) and each distinct term is fetched once, in
+    parallel. Options left when the time budget runs out get no image.
+
+    Returns:
+        (the flowcharts with images, a warning per flowchart)
+    """
+    options = [(step, opt) for steps in flowcharts for step in steps for opt in step.options]
+    images: dict[str, str | None] = {}
+    terms: list[str | None] = [None] * len(options)
+
+    if options and not deadline.expired():
+        with span("search_terms"):
+            terms = generate_image_search_terms([(opt.label, step.title) for step, opt in options])
+        distinct = list(dict.fromkeys(terms))
+        with span("unsplash"):
+            fetched = map_in_context(batch_pool, fetch_unsplash_image_in_budget, distinct)
+        images = {term: img for term, (img, done) in zip(distinct, fetched) if done}
+
+    enriched = []
+    warnings = []
+    terms_left = iter(terms)
+    for steps in flowcharts:
+        warning = None
+        enriched_steps = []
+        for step in steps:
+            enriched_options = []
+            for opt in step.options:
+                term = next(terms_left)
+                if term not in images:
+                    # Out of time budget: return the steps without images
+                    warning = "Time budget reached. Some images were skipped."
+                enriched_options.append(FlowOption(**{**opt.dict(), "image_url": images.get(term)}))
+            enriched_steps.append(FlowStep(**{**step.dict(), "options": enriched_options}))
+        if warning:
+            record_fallback("/api/flowchart", "images_skipped")
+        enriched.append(enriched_steps)
+        warnings.append(warning)
+    return enriched, warnings
+
+
+def finish_flowcharts(flowcharts: list[list[FlowStep]]) -> list[FlowchartResponse]:
+    flowcharts, warnings = attach_images(flowcharts)
+    return [
+        FlowchartResponse(steps=steps, warning=warning)
+        for steps, warning in zip(flowcharts, warnings)
+    ]
+
+
+def build_flowchart(problem: str, difficulty: str) -> FlowchartResponse:
+    return finish_flowcharts([generate_flowchart_steps(problem, difficulty)])[0]
+
+
+def store_flowchart(steps: list[FlowStep]) -> str | None:
+    if flowchart_store is None or not steps:
+        return None
+    try:
+        with span("store"):
+            return flowchart_store.save([step.dict() for step in steps])
+    except sqlite3.Error:
+        return None
+
+
+def banked_flowchart(problem: str, difficulty: str) -> list[FlowStep] | None:
+    if flowchart_bank is None:
+        return None
+
+    banked = flowchart_bank.get(problem, difficulty)
+    record_cache_lookup("flowchart_bank", "miss" if banked is None else "hit")
+    if banked is None:
+        return None
+    return [FlowStep(**step) for step in banked]
+
+
 @router.post("/flowchart", response_model=FlowchartResponse)
 def flowchart(request: FlowchartRequest) -> FlowchartResponse:
-    if not settings.gemini_api_key:
+    # Popular topics are pre-generated offline (scripts/build_flowchart_bank.py)
+    banked = banked_flowchart(request.problem, request.difficulty)
+    if banked is not None:
+        # Stored as banked, so every hit maps to the same content id
+        return FlowchartResponse(
+            steps=shuffle_steps(banked),
+            flowchart_id=store_flowchart(banked),
+            metadata=debug_metadata({"cache": "bank"}),
+        )
+
+    if not llm_configured():
+        record_fallback("/api/flowchart", "empty_steps")
         return FlowchartResponse(steps=[], warning="Missing Gemini key")
 
     try:
-        resp = gemini_complete(flowchart_prompt(request.problem, request.difficulty))
-        raw = clean_json(resp["candidates"][0]["content"]["parts"][0]["text"])
-        steps = []
+        # Partial flowcharts (images skipped on budget) are served but never cached
+        result, cache_status = flowchart_cache.get_or_load(
+            (normalize_problem(request.problem), request.difficulty),
+            lambda: build_flowchart(request.problem, request.difficulty),
+            cacheable=lambda result: result.warning is None,
+        )
+        return FlowchartResponse(
+            steps=shuffle_steps(result.steps),
+            warning=result.warning,
+            metadata=debug_metadata({"cache": cache_status}),
+            flowchart_id=store_flowchart(result.steps),
+        )
 
-        for s in raw["steps"]:
-            step = FlowStep(**s)
-            enriched_options = []
+    except Exception as e:
+        record_fallback("/api/flowchart", "empty_steps")
+        return FlowchartResponse(steps=[], warning=str(e))
 
-            for opt in step.options:
-                # Generate better image search terms from the label
-                image_search_term = generate_image_search_term(opt.label, step.title)
-                img = fetch_unsplash_image(image_search_term)
 
-                opt_data = opt.dict()
-                opt_data["image_url"] = img
-                enriched_options.append(FlowOption(**opt_data))
+def check_batch_size(request: FlowchartBatchRequest) -> None:
+    if len(request.problems) > settings.flowchart_batch_max_items:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {settings.flowchart_batch_max_items} problems per batch",
+        )
 
 
+@router.post("/flowchart/batch", response_model=FlowchartBatchResponse)
+def flowchart_batch(request: FlowchartBatchRequest) -> FlowchartBatchResponse:
+    check_batch_size(request)
+
+    difficulty = request.difficulty
+    results: dict[str, FlowchartResponse] = {}
+    statuses: dict[str, str] = {}
+    pending: list[str] = []
+
+    for problem in dict.fromkeys(request.problems):
+        banked = banked_flowchart(problem, difficulty)
+        if banked is not None:
+            results[problem], statuses[problem] = FlowchartResponse(steps=banked), "bank"
+            continue
+        cached, status = flowchart_cache.lookup(
+            (normalize_problem(problem), difficulty),
+            lambda problem=problem: build_flowchart(problem, difficulty),
+            cacheable=lambda result: result.warning is None,
+        )
+        if cached is not None:
+            results[problem], statuses[problem] = cached, status
+        else:
+            pending.append(problem)
+
+    if pending and not llm_configured():
+        for problem in pending:
+            record_fallback("/api/flowchart", "empty_steps")
+            results[problem], statuses[problem] = FlowchartResponse(steps=[], warning="Missing Gemini key"), "miss"
+    elif pending:
+        # Steps for every missing flowchart are generated in parallel, then the
+        # images for all of them in one pass (batched search terms, deduped searches)
+        def generate(problem: str) -> tuple[list[FlowStep] | None, str | None]:
+            try:
+                return generate_flowchart_steps(problem, difficulty), None
+            except Exception as e:
+                return None, str(e)
+
+        generated = dict(zip(pending, map_in_context(batch_pool, generate, pending)))
+        ok = [problem for problem in pending if generated[problem][0] is not None]
+        for problem, result in zip(ok, finish_flowcharts([generated[problem][0] for problem in ok])):
+            # Partial flowcharts (images skipped on budget) are served but never cached
+            if result.warning is None:
+                flowchart_cache.set((normalize_problem(problem), difficulty), result)
+            results[problem], statuses[problem] = result, "miss"
+
+        for problem in pending:
+            error = generated[problem][1]
+            if error is None:
+                continue
+            stale, _ = flowchart_cache.get((normalize_problem(problem), difficulty))
+            if stale is not None:
+                results[problem], statuses[problem] = stale, "stale-if-error"
+            else:
+                record_fallback("/api/flowchart", "empty_steps")
+                results[problem], statuses[problem] = FlowchartResponse(steps=[], warning=error), "miss"
+
+    built = {
+        problem: FlowchartBatchItem(
+            problem=problem,
+            steps=shuffle_steps(result.steps),
+            warning=result.warning,
+            metadata=debug_metadata({"cache": statuses[problem]}),
+            flowchart_id=store_flowchart(result.steps),
+        )
+        for problem, result in results.items()
+    }
+    items = [built[problem] for problem in request.problems]
 
-            steps.append(
-                FlowStep(
-                    id=step.id,
-                    title=step.title,
-                    description=step.description,
-                    options=enriched_options
-                )
-            )
+    failed = sum(1 for item in items if not item.steps)
+    warning = f"{failed} of {len(items)} flowcharts could not be generated." if failed else None
+    return FlowchartBatchResponse(items=items, warning=warning)
 
-        # Shuffle options to randomize correct answer position
-        steps = [shuffle_options(s) for s in steps]
-        return FlowchartResponse(steps=steps)
 
-    except Exception as e:
-        return FlowchartResponse(steps=[], warning=str(e))
+def submit_job(kind: str, fn) -> JobAccepted:
+    try:
+        job = flowchart_jobs.submit(kind, fn)
+    except JobQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many quizzes are being generated, try again shortly",
+            headers={"Retry-After": "5"},
+        )
+    return JobAccepted(job_id=job.id, status=job.status)
+
+
+# Same work as the routes above, run in the background: poll GET /api/jobs/{job_id}
+# (or listen on /api/jobs/{job_id}/events) for the response
+@router.post("/flowchart/jobs", response_model=JobAccepted, status_code=202)
+def flowchart_job(request: FlowchartRequest) -> JobAccepted:
+    return submit_job("flowchart", lambda: flowchart(request))
+
+
+@router.post("/flowchart/batch/jobs", response_model=JobAccepted, status_code=202)
+def flowchart_batch_job(request: FlowchartBatchRequest) -> JobAccepted:
+    check_batch_size(request)
+    return submit_job("flowchart_batch", lambda: flowchart_batch(request))
+
+
+@router.get("/flowchart/{flowchart_id}", response_model=FlowchartResponse)
+def stored_flowchart(flowchart_id: str, if_none_match: Optional[str] = Header(None)):
+    response = stored_flowchart_response(flowchart_store, flowchart_id, if_none_match)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired flowchart id")
+    return response
 
 
 @router.post("/step-links", response_model=StepLinkResponse)
 def step_links(request: StepLinkRequest) -> StepLinkResponse:
-    if not settings.gemini_api_key:
+    if not llm_configured():
+        record_fallback("/api/step-links", "empty_links")
         return StepLinkResponse(links=[], warning="Missing Gemini key")
 
     try:
-        p = links_prompt(request.problem, request.step_title, request.step_description)
-        resp = gemini_complete(p)
-        raw = clean_json(resp["candidates"][0]["content"]["parts"][0]["text"])
+        with span("prompt"):
+            p = links_prompt(request.problem, request.step_title, request.step_description)
+        with span("gemini"):
+            resp = gemini_complete(p, task="links_prompt")
+        with span("parse"):
+            raw = clean_json(extract_text_response(resp))
         links = [StepLink(**l) for l in raw.get("links", [])]
         return StepLinkResponse(links=links)
     except Exception as e:
+        record_fallback("/api/step-links", "empty_links")
         return StepLinkResponse(links=[], warning=str(e))
 
 # ===========================================================================================================
@@ -313,21 +617,8 @@ def step_links(request: StepLinkRequest) -> StepLinkResponse:
 # ===========================================================================================================
 
 
-import requests
-
-def generate_image_search_term(label: str, question_title: str) -> str:
-    """
-    Use Gemini AI to extract the most important 2-3 visual concepts from answer labels.
-    This ensures we get the most relevant and photographable concepts.
-    """
-    if not settings.gemini_api_key:
-        # Fallback to simple word extraction if no Gemini key
-        words = label.lower().split()
-        important_words = [w for w in words if w not in ['the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'your', 'you', 'helps', 'makes', 'gives', 'it', 'is', 'as']]
-        return ' '.join(important_words[:3]) if important_words else label
-    
-    try:
-        prompt = f"""
+def search_term_prompt(label: str, question_title: str) -> str:
+    return f"""
 You are an expert at extracting visual concepts for image search.
 
 Given this quiz answer option: "{label}"
@@ -351,9 +642,22 @@ Examples:
 Answer option: "{label}"
 Extract 2-3 key visual search terms:
 """
-        
-        resp = gemini_complete(prompt)
-        result = resp["candidates"][0]["content"]["parts"][0]["text"].strip()
+
+
+def generate_image_search_term(label: str, question_title: str) -> str:
+    """
+    Use Gemini AI to extract the most important 2-3 visual concepts from answer labels.
+    This ensures we get the most relevant and photographable concepts.
+    """
+    if not llm_configured():
+        # Fallback to simple word extraction if no Gemini key
+        words = label.lower().split()
+        important_words = [w for w in words if w not in ['the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'your', 'you', 'helps', 'makes', 'gives', 'it', 'is', 'as']]
+        return ' '.join(important_words[:3]) if important_words else label
+    
+    try:
+        resp = gemini_complete(search_term_prompt(label, question_title), task="search_term_prompt")
+        result = extract_text_response(resp).strip()
         
         # Clean up the result - remove quotes, extra punctuation
         result = result.replace('"', '').replace("'", '').replace('.', '').replace(',', '').strip()
@@ -366,14 +670,80 @@ Extract 2-3 key visual search terms:
             
     except Exception as e:
         # Fallback to simple extraction if Gemini fails
-        import re
-        words = re.findall(r'\b[a-zA-Z]+\b', label.lower())
-        important_words = [w for w in words if w not in ['it', 'is', 'as', 'a', 'an', 'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'your', 'you', 'helps', 'makes', 'gives', 'starts', 'becomes', 'turns', 'gets'] and len(w) > 2]
-        return ' '.join(important_words[:3]) if important_words else label
+        record_fallback("/api/flowchart", "heuristic_search_term")
+        return heuristic_search_term(label)
+
+
+def heuristic_search_term(label: str) -> str:
+    words = re.findall(r'\b[a-zA-Z]+\b', label.lower())
+    important_words = [w for w in words if w not in ['it', 'is', 'as', 'a', 'an', 'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'your', 'you', 'helps', 'makes', 'gives', 'starts', 'becomes', 'turns', 'gets'] and len(w) > 2]
+    return ' '.join(important_words[:3]) if important_words else label
+
+
+# Answer options per search-term prompt when generating terms for many at once
+SEARCH_TERMS_PER_CALL = 32
+
+
+def search_terms_prompt(options: list[tuple[str, str]]) -> str:
+    numbered = "\n".join(
+        f'{n}. "{label}" (question: "{question_title}")' for n, (label, question_title) in enumerate(options, 1)
+    )
+    return f"""
+You are an expert at extracting visual concepts for image search.
+
+For EACH numbered quiz answer option below, extract the 2-3 MOST IMPORTANT words
+that represent visual, photographable concepts from that answer.
+
+Rules:
+1. Focus on NOUNS and concrete objects that can be photographed
+2. Ignore filler words like "it", "is", "the", "a", "helps", "makes", "gives"
+3. Choose words that would find relevant, educational images
+4. Exactly one search term per option, in the same order as the options
+
+Examples:
+- "It helps digest food in your intestines" → "digestive system intestines"
+- "It makes your bones stronger with calcium" → "bones calcium skeleton"
+
+Options:
+{numbered}
+
+Return JSON ONLY:
+{{ "terms": ["...", "..."] }}
+"""
+
+
+def generate_image_search_terms(options: list[tuple[str, str]]) -> list[str]:
+    """
+    Image search terms for many (label, question title) pairs, with one Gemini
+    call per SEARCH_TERMS_PER_CALL options instead of one per option.
+    Chunks whose response can't be used fall back to word extraction.
+    """
+    if not llm_configured():
+        return [generate_image_search_term(label, question_title) for label, question_title in options]
+
+    chunks = [options[i:i + SEARCH_TERMS_PER_CALL] for i in range(0, len(options), SEARCH_TERMS_PER_CALL)]
+    return [term for terms in map_in_context(batch_pool, search_terms_chunk, chunks) for term in terms]
+
+
+def search_terms_chunk(options: list[tuple[str, str]]) -> list[str]:
+    try:
+        resp = gemini_complete(search_terms_prompt(options), task="search_terms_prompt")
+        terms = clean_json(extract_text_response(resp)).get("terms", [])
+        if len(terms) != len(options):
+            raise ValueError(f"Expected {len(options)} search terms, got {len(terms)}")
+    except Exception:
+        record_fallback("/api/flowchart", "heuristic_search_term")
+        return [heuristic_search_term(label) for label, _ in options]
+
+    cleaned = []
+    for term, (label, _) in zip(terms, options):
+        term = str(term).replace('"', '').replace("'", '').replace('.', '').replace(',', '').strip()
+        cleaned.append(term if 0 < len(term) < 100 else heuristic_search_term(label))
+    return cleaned
 
 
 def fetch_unsplash_image(query: str) -> str | None:
-    url = "https://api.unsplash.com/search/photos"
+    url = f"{settings.unsplash_base_url}/search/photos"
     params = {
         "query": query,
         "page": 1,
@@ -381,8 +751,16 @@ def fetch_unsplash_image(query: str) -> str | None:
         "client_id": settings.unsplash_access_key,
     }
 
+    def call():
+        timeout = deadline.timeout_for(5)
+        with upstream_slot(), track_upstream("unsplash"):
+            response = http_session().get(url, params=params, timeout=timeout)
+            # Rate-limit and error bodies must not be recorded as search results
+            response.raise_for_status()
+            return jsonfast.loads(response.content)
+
     try:
-        r = requests.get(url, params=params, timeout=5).json()
+        r = recorded("unsplash", query, call)
         results = r.get("results", [])
 
         if not results:
@@ -393,6 +771,13 @@ def fetch_unsplash_image(query: str) -> str | None:
         return None
 
 
+def fetch_unsplash_image_in_budget(query: str) -> tuple[str | None, bool]:
+    """(image url or None, whether the search ran before the time budget ran out)"""
+    if deadline.expired():
+        return None, False
+    return fetch_unsplash_image(query), True
+
+
 
 class DiagramResponse(BaseModel):
     keyword: str
@@ -403,6 +788,7 @@ class DiagramResponse(BaseModel):
 def diagram(keyword: str):
     img = fetch_unsplash_image(keyword)
     if not img:
+        record_fallback("/api/diagram", "no_image")
         return DiagramResponse(keyword=keyword, image_url=None, warning="No diagram found")
 
     return DiagramResponse(keyword=keyword, image_url=img)
@@ -446,6 +832,12 @@ class ExampleQuestion(BaseModel):
 class ExampleQuestionsResponse(BaseModel):
     questions: list[ExampleQuestion]
     warning: Optional[str] = None
+    metadata: Optional[Dict[str, Any]] = None
+
+
+example_questions_cache = cache_for_route(
+    "/api/example-questions", settings.cache_windows, settings.cache_max_entries
+)
 
 
 def example_questions_prompt() -> str:
@@ -493,15 +885,39 @@ IMPORTANT:
 """
 
 
+def generate_example_questions() -> list[dict]:
+    """
+    Ask Gemini for 4 new example questions (emoji + text, no colors yet).
+    Raises if the response can't be parsed into exactly 4 questions.
+    """
+    with span("prompt"):
+        prompt = example_questions_prompt()
+    with span("gemini"):
+        resp = gemini_complete(prompt, task="example_questions_prompt")
+        raw_text = extract_text_response(resp)
+    
+    # Parse JSON response
+    with span("parse"):
+        parsed = clean_json(raw_text)
+    questions_data = parsed.get("questions", [])
+    
+    # Validate we got exactly 4 questions
+    if len(questions_data) != 4:
+        raise ValueError(f"Expected 4 questions, got {len(questions_data)}")
+    
+    return [{"emoji": q["emoji"], "text": q["text"]} for q in questions_data]
+
+
 @router.get("/example-questions", response_model=ExampleQuestionsResponse)
-def example_questions() -> ExampleQuestionsResponse:
+def example_questions(response: Response) -> ExampleQuestionsResponse:
     """
     Generate 4 dynamic example questions for the welcome screen.
     Returns fallback questions if Gemini API fails or API key is missing.
     """
     # Check if API key is available
-    if not settings.gemini_api_key:
+    if not llm_configured():
         # Return random 4 from fallback questions
+        record_fallback("/api/example-questions", "fallback_questions")
         selected = random.sample(FALLBACK_QUESTIONS, 4)
         return ExampleQuestionsResponse(
             questions=[ExampleQuestion(**q) for q in selected],
@@ -509,22 +925,14 @@ def example_questions() -> ExampleQuestionsResponse:
         )
     
     try:
-        # Call Gemini AI
-        prompt = example_questions_prompt()
-        resp = gemini_complete(prompt)
-        raw_text = resp["candidates"][0]["content"]["parts"][0]["text"]
-        
-        # Parse JSON response
-        parsed = clean_json(raw_text)
-        questions_data = parsed.get("questions", [])
-        
-        # Validate we got exactly 4 questions
-        if len(questions_data) != 4:
-            raise ValueError(f"Expected 4 questions, got {len(questions_data)}")
+        questions_data, cache_status = example_questions_cache.get_or_load(
+            "example-questions", generate_example_questions
+        )
         
-        # Assign random colors from the gradient palette
+        # Assign colors from the gradient palette, seeded by the questions so a
+        # cached set always serializes the same way (stable ETag)
         available_colors = COLOR_GRADIENTS.copy()
-        random.shuffle(available_colors)
+        random.Random("|".join(q["text"] for q in questions_data)).shuffle(available_colors)
         
         questions = []
         for i, q in enumerate(questions_data):
@@ -535,10 +943,17 @@ def example_questions() -> ExampleQuestionsResponse:
             )
             questions.append(question)
         
-        return ExampleQuestionsResponse(questions=questions)
+        # Cache status goes in a header rather than the body, so hits and
+        # misses share an ETag; debug mode also adds it to the metadata
+        response.headers["X-Cache"] = cache_status
+        return ExampleQuestionsResponse(
+            questions=questions,
+            metadata=debug_metadata({"cache": cache_status}) if debug_enabled() else None,
+        )
         
     except Exception as e:
         # Return random 4 from fallback questions on any error
+        record_fallback("/api/example-questions", "fallback_questions")
         selected = random.sample(FALLBACK_QUESTIONS, 4)
         return ExampleQuestionsResponse(
             questions=[ExampleQuestion(**q) for q in selected],
@@ -5,6 +5,8 @@
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 const REQUEST_TIMEOUT = 30000; // 30 seconds
+const JOB_POLL_INTERVAL = 1000; // 1 second
+const JOB_TIMEOUT = 180000; // 3 minutes for a quiz generated as a background job
 
 /**
  * Custom error class for API errors
@@ -54,6 +56,40 @@ class ApiService {
     }
   }
 
+  /**
+   * Poll a background job until it finishes
+   * @private
+   */
+  async _waitForJob(jobId) {
+    const jobURL = `${this.baseURL}/api/jobs/${jobId}`;
+    const giveUpAt = Date.now() + JOB_TIMEOUT;
+
+    while (Date.now() < giveUpAt) {
+      const response = await this._fetchWithTimeout(jobURL, { method: 'GET' });
+      if (!response.ok) {
+        throw new ApiError('Lost track of the quiz being generated', response.status, null);
+      }
+
+      const job = await response.json();
+      if (job.status === 'done') {
+        return job.result;
+      }
+      if (job.status === 'failed' || job.status === 'cancelled') {
+        throw new ApiError(job.error || 'Failed to generate quiz', 500, job);
+      }
+
+      await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL));
+    }
+
+    // Give up and free the server's worker
+    this._fetchWithTimeout(jobURL, { method: 'DELETE' }).catch(() => {});
+    throw new ApiError(
+      'Request timed out. The server took too long to respond.',
+      408,
+      null
+    );
+  }
+
   /**
    * Validate flowchart structure
    * @private
@@ -133,7 +169,8 @@ class ApiService {
     }
 
     try {
-      const response = await this._fetchWithTimeout(`${this.baseURL}/api/flowchart`, {
+      // Generation runs as a background job, which can take longer than one request
+      const response = await this._fetchWithTimeout(`${this.baseURL}/api/flowchart/jobs`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -160,8 +197,8 @@ class ApiService {
         throw new ApiError(errorMessage, response.status, errorData);
       }
 
-      // Parse response
-      const data = await response.json();
+      const job = await response.json();
+      const data = await this._waitForJob(job.job_id);
 
       // Check for warning from backend
       if (data.warning) {
@@ -0,0 +1,96 @@
+"""Pre-generate quizzes for popular topics into the offline flowchart bank.
+
+Runs each topic through the same prompt/parse/image pipeline as
+/api/flowchart and writes `backend/data/flowchart_bank.jsonl` plus its `.idx`
+index. The API serves banked topics without calling Gemini or Unsplash; the
+JSON-lines file is meant to be reviewed (and hand-edited) before deploying.
+
+Usage examples:
+  python scripts/build_flowchart_bank.py
+  python scripts/build_flowchart_bank.py --topics my_topics.txt --difficulties below_grade_6
+
+Requires GEMINI_API_KEY and UNSPLASH_ACCESS_KEY (or CASSETTE_MODE=replay with a
+recorded cassette). Quizzes whose images were skipped are not banked.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1] / "backend"
+
+POPULAR_TOPICS = [
+    "Why is the sky blue?",
+    "How do plants make food?",
+    "Why does the moon glow?",
+    "How do volcanoes erupt?",
+    "How are rainbows formed?",
+    "Why do we have seasons?",
+    "How do bees make honey?",
+    "What is the water cycle?",
+    "How do birds fly?",
+    "Why do leaves change color?",
+    "How does the heart pump blood?",
+    "What are the planets in our solar system?",
+    "How do fish breathe underwater?",
+    "Why do stars twinkle?",
+    "How do butterflies grow?",
+    "What causes thunder and lightning?",
+    "How do magnets work?",
+    "Why do we need to sleep?",
+    "How do earthquakes happen?",
+    "What are dinosaurs?",
+    "How does recycling help the earth?",
+    "Why is the ocean salty?",
+    "How do our teeth grow?",
+    "What makes wind blow?",
+]
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="Build the offline flowchart bank")
+    p.add_argument("--topics", type=Path, help="File with one topic per line (default: built-in list)")
+    p.add_argument("--difficulties", default="below_grade_6,above_grade_6", help="Comma list of difficulties to bank")
+    p.add_argument("--out", type=Path, help="Bank path (default: settings.flowchart_bank_path)")
+    args = p.parse_args()
+
+    topics = POPULAR_TOPICS
+    if args.topics:
+        topics = [line.strip() for line in args.topics.read_text().splitlines() if line.strip()]
+    difficulties = [d.strip() for d in args.difficulties.split(",") if d.strip()]
+    out = args.out.resolve() if args.out else None
+
+    # Settings read .env and the default bank path relative to backend/
+    os.chdir(BACKEND)
+    sys.path.insert(0, str(BACKEND))
+    from app.core.bank import write_bank
+    from app.core.config import settings
+    from app.routers.guidance import build_flowchart
+
+    entries = []
+    failures = 0
+    for topic in topics:
+        for difficulty in difficulties:
+            try:
+                result = build_flowchart(topic, difficulty)
+            except Exception as e:
+                failures += 1
+                print(f"  ✗ {topic} [{difficulty}]: {e}", file=sys.stderr)
+                continue
+            if result.warning:
+                failures += 1
+                print(f"  ✗ {topic} [{difficulty}]: {result.warning}", file=sys.stderr)
+                continue
+            entries.append((topic, difficulty, [step.dict() for step in result.steps]))
+            print(f"  ✓ {topic} [{difficulty}] ({len(result.steps)} steps)", file=sys.stderr)
+
+    path = str(out or settings.flowchart_bank_path)
+    written = write_bank(path, entries)
+    print(f"Wrote {written} quizzes to {path} ({failures} failed)")
+    return 1 if failures and not written else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())